@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from api.routes.agent_router import router as agent_router
 from api.routes.default import router as default_router
+from api.routes.knowledge_base import router as knowledge_base_router
 
 
 def init_api(lifespan: Optional[Callable] = None) -> FastAPI:
@@ -34,5 +35,6 @@ def init_api(lifespan: Optional[Callable] = None) -> FastAPI:
     # Include all route modules
     app.include_router(agent_router)
     app.include_router(default_router)
+    app.include_router(knowledge_base_router)
 
     return app
\ No newline at end of file
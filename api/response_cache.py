@@ -0,0 +1,217 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable
+
+import numpy as np
+
+# Serve repeated questions from a cache of final answers (off by default)
+RESPONSE_CACHE_ENABLED = int(os.getenv("RESPONSE_CACHE_ENABLED", "0"))
+# Cosine similarity a query must reach to reuse a cached answer
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+# Agents whose answers may be cached; web search and crawling read live pages
+RESPONSE_CACHE_AGENTS = tuple(
+    name.strip()
+    for name in os.getenv("RESPONSE_CACHE_AGENTS", "coordinator_agent,knowledgeable_agent").split(",")
+    if name.strip()
+)
+
+# Questions about the customer's own account, orders or data
+_PERSONAL_PATTERN = re.compile(r"\b(meu|minha|meus|minhas|comigo|my|mine)\b", re.IGNORECASE)
+# E-mails and document, phone or order numbers
+_IDENTIFIER_PATTERN = re.compile(r"\S+@\S+|\d[\d.\-/ ]{2,}\d")
+# Follow-ups that only make sense with the previous turns of the conversation
+_FOLLOW_UP_PATTERN = re.compile(
+    r"\b(isso|disso|nisso|esse|essa|esses|essas|acima|anterior|it|that|this|above|previous)\b",
+    re.IGNORECASE,
+)
+# Questions that continue the previous one ("E no crédito?", "What about boleto?")
+_CONTINUATION_PATTERN = re.compile(r"^\W*(e|mas|tamb[eé]m|and|but|what about|how about)\b", re.IGNORECASE)
+
+
+def normalize_question(query: str) -> str:
+    """Normalize a question for exact-match lookups (case and whitespace insensitive)."""
+    return re.sub(r"\s+", " ", query).strip().casefold()
+
+
+def is_cacheable(query: str) -> bool:
+    """
+    Whether the answer to a question can be shared with other customers.
+
+    Questions that mention the customer's own data, carry identifiers, refer
+    back to the conversation or are too short to stand alone are never cached.
+    """
+    if len(query.split()) < 2:
+        return False
+    return not (
+        _PERSONAL_PATTERN.search(query)
+        or _IDENTIFIER_PATTERN.search(query)
+        or _FOLLOW_UP_PATTERN.search(query)
+        or _CONTINUATION_PATTERN.search(query)
+    )
+
+
+@dataclass
+class CachedResponse:
+    query: str
+    embedding: np.ndarray
+    response: str
+    author: str
+    stored_at: float
+
+
+class SemanticResponseCache:
+    """
+    Final agent answers looked up by question similarity.
+
+    A question is answered from the cache when it matches a cached question
+    exactly (after normalization) or its embedding's cosine similarity to one
+    reaches `threshold`. Entries are grouped by scope, e.g. (agent, knowledge
+    base version), so answers never outlive the knowledge they came from;
+    they also expire after `ttl` seconds and the least recently used entry
+    is evicted once `maxsize` is reached.
+
+    Only used from the event loop, so it needs no locking.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], Awaitable[np.ndarray]],
+        threshold: float = RESPONSE_CACHE_THRESHOLD,
+        maxsize: int = RESPONSE_CACHE_SIZE,
+        ttl: float | None = RESPONSE_CACHE_TTL,
+        agents: tuple[str, ...] = RESPONSE_CACHE_AGENTS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.agents = agents
+        self._clock = clock
+        self._entries: OrderedDict[tuple[Hashable, str], CachedResponse] = OrderedDict()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.errors = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._hit_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, entry: CachedResponse) -> bool:
+        return self.ttl is not None and self._clock() - entry.stored_at >= self.ttl
+
+    async def _embedding(self, query: str) -> np.ndarray:
+        vector = np.asarray(await self.embed(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def lookup(self, query: str, scope: Hashable) -> CachedResponse | None:
+        """Return the cached answer for a question in this scope, or None."""
+        started = time.perf_counter()
+        if not is_cacheable(query):
+            self.bypassed += 1
+            return None
+
+        key = (scope, normalize_question(query))
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry):
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            self._hit_seconds += time.perf_counter() - started
+            return entry
+
+        candidates = []
+        for candidate_key, candidate in list(self._entries.items()):
+            if candidate_key[0] != scope:
+                continue
+            if self._expired(candidate):
+                del self._entries[candidate_key]
+                self.expirations += 1
+            else:
+                candidates.append((candidate_key, candidate))
+        if not candidates:
+            self.misses += 1
+            return None
+
+        try:
+            embedding = await self._embedding(query)
+        except Exception as e:
+            # The agent can still answer; the cache is only a shortcut
+            print(f"Response cache lookup failed: {e}")
+            self.errors += 1
+            return None
+
+        similarities = np.stack([candidate.embedding for _, candidate in candidates]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            self.misses += 1
+            return None
+        best_key, entry = candidates[best]
+        self._entries.move_to_end(best_key)
+        self.semantic_hits += 1
+        self._hit_seconds += time.perf_counter() - started
+        return entry
+
+    async def store(self, query: str, scope: Hashable, response: str, author: str) -> bool:
+        """
+        Cache a final answer, unless the question is personal or the agent is not cacheable.
+
+        Returns:
+            Whether the answer was cached.
+        """
+        if self.maxsize <= 0 or author not in self.agents or not is_cacheable(query):
+            return False
+        try:
+            embedding = await self._embedding(query)
+        except Exception as e:
+            print(f"Response cache store failed: {e}")
+            self.errors += 1
+            return False
+
+        key = (scope, normalize_question(query))
+        self._entries[key] = CachedResponse(query, embedding, response, author, self._clock())
+        self._entries.move_to_end(key)
+        self.stores += 1
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters, the hit rate and the average hit latency."""
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses + self.errors
+        return {
+            "hits": hits,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "errors": self.errors,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "avg_hit_ms": 1000 * self._hit_seconds / hits if hits else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "threshold": self.threshold,
+        }
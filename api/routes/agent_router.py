@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Response
 from pydantic import BaseModel, Field
+from google.adk.events import Event
 from google.genai import types
 
+from support_agent.sub_agents.crawler.agent import ACTIVATE_WEB_DRIVER, get_driver_pool, get_fetch_stats
+from support_agent.sub_agents.knowledgeable.agent import get_index_version
+from api.response_cache import is_cacheable
+
 # Create router instance
 router = APIRouter(prefix="/api/v1", tags=["Agent"])
 
@@ -17,11 +22,35 @@ def get_runner(request: Request):
     return request.app.state.runner
 
 
+def get_response_cache(request: Request):
+    # None unless RESPONSE_CACHE_ENABLED is set (see main.py)
+    return getattr(request.app.state, "response_cache", None)
+
+
+def cache_scope(runner) -> tuple[str, int]:
+    # Answers are only reused by the same app over the same knowledge base version
+    return (runner.app_name, get_index_version())
+
+
+async def append_cached_turn(session_service, session, message: types.Content, cached) -> None:
+    """Record a question answered from the response cache in the session, as if the agent had run."""
+    invocation_id = Event.new_id()
+    await session_service.append_event(session, Event(invocation_id=invocation_id, author="user", content=message))
+    await session_service.append_event(session, Event(
+        invocation_id=invocation_id,
+        author=cached.author,
+        content=types.Content(role="model", parts=[types.Part(text=cached.response)]),
+        custom_metadata={"response_cache": "hit"},
+    ))
+
+
 @router.post("/agent-webhook")
 async def call_agent_async(
     webhook_request: AgentWebhookRequest,
+    response: Response,
     session_service=Depends(get_session_service),
     runner=Depends(get_runner),
+    response_cache=Depends(get_response_cache),
 ):
     user_query = webhook_request.query  # pydantic parses the json by default
     user_id = webhook_request.user_id
@@ -46,6 +75,16 @@ async def call_agent_async(
             session_id=session_id
         )
 
+    # Any turn may be answered from or stored in the cache, as long as the
+    # question stands on its own; follow-ups ("e no crédito?") always run the agent
+    use_cache = response_cache is not None and is_cacheable(user_query)
+    if use_cache:
+        cached = await response_cache.lookup(user_query, cache_scope(runner))
+        if cached is not None:
+            await append_cached_turn(session_service, session, message, cached)
+            response.headers["X-Response-Cache"] = "hit"
+            return {"response": cached.response}
+
     # Run the agent asynchronously and return the final response
     async for event in runner.run_async(
         user_id=user_id,
@@ -53,6 +92,31 @@ async def call_agent_async(
         new_message=message
     ):
         if event.is_final_response():
-            return {"response": event.content.parts[0].text}
+            text = event.content.parts[0].text
+            if use_cache:
+                # Scoped after the run, so it names the index version the answer used
+                await response_cache.store(user_query, cache_scope(runner), text, event.author)
+                response.headers["X-Response-Cache"] = "miss"
+            return {"response": text}
+
+    return {"response": "No final response"}
+
+
+@router.get("/response-cache/stats")
+async def response_cache_stats(response_cache=Depends(get_response_cache)):
+    """Hit rate and size of the semantic response cache"""
+    if response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.stats()}
+
+
+@router.get("/web-driver-pool/stats")
+async def web_driver_pool_stats():
+    """Occupancy and queueing of the crawler's browser pool"""
+    return {"enabled": bool(ACTIVATE_WEB_DRIVER), **get_driver_pool().stats()}
+
 
-    return {"response": "No final response"}
\ No newline at end of file
+@router.get("/crawler/fetch-stats")
+async def crawler_fetch_stats():
+    """Pages crawled over plain HTTP, in the browser or from the page cache, and why the browser was needed"""
+    return get_fetch_stats()
\ No newline at end of file
@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 
 # Create router instance
 router = APIRouter(prefix="/api/v1", tags=["App"])
@@ -11,6 +12,13 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "Agents Swarm API"}
 
+@router.get("/ready")
+async def readiness_check(request: Request):
+    """Readiness endpoint: 503 until startup warm-up has finished"""
+    warmup = getattr(request.app.state, "warmup", None)
+    report = warmup.report() if warmup is not None else {"ready": True, "steps": {}}
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
 @router.get("/")
 def read_root():
     return {"message": "Welcome to Agents Swarm API", "status": "running"}
\ No newline at end of file
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import secrets
+from fastapi import APIRouter, Header, HTTPException
+from pydantic import BaseModel, Field
+
+from support_agent.sub_agents.knowledgeable.agent import (
+    search_filters,
+    search_knowledge_base_async,
+    update_knowledge_base,
+)
+
+# Token required in the X-Admin-Token header; updates are disabled when unset
+KB_ADMIN_TOKEN = os.getenv("KB_ADMIN_TOKEN", "")
+
+# Create router instance
+router = APIRouter(prefix="/api/v1/knowledge-base", tags=["Knowledge Base"])
+
+class DocumentRequest(BaseModel):
+    url: str = Field(..., description="Page URL, used as the document id")
+    content: str = Field(..., description="Page text")
+
+class DocumentsUpdateRequest(BaseModel):
+    upserts: list[DocumentRequest] = Field(default_factory=list, description="Documents to add or replace")
+    deletes: list[str] = Field(default_factory=list, description="URLs of documents to remove")
+
+
+def check_admin_token(token: str | None):
+    if not KB_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Knowledge base updates are disabled (KB_ADMIN_TOKEN is not set)")
+    if token is None or not secrets.compare_digest(token, KB_ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+async def apply_update(upserts: dict[str, str], deletes: list[str]) -> dict:
+    # Re-embedding and index builds block, so they run off the event loop
+    return await asyncio.to_thread(update_knowledge_base, upserts, deletes)
+
+
+@router.get("/search")
+async def search(
+    q: str,
+    top_k: int = 5,
+    product: str | None = None,
+    locale: str | None = None,
+    url_prefix: str | None = None,
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    min_score: float | None = None,
+    max_score_gap: float | None = None,
+):
+    """Search the knowledge base, optionally filtered and trimmed to a context budget"""
+    # Only invalid filters are the client's fault; other errors are server errors
+    try:
+        search_filters(product, locale, url_prefix)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await search_knowledge_base_async(
+        q, top_k, product, locale, url_prefix, max_chars, max_tokens, min_score, max_score_gap
+    )
+
+@router.put("/documents")
+async def upsert_document(document: DocumentRequest, x_admin_token: str | None = Header(default=None)):
+    """Add or replace one document and publish a new index version"""
+    check_admin_token(x_admin_token)
+    return await apply_update({document.url: document.content}, [])
+
+@router.delete("/documents")
+async def delete_document(url: str, x_admin_token: str | None = Header(default=None)):
+    """Remove one document and publish a new index version"""
+    check_admin_token(x_admin_token)
+    report = await apply_update({}, [url])
+    if not report["deleted"]:
+        raise HTTPException(status_code=404, detail=f"Document not found: {url}")
+    return report
+
+@router.post("/documents/batch")
+async def update_documents(update: DocumentsUpdateRequest, x_admin_token: str | None = Header(default=None)):
+    """Apply several upserts and deletes as a single new index version"""
+    check_admin_token(x_admin_token)
+    upserts = {document.url: document.content for document in update.upserts}
+    return await apply_update(upserts, update.deletes)
@@ -0,0 +1,41 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+
+class WarmupTracker:
+    """
+    Runs expensive startup steps in the background and records their progress.
+
+    Steps run concurrently. The worker is ready once every step has finished;
+    a failed step is reported but does not keep the worker out of rotation,
+    since the resource it warms is still built lazily on first use.
+    """
+
+    def __init__(self, steps: dict[str, Callable[[], Awaitable]]):
+        self.steps = steps
+        self.status = {name: {"state": "pending"} for name in steps}
+
+    @property
+    def ready(self) -> bool:
+        return all(status["state"] in ("done", "failed") for status in self.status.values())
+
+    async def run(self) -> None:
+        """Run every step, recording state, duration and errors."""
+        await asyncio.gather(*(self._run_step(name, step) for name, step in self.steps.items()))
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable]) -> None:
+        started = time.monotonic()
+        self.status[name] = {"state": "running"}
+        try:
+            await step()
+        except Exception as e:
+            print(f"Warm-up step {name} failed: {e}")
+            self.status[name] = {"state": "failed", "error": str(e)}
+        else:
+            self.status[name] = {"state": "done"}
+        self.status[name]["seconds"] = round(time.monotonic() - started, 3)
+
+    def report(self) -> dict:
+        """Return readiness and the progress of each step."""
+        return {"ready": self.ready, "steps": {name: dict(status) for name, status in self.status.items()}}
@@ -0,0 +1,121 @@
+"""
+Latency and throughput of the crawler's HTML to text extraction against the original BeautifulSoup version.
+
+Runs on the crawler test fixtures, on synthetic pages shaped like real ones
+(inline scripts and SVG icons, link-heavy navigation and footer, long
+articles) and on any saved pages given with --files. Run from the repository root:
+
+    python -m benchmarks.html_extract --sizes 100000 1000000 4000000
+    python -m benchmarks.html_extract --files page1.html page2.html
+"""
+
+import argparse
+import importlib.util
+import time
+import numpy as np
+
+from support_agent.sub_agents.crawler.extract import extract_text
+from tests.fixtures.mock_data import COMPLEX_HTML, SIMPLE_HTML
+
+MAX_CHARS = 4_000_000
+_WORDS = (
+    "maquininha pix conta digital taxa débito crédito parcelado venda cartão cliente dinheiro "
+    "na hora rendimento boleto link de pagamento loja online tarifa antecipação recebimento"
+).split()
+
+
+def beautifulsoup_text(html: str) -> str:
+    """The original extraction: slice, BeautifulSoup tree, one find_all per unwanted tag, get_text."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html[0:MAX_CHARS], "html.parser")
+    for tag in ["script", "style", "nav", "footer", "aside", "header", "path"]:
+        for element in soup.find_all(tag):
+            element.decompose()
+    return soup.get_text(separator=" ", strip=True)
+
+
+def synthetic_page(size: int, seed: int = 0) -> str:
+    """A page of roughly `size` characters with the chrome and markup of a product site."""
+    rng = np.random.default_rng(seed)
+
+    def sentence(n: int) -> str:
+        return " ".join(rng.choice(_WORDS, size=n)).capitalize() + "."
+
+    icon = '<svg viewBox="0 0 24 24"><path d="M12 2L2 7l10 5 10-5-10-5z"/><path d="M2 17l10 5 10-5"/></svg>'
+    links = "".join(f'<li><a href="/p/{i}">{icon}{sentence(2)}</a></li>' for i in range(40))
+    head = (
+        "<!DOCTYPE html><html><head><title>Maquininha</title>"
+        f"<script>{'window.__DATA__.push({a: 1, b: [1, 2, 3]});' * 400}</script>"
+        f"<style>{'.card{display:flex;margin:0 auto}' * 200}</style></head><body>"
+        f"<header><nav><ul>{links}</ul></nav></header>"
+    )
+    tail = f'<aside class="related"><ul>{links}</ul></aside><footer><ul>{links}</ul></footer></body></html>'
+
+    sections = []
+    length = len(head) + len(tail)
+    while length < size:
+        section = (
+            f'<section class="block"><h2>{sentence(4)}</h2>'
+            + "".join(f"<p>{sentence(25)} <a href='/ajuda'>{sentence(2)}</a> {sentence(15)}</p>" for _ in range(5))
+            + f'<div class="cta">{icon}<button>{sentence(2)}</button></div></section>'
+        )
+        sections.append(section)
+        length += len(section)
+    return head + '<main><article>' + "".join(sections) + "</article></main>" + tail
+
+
+def measure(extract, html: str, repeats: int) -> tuple[np.ndarray, str]:
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        text = extract(html)
+        latencies.append(time.perf_counter() - started)
+    return np.array(latencies) * 1000, text
+
+
+def extractors() -> dict:
+    """Extraction methods by name; lxml only when it is installed."""
+    methods = {
+        "beautifulsoup": beautifulsoup_text,
+        "html.parser": lambda html: extract_text(html, MAX_CHARS, "html.parser"),
+        "html.parser+main": lambda html: extract_text(html, MAX_CHARS, "html.parser", main_content=True),
+    }
+    if importlib.util.find_spec("lxml") is not None:
+        methods["lxml"] = lambda html: extract_text(html, MAX_CHARS, "lxml")
+        methods["lxml+main"] = lambda html: extract_text(html, MAX_CHARS, "lxml", main_content=True)
+    return methods
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 4_000_000],
+                        help="characters of each synthetic page")
+    parser.add_argument("--files", nargs="*", default=[], help="saved HTML pages to include")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    pages = [("SIMPLE_HTML", SIMPLE_HTML), ("COMPLEX_HTML", COMPLEX_HTML)]
+    pages += [(f"synthetic {size / 1e6:g}M", synthetic_page(size)) for size in args.sizes]
+    for path in args.files:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append((path, f.read()))
+
+    print(f"{'page':<24} {'method':<18} {'p50 ms':>9} {'p99 ms':>9} {'MiB/s':>8} {'chars':>9}  same text")
+    for name, html in pages:
+        baseline = None
+        for method, extract in extractors().items():
+            latencies, text = measure(extract, html, args.repeats)
+            baseline = text if baseline is None else baseline
+            p50 = np.percentile(latencies, 50)
+            throughput = min(len(html), MAX_CHARS) / 2**20 / (p50 / 1000) if p50 else float("inf")
+            same = "main" if method.endswith("+main") else ("yes" if text == baseline else "no")
+            print(
+                f"{name[:24]:<24} {method:<18} {p50:>9.2f} {np.percentile(latencies, 99):>9.2f} "
+                f"{throughput:>8.1f} {len(text):>9}  {same}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,84 @@
+"""
+Memory, latency and recall of the quantized index against a float64 baseline.
+
+Run from the repository root:
+
+    python -m benchmarks.quantization --passages 20000 --dim 768
+"""
+
+import argparse
+import time
+import numpy as np
+
+from support_agent.sub_agents.knowledgeable.quantized_index import QuantizedIndex
+from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+
+def synthetic_embeddings(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered vectors whose variance decays with the dimension index, like real embeddings."""
+    rng = np.random.default_rng(seed)
+    decay = 1.0 / np.sqrt(1.0 + np.arange(dim) / 32.0)
+    centers = rng.normal(size=(max(n // 50, 1), dim)) * decay
+    labels = rng.integers(len(centers), size=n)
+    return (centers[labels] + 0.4 * rng.normal(size=(n, dim)) * decay).astype(np.float32)
+
+
+def float64_baseline(vectors: np.ndarray, queries: np.ndarray, top_k: int) -> np.ndarray:
+    """Exact top-k ids computed the way the original code did: float64 cosine similarity."""
+    matrix = vectors.astype(np.float64)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = queries.astype(np.float64) @ matrix.T
+    return np.argsort(-scores, axis=1)[:, :top_k]
+
+
+def measure(index, queries: np.ndarray, top_k: int) -> tuple[np.ndarray, np.ndarray]:
+    ids = []
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        query_ids, _ = index.search(query, top_k)
+        latencies.append(time.perf_counter() - started)
+        ids.append(query_ids)
+    return np.array(ids), np.array(latencies) * 1000
+
+
+def recall(ids: np.ndarray, baseline: np.ndarray) -> float:
+    return sum(len(set(a) & set(b)) for a, b in zip(ids, baseline)) / baseline.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--passages", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.passages, args.dim)
+    queries = synthetic_embeddings(args.queries, args.dim, seed=1)
+    baseline = float64_baseline(vectors, queries, args.top_k)
+
+    configs = [
+        ("float32 exact", lambda: VectorIndex(vectors)),
+        ("float16 + rerank", lambda: QuantizedIndex(vectors, "float16")),
+        ("int8 + rerank", lambda: QuantizedIndex(vectors, "int8")),
+        ("int8 no rerank", lambda: QuantizedIndex(vectors, "int8", rerank_factor=0)),
+        ("int8 256d + rerank", lambda: QuantizedIndex(vectors, "int8", dims=256)),
+        ("int8 128d + rerank", lambda: QuantizedIndex(vectors, "int8", dims=128)),
+    ]
+
+    print(f"{args.passages} passages x {args.dim} dims; float64 baseline "
+          f"{vectors.size * 8 / 2**20:.1f} MiB")
+    print(f"{'index':<20} {'scan MiB':>9} {'p50 ms':>8} {'p99 ms':>8} {'recall@' + str(args.top_k):>10}")
+    for name, build in configs:
+        index = build()
+        nbytes = index.nbytes if isinstance(index, QuantizedIndex) else index.matrix.nbytes
+        ids, latencies = measure(index, queries, args.top_k)
+        print(
+            f"{name:<20} {nbytes / 2**20:>9.1f} {np.percentile(latencies, 50):>8.2f} "
+            f"{np.percentile(latencies, 99):>8.2f} {recall(ids, baseline):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
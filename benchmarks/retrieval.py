@@ -0,0 +1,297 @@
+"""
+Build time, memory, query latency and recall of every retrieval mode versus corpus size.
+
+Runs offline: synthetic passages are embedded with the local hashing embedder.
+Run from the repository root:
+
+    python -m benchmarks.retrieval --sizes 1000 10000 100000
+    python -m benchmarks.retrieval --sizes 1000 --compare benchmarks/results/retrieval-<commit>.json
+
+Results are written as JSON (one record per corpus size and mode) so runs on
+different commits can be compared; --compare exits with status 1 when a mode
+got slower or less accurate than the baseline by more than --tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable
+import numpy as np
+
+from support_agent.sub_agents.knowledgeable.bm25 import BM25Index, reciprocal_rank_fusion
+from support_agent.sub_agents.knowledgeable.embeddings import LocalEmbeddingBackend, embed_texts
+from support_agent.sub_agents.knowledgeable.ivf_index import IVFIndex
+from support_agent.sub_agents.knowledgeable.quantized_index import QuantizedIndex
+from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex, normalize_rows
+
+MODES = ("loop", "exact", "quantized", "ivf", "lexical", "hybrid")
+# Same fusion depth as the knowledgeable agent's hybrid search
+HYBRID_CANDIDATES_PER_RESULT = 4
+WORDS_PER_PASSAGE = 60
+TOPIC_WORDS = 200
+_SYLLABLES = "ba be bi bo bu ca ce ci co cu da de di do du fa fe fi fo fu ga ge gi go gu la le li lo lu ma me mi mo mu na ne ni no nu pa pe pi po pu ra re ri ro ru sa se si so su ta te ti to tu va ve vi vo vu".split()
+
+
+def synthetic_corpus(n: int, n_queries: int, seed: int = 0) -> tuple[list[str], list[str], np.ndarray]:
+    """
+    Generate topical passages and queries drawn from them.
+
+    Each passage mixes words of one topic with common background words; each
+    query is four topic words taken from one passage, its source.
+
+    Returns:
+        (passages, queries, source passage id of each query)
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(sorted({
+        "".join(rng.choice(_SYLLABLES, size=rng.integers(2, 5))) for _ in range(20000)
+    }))
+    n_topics = max(n // 100, 10)
+    topics = [rng.choice(len(vocabulary), size=TOPIC_WORDS, replace=False) for _ in range(n_topics)]
+    # Zipf-like background word frequencies
+    background = 1.0 / np.arange(1, len(vocabulary) + 1)
+    background /= background.sum()
+
+    passages, topic_words = [], []
+    for topic in rng.integers(n_topics, size=n):
+        n_topic = int(WORDS_PER_PASSAGE * 0.7)
+        own = rng.choice(topics[topic], size=n_topic)
+        words = np.concatenate([own, rng.choice(len(vocabulary), size=WORDS_PER_PASSAGE - n_topic, p=background)])
+        rng.shuffle(words)
+        passages.append(" ".join(vocabulary[words]))
+        topic_words.append(np.unique(own))
+
+    sources = rng.choice(n, size=n_queries, replace=n_queries > n)
+    queries = [" ".join(vocabulary[rng.choice(topic_words[i], size=4, replace=False)]) for i in sources]
+    return passages, queries, sources
+
+
+def loop_search(vectors: list[np.ndarray], query: np.ndarray, top_k: int) -> list[int]:
+    """The original retrieval: one cosine similarity per passage in a Python loop, then a full sort."""
+    similarities = []
+    for i, vector in enumerate(vectors):
+        similarity = np.dot(query, vector) / (np.linalg.norm(query) * np.linalg.norm(vector))
+        similarities.append((i, similarity))
+    similarities.sort(key=lambda item: item[1], reverse=True)
+    return [i for i, _ in similarities[:top_k]]
+
+
+def build_bm25(passages: list[str]) -> BM25Index:
+    index = BM25Index()
+    for text in passages:
+        index.add(text)
+    return index
+
+
+def searchers(
+    passages: list[str], vectors: np.ndarray, nprobe: int = 8
+) -> dict[str, tuple[Callable[[], object], Callable[[object, str, np.ndarray, int], list[int]]]]:
+    """(build, search) pairs per mode; search takes the index, query text, query vector and k."""
+
+    def vector_search(index, text, vector, k):
+        return list(index.search(vector, k)[0])
+
+    def hybrid_search(indexes, text, vector, k):
+        vector_index, bm25 = indexes
+        candidates = k * HYBRID_CANDIDATES_PER_RESULT
+        vector_ids, _ = vector_index.search(vector, candidates)
+        lexical_ids, _ = bm25.search(text, candidates)
+        return [i for i, _ in reciprocal_rank_fusion([list(vector_ids), list(lexical_ids)])[:k]]
+
+    return {
+        "loop": (lambda: [row.copy() for row in vectors], lambda rows, text, vector, k: loop_search(rows, vector, k)),
+        "exact": (lambda: VectorIndex(vectors), vector_search),
+        "quantized": (lambda: QuantizedIndex(vectors), vector_search),
+        "ivf": (lambda: IVFIndex.build(vectors, nprobe=nprobe), vector_search),
+        "lexical": (lambda: build_bm25(passages), lambda index, text, vector, k: list(index.search(text, k)[0])),
+        "hybrid": (lambda: (VectorIndex(vectors), build_bm25(passages)), hybrid_search),
+    }
+
+
+def retained_bytes(build: Callable[[], object]) -> int:
+    """Memory still allocated by a build once it returns (NumPy buffers included)."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        index = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del index
+    return after - before
+
+
+def benchmark_mode(
+    build: Callable[[], object],
+    search: Callable[[object, str, np.ndarray, int], list[int]],
+    queries: list[str],
+    query_vectors: np.ndarray,
+    exact_ids: np.ndarray,
+    sources: np.ndarray,
+    top_k: int,
+    measure_memory: bool = True,
+) -> dict:
+    started = time.perf_counter()
+    index = build()
+    build_seconds = time.perf_counter() - started
+
+    latencies, found_exact, hits = [], 0, 0
+    for text, vector, expected, source in zip(queries, query_vectors, exact_ids, sources):
+        started = time.perf_counter()
+        ids = search(index, text, vector, top_k)
+        latencies.append(time.perf_counter() - started)
+        found_exact += len(set(ids) & set(expected.tolist()))
+        hits += int(source) in ids
+    del index
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "build_s": round(build_seconds, 4),
+        # Timed separately: tracing allocations slows the build down
+        "memory_bytes": retained_bytes(build) if measure_memory else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 4),
+        "mean_ms": round(float(latencies.mean()), 4),
+        # Overlap with the exact float64 cosine top-k
+        "recall_at_k": round(found_exact / exact_ids.size, 4),
+        # Share of queries whose source passage is in the top-k
+        "hit_at_k": round(hits / len(queries), 4),
+    }
+
+
+def run(
+    sizes: list[int],
+    modes: list[str] = MODES,
+    n_queries: int = 200,
+    top_k: int = 10,
+    dim: int = 384,
+    loop_limit: int = 10000,
+    measure_memory: bool = True,
+    nprobe: int = 8,
+    log: Callable[[str], None] = print,
+) -> list[dict]:
+    """Benchmark every mode on a synthetic corpus of each size; returns one record per (size, mode)."""
+    backend = LocalEmbeddingBackend(dim)
+    records = []
+    for size in sizes:
+        passages, queries, sources = synthetic_corpus(size, n_queries)
+        started = time.perf_counter()
+        vectors = embed_texts(passages, backend, batch_size=1000, max_concurrency=1)
+        query_vectors = backend.embed_batch(queries)
+        log(f"{size} passages embedded in {time.perf_counter() - started:.1f}s")
+
+        unit = normalize_rows(vectors).astype(np.float64)
+        exact_scores = normalize_rows(query_vectors).astype(np.float64) @ unit.T
+        exact_ids = np.argsort(-exact_scores, axis=1, kind="stable")[:, :top_k]
+
+        for mode, (build, search) in searchers(passages, vectors, nprobe).items():
+            if mode not in modes:
+                continue
+            if mode == "loop" and size > loop_limit:
+                log(f"{mode:<10} skipped above {loop_limit} passages (--loop-limit)")
+                continue
+            result = benchmark_mode(build, search, queries, query_vectors, exact_ids, sources, top_k, measure_memory)
+            records.append({"size": size, "mode": mode, **result})
+            memory = result["memory_bytes"]
+            log(
+                f"{mode:<10} build {result['build_s']:>8.3f}s"
+                f"  mem {memory / 2**20 if memory is not None else float('nan'):>8.1f} MiB"
+                f"  p50 {result['p50_ms']:>8.3f}ms  p99 {result['p99_ms']:>8.3f}ms"
+                f"  recall@{top_k} {result['recall_at_k']:.3f}  hit@{top_k} {result['hit_at_k']:.3f}"
+            )
+    return records
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(records: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """
+    Describe regressions against a baseline run.
+
+    A mode regresses when its p50 latency grows by more than `tolerance`
+    (relative) or its recall@k drops by more than `tolerance` (absolute).
+    """
+    previous = {(record["size"], record["mode"]): record for record in baseline}
+    regressions = []
+    for record in records:
+        before = previous.get((record["size"], record["mode"]))
+        if before is None:
+            continue
+        label = f"{record['mode']} @ {record['size']}"
+        if record["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p50 {before['p50_ms']:.3f}ms -> {record['p50_ms']:.3f}ms")
+        if record["recall_at_k"] < before["recall_at_k"] - tolerance:
+            regressions.append(f"{label}: recall {before['recall_at_k']:.3f} -> {record['recall_at_k']:.3f}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--loop-limit", type=int, default=10000,
+                        help="skip the Python loop baseline for larger corpora")
+    parser.add_argument("--ivf-nprobe", type=int, default=8, help="lists probed per query by the IVF index")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced second build per mode")
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/retrieval-<commit>.json)")
+    parser.add_argument("--compare", help="baseline JSON file from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    records = run(
+        args.sizes, args.modes, args.queries, args.top_k, args.dim, args.loop_limit, not args.no_memory,
+        args.ivf_nprobe,
+    )
+    commit = git_commit()
+    report = {
+        "benchmark": "retrieval",
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpus": os.cpu_count(),
+        },
+        "settings": {
+            "queries": args.queries,
+            "top_k": args.top_k,
+            "dim": args.dim,
+            "ivf_nprobe": args.ivf_nprobe,
+            "embedder": "local",
+        },
+        "results": records,
+    }
+
+    output = args.output or os.path.join("benchmarks", "results", f"retrieval-{(commit or 'local')[:12]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(records, json.load(f)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
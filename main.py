@@ -1,9 +1,42 @@
+import asyncio
+import os
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
 from support_agent.agent import root_agent
+from support_agent.sub_agents.crawler.agent import get_driver_pool, shutdown_driver_pool
+from support_agent.sub_agents.knowledgeable.agent import (
+    KNOWLEDGE_BASE_PATH,
+    get_knowledge_index_async,
+    get_query_embedding_async,
+    sync_knowledge_base,
+)
+from support_agent.sub_agents.knowledgeable.watcher import FileWatcher
 from api.main import init_api
+from api.response_cache import RESPONSE_CACHE_ENABLED, SemanticResponseCache
+from api.warmup import WarmupTracker
+
+# Warm up expensive resources in the background at startup
+WARMUP_ENABLED = int(os.getenv("WARMUP_ENABLED", "1"))
+# Also launch the crawler's browser during warm-up (needs ACTIVATE_WEB_DRIVER=1)
+WARMUP_WEB_DRIVER = int(os.getenv("WARMUP_WEB_DRIVER", "0"))
+# Reload the knowledge base when its data file changes (polled every N seconds)
+KB_WATCH = int(os.getenv("KB_WATCH", "0"))
+KB_WATCH_INTERVAL = float(os.getenv("KB_WATCH_INTERVAL", "2"))
+
+
+def warmup_steps() -> dict:
+    """Startup work that would otherwise slow down the first user requests."""
+    steps = {}
+    if WARMUP_ENABLED:
+        # Loads the knowledge base and builds (or loads) its indexes
+        steps["knowledge_base"] = get_knowledge_index_async
+        if WARMUP_WEB_DRIVER:
+            # Pre-launches every pooled browser
+            steps["web_driver"] = lambda: asyncio.to_thread(get_driver_pool().fill)
+    return steps
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -20,14 +53,35 @@ async def lifespan(app: FastAPI):
 
     print("🟢 Session service and runner initialized")
 
+    # Repeated questions are answered from cached final responses when enabled;
+    # questions are embedded like knowledge base queries, sharing their cache
+    app.state.response_cache = SemanticResponseCache(get_query_embedding_async) if RESPONSE_CACHE_ENABLED else None
+
+    # Warm-up runs in the background; /api/v1/ready reports its progress
+    app.state.warmup = WarmupTracker(warmup_steps())
+    app.state.warmup_task = asyncio.create_task(app.state.warmup.run())
+
+    app.state.kb_watcher = None
+    if KB_WATCH:
+        app.state.kb_watcher = FileWatcher(KNOWLEDGE_BASE_PATH, sync_knowledge_base, KB_WATCH_INTERVAL).start()
+
     yield
 
     # Shutdown: Clean up resources
     print("🛑 Shutting down Agents Swarm API...")
 
+    app.state.warmup_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await app.state.warmup_task
+    if app.state.kb_watcher is not None:
+        app.state.kb_watcher.stop()
+    # Quits every browser and deletes its temporary profile
+    await asyncio.to_thread(shutdown_driver_pool)
+
     # Clean up resources if needed
     app.state.session_service = None
     app.state.runner = None
+    app.state.response_cache = None
 
     print("✓ Cleanup completed")
 
@@ -1,12 +1,22 @@
+import asyncio
+import requests
+import shutil
+import tempfile
+import threading
 import warnings
 import selenium
-from bs4 import BeautifulSoup
 from google.adk.agents.llm_agent import Agent
 from google.adk.tools.tool_context import ToolContext
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from . import prompt
+from .extract import extract_text, resolve_parser
+from .fetch import FetchStats, HttpFetcher, matches_domain, rendering_reason
+from .page_cache import CachedPage, PageCache
+from .pool import DriverPool, process_tree_rss
 from pydantic import BaseModel, Field
+from functools import partial
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -14,61 +24,353 @@ load_dotenv()
 warnings.filterwarnings("ignore", category=UserWarning)
 
 ACTIVATE_WEB_DRIVER = int(os.getenv("ACTIVATE_WEB_DRIVER", "0"))
+# Browsers kept for concurrent crawls; each crawling session leases one
+WEB_DRIVER_POOL_SIZE = int(os.getenv("WEB_DRIVER_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+# Seconds a crawl waits for a free browser before failing
+WEB_DRIVER_ACQUIRE_TIMEOUT = float(os.getenv("WEB_DRIVER_ACQUIRE_TIMEOUT", "30"))
+# Seconds after which a session's unused browser may be given to another session
+WEB_DRIVER_LEASE_TTL = float(os.getenv("WEB_DRIVER_LEASE_TTL", "120"))
+# Recycle a browser after this many page loads, or once it uses more memory
+# than this (MB, whole process tree); 0 disables either limit
+WEB_DRIVER_MAX_PAGES = int(os.getenv("WEB_DRIVER_MAX_PAGES", "50"))
+WEB_DRIVER_MAX_RSS_MB = int(os.getenv("WEB_DRIVER_MAX_RSS_MB", "1024"))
+# Shut down browsers unused for this many seconds; 0 keeps them running
+WEB_DRIVER_IDLE_TIMEOUT = float(os.getenv("WEB_DRIVER_IDLE_TIMEOUT", "600"))
+# Hard limits for loading a page and running scripts in it
+WEB_DRIVER_PAGE_LOAD_TIMEOUT = float(os.getenv("WEB_DRIVER_PAGE_LOAD_TIMEOUT", "30"))
+WEB_DRIVER_SCRIPT_TIMEOUT = float(os.getenv("WEB_DRIVER_SCRIPT_TIMEOUT", "10"))
 
-_driver = None
+# Try a plain HTTP GET before rendering a page in the browser
+CRAWLER_HTTP_FETCH = int(os.getenv("CRAWLER_HTTP_FETCH", "1"))
+CRAWLER_HTTP_TIMEOUT = float(os.getenv("CRAWLER_HTTP_TIMEOUT", "10"))
+CRAWLER_HTTP_POOL_SIZE = int(os.getenv("CRAWLER_HTTP_POOL_SIZE", "10"))
+# Fetched pages with less text than this are rendered in the browser instead
+CRAWLER_MIN_TEXT_CHARS = int(os.getenv("CRAWLER_MIN_TEXT_CHARS", "200"))
+# Comma-separated domains (and their subdomains) that always need the browser,
+# or never do
+CRAWLER_BROWSER_DOMAINS = tuple(
+    domain.strip().lower() for domain in os.getenv("CRAWLER_BROWSER_DOMAINS", "").split(",") if domain.strip()
+)
+CRAWLER_HTTP_DOMAINS = tuple(
+    domain.strip().lower() for domain in os.getenv("CRAWLER_HTTP_DOMAINS", "").split(",") if domain.strip()
+)
 
-def get_driver():
-    """Lazy initialization of the WebDriver. Only creates driver when first needed."""
-    global _driver
-    if _driver is None:
-        if not ACTIVATE_WEB_DRIVER:
-            raise RuntimeError("WebDriver is not activated. Set ACTIVATE_WEB_DRIVER=1 to enable.")
+# Crawled page text is shared by all sessions for this many seconds, then
+# revalidated with the server (ETag / Last-Modified); 0 disables the cache
+CRAWLER_CACHE_TTL = float(os.getenv("CRAWLER_CACHE_TTL", "300"))
+CRAWLER_CACHE_SIZE = int(os.getenv("CRAWLER_CACHE_SIZE", "256"))
 
-        options = Options()
-        options.binary_location = os.getenv("CHROME_BIN", "/usr/bin/chromium")
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920x1080")
-        options.add_argument("--verbose")
-        options.add_argument("user-data-dir=/tmp/selenium")
+# HTML parser for text extraction: "html.parser" (standard library), "lxml"
+# (faster; needs lxml installed) or "auto" (lxml when installed)
+CRAWLER_HTML_PARSER = resolve_parser(os.getenv("CRAWLER_HTML_PARSER", "html.parser"))
+# Keep only a page's main content block when one container holds most of its
+# text; text outside that block is dropped
+CRAWLER_MAIN_CONTENT = int(os.getenv("CRAWLER_MAIN_CONTENT", "0"))
+# Most characters of a page read, and of its text returned
+MAX_PAGE_CHARS = 4_000_000
 
-        service = Service(os.getenv("CHROMEDRIVER_PATH", "/usr/bin/chromedriver"))
-        _driver = selenium.webdriver.Chrome(service=service, options=options)
+# Lease key for calls made outside an ADK session (scripts, tests)
+DEFAULT_SESSION = "default"
+# Sessions whose current page text is kept for get_page_text
+MAX_FETCHED_PAGES = 256
 
-    return _driver
+_driver_pool = None
+_pool_lock = threading.Lock()
+# Temporary profile directory of each running browser, by id()
+_profile_dirs: dict[int, str] = {}
+_http_fetcher = None
+_fetch_stats = FetchStats()
+_page_cache = None
+# session id -> text of the page it is on, until its next go_to_url
+_fetched_text: dict[str, str] = {}
 
-def go_to_url(url: str) -> str:
+
+def create_driver():
+    """Launch a headless Chromium with its own profile directory."""
+    if not ACTIVATE_WEB_DRIVER:
+        raise RuntimeError("WebDriver is not activated. Set ACTIVATE_WEB_DRIVER=1 to enable.")
+
+    options = Options()
+    options.binary_location = os.getenv("CHROME_BIN", "/usr/bin/chromium")
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920x1080")
+    options.add_argument("--verbose")
+    # Chromium locks its profile, so pooled browsers cannot share one; it is
+    # deleted with the browser, so recycling also drops its cache and cookies
+    profile_dir = tempfile.mkdtemp(prefix="selenium-")
+    options.add_argument(f"user-data-dir={profile_dir}")
+
+    service = Service(os.getenv("CHROMEDRIVER_PATH", "/usr/bin/chromedriver"))
+    try:
+        driver = selenium.webdriver.Chrome(service=service, options=options)
+    except BaseException:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        raise
+    driver.set_page_load_timeout(WEB_DRIVER_PAGE_LOAD_TIMEOUT)
+    driver.set_script_timeout(WEB_DRIVER_SCRIPT_TIMEOUT)
+    _profile_dirs[id(driver)] = profile_dir
+    return driver
+
+
+def dispose_driver(driver) -> None:
+    """Quit a browser and delete its profile directory."""
+    try:
+        driver.quit()
+    finally:
+        profile_dir = _profile_dirs.pop(id(driver), None)
+        if profile_dir is not None:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+def driver_rss(driver) -> int:
+    """Memory used by a browser: chromedriver and every Chromium process it started."""
+    return process_tree_rss(driver.service.process.pid)
+
+
+def reset_driver(driver) -> None:
+    """Clear what one session left in a browser before another session uses it."""
+    driver.get("about:blank")
+    driver.delete_all_cookies()
+
+
+def get_driver_pool() -> DriverPool:
+    """Return the browser pool, created on first use (browsers launch lazily)."""
+    global _driver_pool
+    if _driver_pool is None:
+        with _pool_lock:
+            if _driver_pool is None:
+                _driver_pool = DriverPool(
+                    create_driver,
+                    WEB_DRIVER_POOL_SIZE,
+                    acquire_timeout=WEB_DRIVER_ACQUIRE_TIMEOUT,
+                    lease_ttl=WEB_DRIVER_LEASE_TTL,
+                    reset=reset_driver,
+                    dispose=dispose_driver,
+                    max_pages=WEB_DRIVER_MAX_PAGES,
+                    max_rss=WEB_DRIVER_MAX_RSS_MB * 1024 * 1024,
+                    rss=driver_rss,
+                    idle_timeout=WEB_DRIVER_IDLE_TIMEOUT,
+                )
+    return _driver_pool
+
+
+def get_driver(session_id: str = DEFAULT_SESSION):
+    """Return the session's browser, leasing one from the pool when it has none."""
+    if not ACTIVATE_WEB_DRIVER:
+        raise RuntimeError("WebDriver is not activated. Set ACTIVATE_WEB_DRIVER=1 to enable.")
+    return get_driver_pool().acquire(session_id)
+
+
+def release_driver(session_id: str = DEFAULT_SESSION) -> None:
+    """Reset the session's browser and return it to the pool."""
+    if _driver_pool is not None:
+        _driver_pool.release(session_id)
+
+
+def discard_driver(session_id: str = DEFAULT_SESSION) -> None:
+    """Shut down the session's browser instead of returning it to the pool."""
+    if _driver_pool is not None:
+        _driver_pool.discard(session_id)
+
+
+def shutdown_driver_pool() -> None:
+    """Shut down every browser; the pool is created again if the crawler is used afterwards."""
+    global _driver_pool
+    with _pool_lock:
+        pool, _driver_pool = _driver_pool, None
+    if pool is not None:
+        pool.close()
+
+
+def get_http_fetcher() -> HttpFetcher:
+    """Return the shared HTTP client, created on first use."""
+    global _http_fetcher
+    if _http_fetcher is None:
+        with _pool_lock:
+            if _http_fetcher is None:
+                _http_fetcher = HttpFetcher(CRAWLER_HTTP_TIMEOUT, pool_size=CRAWLER_HTTP_POOL_SIZE)
+    return _http_fetcher
+
+
+def get_page_cache() -> PageCache:
+    """Return the shared crawled page cache, created on first use."""
+    global _page_cache
+    if _page_cache is None:
+        with _pool_lock:
+            if _page_cache is None:
+                _page_cache = PageCache(CRAWLER_CACHE_TTL, CRAWLER_CACHE_SIZE)
+    return _page_cache
+
+
+def get_fetch_stats() -> dict:
+    """How many pages were served over HTTP, by the browser and from the cache, and why the browser was needed."""
+    return {**_fetch_stats.stats(), "cache": get_page_cache().stats()}
+
+
+def fetch_over_http(url: str, stale: CachedPage | None = None) -> tuple[CachedPage | None, str | None]:
+    """
+    Read a page over HTTP, if its HTML is enough to read it.
+
+    With a stale cached page that has validators the request is conditional,
+    and `stale` itself is returned when the server says it is unchanged.
+
+    Returns:
+        (page, None), or (None, reason) when the page should be loaded in the
+        browser instead.
+    """
+    if matches_domain(url, CRAWLER_BROWSER_DOMAINS):
+        return None, "domain rule"
+    headers = stale.validators if stale is not None else {}
+    try:
+        fetched = get_http_fetcher().fetch(url, headers or None)
+    except requests.RequestException as e:
+        print(f"HTTP fetch of {url} failed: {e}")
+        return None, "fetch error"
+    if fetched is None:
+        return None, "not html"
+    if fetched.status == 304 and stale is not None:
+        return stale, None
+    text = html_to_text(fetched.html)
+    if not matches_domain(url, CRAWLER_HTTP_DOMAINS):
+        reason = rendering_reason(fetched, text, CRAWLER_MIN_TEXT_CHARS)
+        if reason is not None:
+            return None, reason
+    return CachedPage(url, text, "http", etag=fetched.etag, last_modified=fetched.last_modified), None
+
+
+def _session_id(tool_context: ToolContext | None) -> str:
+    return tool_context.session.id if tool_context is not None else DEFAULT_SESSION
+
+
+def _keep_text(session_id: str, text: str) -> None:
+    _fetched_text.pop(session_id, None)
+    _fetched_text[session_id] = text
+    while len(_fetched_text) > MAX_FETCHED_PAGES:
+        _fetched_text.pop(next(iter(_fetched_text)))
+    # A browser kept from an earlier page of this session is not needed
+    release_driver(session_id)
+
+
+def _navigate(session_id: str, url: str) -> str:
+    """Load a url in the session's browser; returns a note for the navigation message."""
+    driver = get_driver(session_id)
+    if _driver_pool is not None:
+        _driver_pool.record_page(session_id)
+    try:
+        driver.get(url)
+    except TimeoutException:
+        # Keep what has loaded so far rather than waiting on slow resources
+        try:
+            driver.execute_script("window.stop();")
+        except WebDriverException:
+            discard_driver(session_id)
+            raise
+        return " (page load timed out; the page may be incomplete)"
+    except WebDriverException:
+        # A crashed or wedged browser is not returned to the pool
+        discard_driver(session_id)
+        raise
+    return ""
+
+
+def load_page(session_id: str, url: str, stale: CachedPage | None = None) -> CachedPage:
+    """Read a page's text over HTTP or, when it needs rendering, in the session's browser."""
+    if CRAWLER_HTTP_FETCH:
+        page, reason = fetch_over_http(url, stale)
+        if page is not None:
+            _fetch_stats.record("http")
+            return page
+        _fetch_stats.record("browser", reason)
+    else:
+        _fetch_stats.record("browser")
+    try:
+        note = _navigate(session_id, url)
+        text = html_to_text(get_page_source(session_id))
+    finally:
+        release_driver(session_id)
+    return CachedPage(url, text, "browser", note=note)
+
+
+def _describe(page: CachedPage, outcome: str) -> str:
+    if outcome == "hit":
+        return "served from cache"
+    if outcome == "coalesced":
+        return "shared with a concurrent crawl of the same page"
+    if outcome == "revalidated":
+        return "served from cache, unchanged on the server"
+    return "fetched over HTTP" if page.path == "http" else "rendered in the browser"
+
+
+def go_to_url(url: str, tool_context: ToolContext | None = None) -> str:
     """Navigates the browser to the given URL."""
-    get_driver().get(url.strip())
-    return f"Navigated to URL: {url}"
+    session_id = _session_id(tool_context)
+    _fetched_text.pop(session_id, None)
+    if CRAWLER_CACHE_TTL > 0:
+        # Concurrent crawls of the same page share one load
+        page, outcome = get_page_cache().get(url.strip(), partial(load_page, session_id))
+        if outcome in ("hit", "coalesced"):
+            _fetch_stats.record("cache")
+        _keep_text(session_id, page.text)
+        return f"Navigated to URL: {url} ({_describe(page, outcome)}){page.note}"
 
-def get_page_source() -> str:
-    """Returns the current page source."""
-    LIMIT = 4000000
-    return get_driver().page_source[0:LIMIT]
+    if CRAWLER_HTTP_FETCH:
+        page, reason = fetch_over_http(url.strip())
+        if page is not None:
+            _keep_text(session_id, page.text)
+            _fetch_stats.record("http")
+            return f"Navigated to URL: {url} (fetched over HTTP)"
+        _fetch_stats.record("browser", reason)
+    else:
+        _fetch_stats.record("browser")
 
-def get_page_text() -> str:
-    """Returns the text content of the current page after excluding unwanted tags."""
-    page_source = get_page_source()
+    return f"Navigated to URL: {url}{_navigate(session_id, url.strip())}"
 
-    soup = BeautifulSoup(page_source, 'html.parser')
+def get_page_source(session_id: str = DEFAULT_SESSION) -> str:
+    """Returns the current page source; html_to_text reads no more than MAX_PAGE_CHARS of it."""
+    return get_driver(session_id).page_source
 
-    # Remove unwanted tags
-    tags_to_remove = ['script', 'style', 'nav', 'footer', 'aside', 'header', 'path']
-    for tag in tags_to_remove:
-        for element in soup.find_all(tag):
-            element.decompose()
+def html_to_text(page_source: str) -> str:
+    """Returns the text content of an HTML page after excluding unwanted tags."""
+    return extract_text(
+        page_source,
+        max_chars=MAX_PAGE_CHARS,
+        parser=CRAWLER_HTML_PARSER,
+        main_content=bool(CRAWLER_MAIN_CONTENT),
+    )
 
-    # Get cleaned text
-    text = soup.get_text(separator=' ', strip=True)
+def get_page_text(tool_context: ToolContext | None = None) -> str:
+    """Returns the text content of the current page after excluding unwanted tags."""
+    session_id = _session_id(tool_context)
+    text = _fetched_text.get(session_id)
+    if text is None:
+        try:
+            page_source = get_page_source(session_id)
+        finally:
+            # The text is kept for further reads, so the browser goes back to the pool
+            release_driver(session_id)
+        text = html_to_text(page_source)
+        _keep_text(session_id, text)
 
     # Escape quotation marks to prevent JSON parsing issues
     text = text.replace('"', '\\"')
 
     return text
 
+
+async def go_to_url_async(url: str, tool_context: ToolContext | None = None) -> str:
+    """Navigates the browser to the given URL."""
+    # Page loads block, so they run off the event loop
+    return await asyncio.to_thread(go_to_url, url, tool_context)
+
+
+async def get_page_text_async(tool_context: ToolContext | None = None) -> str:
+    """Returns the text content of the current page after excluding unwanted tags."""
+    return await asyncio.to_thread(get_page_text, tool_context)
+
+
 def extract_structured_content(
     page_text: str, user_task: str, tool_context: ToolContext
 ) -> str:
@@ -90,8 +392,8 @@ root_agent = Agent(
     instruction=prompt.CRAWLER_INSTRUCTION,
     # output_schema=CrawlerResponse,
     tools=[
-        go_to_url,
-        get_page_text,
+        go_to_url_async,
+        get_page_text_async,
     ],
     output_key="crawler_response",
 )
\ No newline at end of file
@@ -0,0 +1,225 @@
+import re
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Elements whose content is never page text
+SKIPPED_TAGS = frozenset({"script", "style", "nav", "footer", "aside", "header", "noscript", "template"})
+# SVG shapes hold no text; dropped without tracking them as open elements,
+# since they are often left unclosed
+IGNORED_TAGS = frozenset({"path"})
+# Elements that may hold a page's main content
+CONTAINER_TAGS = frozenset({"article", "main", "section", "div", "td", "body"})
+# Share of the page's non-link text the main content must hold
+MAIN_CONTENT_SHARE = 0.6
+# Containers with more link text than this are menus or link lists
+MAX_LINK_DENSITY = 0.5
+_NEGATIVE_HINT = re.compile(
+    r"comment|sidebar|menu|footer|share|related|promo|banner|cookie|breadcrumb|popup|modal",
+    re.IGNORECASE,
+)
+# Characters fed to the parser at a time, so a page is read no further than the limit
+FEED_CHARS = 65536
+
+
+class _TextCollector:
+    """
+    Collects the text of a page in one pass over its parse events, skipping
+    unwanted elements and recording the span of text in every container.
+
+    Written as an lxml parser target (start/end/data/close); the standard
+    library backend forwards its handler calls to it.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.chunks: list[str] = []
+        self.chars = 0
+        self.link_chars = 0
+        self.title: str | None = None
+        self.done = False
+        # Open tracked elements: (tag, first chunk, chars, link chars, negative hint)
+        self._stack: list[tuple[str, int, int, int, bool]] = []
+        self._skipping = 0
+        self._links = 0
+        self._in_title = False
+        # Text of the current node, which parsers may deliver in pieces
+        self._pending: list[str] = []
+        # Closed containers: (first chunk, end chunk, chars, link chars, negative hint)
+        self.containers: list[tuple[int, int, int, int, bool]] = []
+
+    def start(self, tag: str, attrs) -> None:
+        self._flush()
+        tag = tag.lower()
+        if tag in IGNORED_TAGS:
+            return
+        if tag == "title":
+            self._in_title = True
+        if tag in SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag == "a":
+            self._links += 1
+        elif tag not in CONTAINER_TAGS:
+            return
+        attrs = dict(attrs)
+        hint = f"{attrs.get('id') or ''} {attrs.get('class') or ''}"
+        negative = bool(_NEGATIVE_HINT.search(hint)) if hint.strip() else False
+        self._stack.append((tag, len(self.chunks), self.chars, self.link_chars, negative))
+
+    def end(self, tag: str) -> None:
+        self._flush()
+        tag = tag.lower()
+        if tag == "title":
+            self._in_title = False
+        # Close the innermost open element of this kind, and any left unclosed inside it
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                while len(self._stack) > depth:
+                    self._close()
+                return
+
+    def _close(self) -> None:
+        tag, first, chars, link_chars, negative = self._stack.pop()
+        if tag in SKIPPED_TAGS:
+            self._skipping -= 1
+        elif tag == "a":
+            self._links -= 1
+        else:
+            self.containers.append(
+                (first, len(self.chunks), self.chars - chars, self.link_chars - link_chars, negative)
+            )
+
+    def data(self, data: str) -> None:
+        if not self._skipping and not self.done:
+            self._pending.append(data)
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        text = "".join(self._pending).strip()
+        self._pending.clear()
+        if not text:
+            return
+        if self._in_title and self.title is None:
+            self.title = text
+        self.chunks.append(text)
+        self.chars += len(text) + 1
+        if self._links:
+            self.link_chars += len(text) + 1
+        if self.chars >= self.max_chars:
+            self.done = True
+
+    def close(self) -> None:
+        self._flush()
+        while self._stack:
+            self._close()
+
+    def main_content(self) -> str | None:
+        """
+        Text of the smallest container holding most of the page's non-link
+        text, readability style; None when no container stands out from the page.
+        """
+        content = self.chars - self.link_chars
+        if content <= 0:
+            return None
+        best = None
+        for first, end, chars, link_chars, negative in self.containers:
+            if negative or not chars or link_chars / chars > MAX_LINK_DENSITY:
+                continue
+            if chars - link_chars < MAIN_CONTENT_SHARE * content or end - first == len(self.chunks):
+                continue
+            if best is None or chars < best[2]:
+                best = (first, end, chars)
+        if best is None:
+            return None
+        text = " ".join(self.chunks[best[0]:best[1]])
+        if self.title and self.title not in self.chunks[best[0]:best[1]]:
+            text = f"{self.title} {text}"
+        return text
+
+    def text(self) -> str:
+        return " ".join(self.chunks)
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, target: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing: open and close it, so it never stays on the stack
+        self.target.start(tag, attrs)
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def resolve_parser(name: str) -> str:
+    """
+    Parser backend to use: "html.parser" (standard library) or "lxml"
+    (libxml2; an optional package). "auto" picks lxml when it is installed.
+
+    Raises:
+        ValueError: for an unknown backend, or "lxml" when it is not installed.
+    """
+    if name == "auto":
+        return "lxml" if etree is not None else "html.parser"
+    if name == "lxml" and etree is None:
+        raise ValueError("The lxml parser backend needs the lxml package installed")
+    if name not in ("lxml", "html.parser"):
+        raise ValueError(f"Unknown HTML parser backend: {name}")
+    return name
+
+
+def extract_text(
+    html: str,
+    max_chars: int = 4_000_000,
+    parser: str = "html.parser",
+    main_content: bool = False,
+) -> str:
+    """
+    Text content of an HTML page, without scripts, styles and page chrome
+    (navigation, header, footer, asides).
+
+    The page is parsed once and streamed in slices: no tree is built, and
+    neither the input read nor the text returned goes past `max_chars`.
+
+    Args:
+        html: Page source
+        max_chars: Most characters of the page read, and of text returned
+        parser: "html.parser", "lxml" or "auto" (see resolve_parser)
+        main_content: Keep only the page's main content block (plus its
+            title) when one container holds most of the text
+
+    Returns:
+        The text, strings separated by single spaces.
+    """
+    collector = _TextCollector(max_chars)
+    if not html:
+        return ""
+    if resolve_parser(parser) == "lxml":
+        feeder = etree.HTMLParser(target=collector, recover=True, no_network=True)
+    else:
+        feeder = _StdlibParser(collector)
+
+    limit = min(len(html), max_chars)
+    for offset in range(0, limit, FEED_CHARS):
+        feeder.feed(html[offset:min(offset + FEED_CHARS, limit)])
+        if collector.done:
+            break
+    # lxml closes its target itself; closing twice is harmless
+    feeder.close()
+    collector.close()
+
+    text = (main_content and collector.main_content()) or collector.text()
+    return text[:max_chars]
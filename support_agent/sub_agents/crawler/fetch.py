@@ -0,0 +1,193 @@
+import codecs
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+
+# Identify as a regular browser; some sites refuse unknown clients
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/126.0 Safari/537.36"
+)
+
+# Pages that only render client side: an empty app mount point, or a notice
+# asking for JavaScript
+_SPA_PATTERN = re.compile(
+    r"<div[^>]+id=[\"'](?:root|app|__next|__nuxt|svelte)[\"'][^>]*>\s*</div>"
+    r"|enable javascript|javascript (?:is )?required|ativar? o javascript",
+    re.IGNORECASE,
+)
+
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="text/html; charset=...">
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+# Bytes of the page searched for a <meta> charset
+META_SNIFF_BYTES = 4096
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    status: int
+    html: str
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+def domain_of(url: str) -> str:
+    """Host of a url, lowercased and without a leading 'www.'."""
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _known_codec(name: str | None) -> str | None:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def page_encoding(content_type: str, body: bytes) -> str:
+    """
+    Character encoding of an HTML page.
+
+    Taken from the Content-Type charset when the server states one, else from
+    a <meta> charset in the page, else utf-8 when the body decodes as utf-8,
+    else detected from the bytes. Unlike requests, a text/* response without
+    a charset is not assumed to be ISO-8859-1.
+    """
+    match = _HEADER_CHARSET.search(content_type)
+    encoding = _known_codec(match.group(1)) if match else None
+    if encoding is None:
+        match = _META_CHARSET.search(body[:META_SNIFF_BYTES])
+        encoding = _known_codec(match.group(1).decode("ascii")) if match else None
+    if encoding is not None:
+        return encoding
+    try:
+        body.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off by the size limit is still utf-8
+        if e.start >= len(body) - 3:
+            return "utf-8"
+    return _known_codec(chardet.detect(body).get("encoding")) or "utf-8"
+
+
+def matches_domain(url: str, domains: tuple[str, ...]) -> bool:
+    """Whether the url's host is one of the domains or a subdomain of one."""
+    host = domain_of(url)
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+def rendering_reason(page: FetchedPage, text: str, min_text_chars: int) -> str | None:
+    """
+    Why a page fetched over HTTP needs a browser, or None when its HTML is enough.
+
+    Args:
+        page: The fetched page
+        text: Text extracted from the page's HTML
+        min_text_chars: Less text than this means the content is rendered by scripts
+    """
+    if page.status != 200:
+        return f"HTTP {page.status}"
+    if _SPA_PATTERN.search(page.html):
+        return "javascript app"
+    if len(text) < min_text_chars:
+        return "little text"
+    return None
+
+
+class HttpFetcher:
+    """
+    Fetches pages with a pooled HTTP client, for pages that need no browser.
+
+    Connections are kept alive and reused across threads. Bodies larger than
+    `max_bytes` are cut off, and only HTML responses are accepted.
+    """
+
+    def __init__(self, timeout: float = 10.0, max_bytes: int = 4_000_000, pool_size: int = 10):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5",
+            "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+        })
+
+    def fetch(self, url: str, headers: dict[str, str] | None = None) -> FetchedPage | None:
+        """
+        GET a page.
+
+        Args:
+            url: Page url
+            headers: Extra request headers, e.g. conditional request validators
+
+        Returns:
+            The page (status 304 with no HTML when a conditional request found
+            it unchanged), or None when the response is not HTML (the browser
+            may still render it, e.g. a PDF viewer).
+
+        Raises:
+            requests.RequestException: on connection errors and timeouts,
+                including a body that stalls or ends early.
+        """
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            content_type = response.headers.get("Content-Type", "")
+            if response.status_code == 200 and "html" not in content_type:
+                return None
+            # iter_content reports stalled, cut off or badly encoded bodies as
+            # requests exceptions, unlike reading response.raw directly
+            chunks, size = [], 0
+            for chunk in response.iter_content(chunk_size=65536):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    break
+            body = b"".join(chunks)[:self.max_bytes]
+            encoding = page_encoding(content_type, body)
+            return FetchedPage(
+                response.url,
+                response.status_code,
+                body.decode(encoding, errors="replace"),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class FetchStats:
+    """Counts of which path served each crawl and why the browser was needed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.paths: Counter[str] = Counter()
+        self.fallbacks: Counter[str] = Counter()
+
+    def record(self, path: str, reason: str | None = None) -> None:
+        with self._lock:
+            self.paths[path] += 1
+            if reason is not None:
+                self.fallbacks[reason] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self.paths.values())
+            return {
+                "pages": total,
+                "paths": dict(self.paths),
+                "http_ratio": self.paths["http"] / total if total else 0.0,
+                "fallbacks": dict(self.fallbacks),
+            }
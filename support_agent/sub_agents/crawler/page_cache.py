@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from typing import Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Cache key for a url: scheme and host lowercased, default port, fragment
+    and trailing slash dropped, query parameters sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port is not None and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    # How the page was read: "http" or "browser"
+    path: str
+    # Set by the cache when the page is stored or revalidated
+    fetched_at: float = 0.0
+    etag: str | None = None
+    last_modified: str | None = None
+    # Added to the navigation message, e.g. when the page load timed out
+    note: str = ""
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers that ask the server whether the page changed."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    Extracted page text shared by every crawl, keyed by normalized url.
+
+    Entries are fresh for `ttl` seconds. A stale entry is handed to the
+    loader, which may revalidate it with a conditional request and return
+    that same entry when the page did not change; the entry is then fresh
+    again without being re-read. Concurrent requests for a url share one
+    load, and the least recently used entry is evicted beyond `maxsize`.
+
+    Args:
+        ttl: Seconds an entry is served without asking the server
+        maxsize: Most pages kept
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 256, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CachedPage] = OrderedDict()
+        self._inflight: dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.refreshed = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, url: str, load: Callable[[str, CachedPage | None], CachedPage]) -> tuple[CachedPage, str]:
+        """
+        Return the page for a url, loading or revalidating it when needed.
+
+        Args:
+            url: Page url
+            load: Called as load(url, stale_entry_or_None); returns the page,
+                or `stale_entry` itself when the server says it is unchanged
+
+        Returns:
+            (page, outcome), outcome being "hit", "coalesced" (shared another
+            request's load), "revalidated", "refreshed" or "loaded".
+        """
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry.fetched_at < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry, "hit"
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result(), "coalesced"
+
+        try:
+            page = load(url, entry)
+            with self._lock:
+                revalidated = entry is not None and page is entry
+                page = replace(page, fetched_at=self._clock())
+                if revalidated:
+                    self.revalidated += 1
+                    outcome = "revalidated"
+                elif entry is not None:
+                    self.refreshed += 1
+                    outcome = "refreshed"
+                else:
+                    self.misses += 1
+                    outcome = "loaded"
+                self._entries[key] = page
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            future.set_result(page)
+            return page, outcome
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit, revalidation and coalescing counters."""
+        with self._lock:
+            lookups = self.hits + self.misses + self.revalidated + self.refreshed + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "refreshed": self.refreshed,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.revalidated + self.coalesced) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
@@ -0,0 +1,336 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+
+class DriverPoolTimeout(TimeoutError):
+    """No browser became free within the acquire timeout."""
+
+
+@dataclass
+class _Lease:
+    driver: Any
+    last_used: float
+
+
+def process_tree_rss(pid: int) -> int:
+    """
+    Resident memory in bytes of a process and all its descendants.
+
+    Reads /proc, so it is Linux only; returns 0 where that is unavailable.
+    Chromium runs one process per renderer, so the browser's memory is
+    spread over the children of the process chromedriver started.
+    """
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status", encoding="ascii", errors="replace") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children", encoding="ascii") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+class DriverPool:
+    """
+    Bounded pool of browsers, each leased to one session at a time.
+
+    A session keeps its browser across tool calls (navigating and then reading
+    the page must happen in the same browser) until it releases it; the
+    browser is then reset and handed to the next session. Browsers are
+    launched on demand up to `size`; further sessions queue for up to
+    `acquire_timeout` seconds. Leases unused for `lease_ttl` seconds are
+    reclaimed for waiting sessions, so an abandoned crawl cannot hold a
+    browser forever.
+
+    Browsers are recycled (shut down, and relaunched on demand) when they are
+    released after `max_pages` page loads or above `max_rss` bytes of memory,
+    and shut down after `idle_timeout` seconds unused, checked from a
+    background thread.
+
+    Args:
+        factory: Launches a new browser
+        size: Maximum number of browsers
+        acquire_timeout: Seconds to wait for a free browser
+        lease_ttl: Seconds after which an idle lease may be reclaimed
+        reset: Clears a browser's state before it is reused; a browser whose
+            reset fails is discarded
+        dispose: Shuts a browser down
+        max_pages: Page loads after which a browser is recycled; 0 for no limit
+        max_rss: Memory in bytes above which a browser is recycled; 0 for no limit
+        rss: Measures a browser's memory in bytes (required for max_rss)
+        idle_timeout: Seconds after which an unused browser is shut down; 0 to keep it
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int,
+        acquire_timeout: float = 30.0,
+        lease_ttl: float = 120.0,
+        reset: Callable[[Any], None] | None = None,
+        dispose: Callable[[Any], None] | None = None,
+        max_pages: int = 0,
+        max_rss: int = 0,
+        rss: Callable[[Any], int] | None = None,
+        idle_timeout: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.factory = factory
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.lease_ttl = lease_ttl
+        self.reset = reset or (lambda driver: None)
+        self.dispose = dispose or (lambda driver: driver.quit())
+        self.max_pages = max_pages
+        self.max_rss = max_rss
+        self.rss = rss
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._cond = threading.Condition()
+        # (browser, idle since), most recently released last
+        self._idle: list[tuple[Any, float]] = []
+        self._leases: dict[Hashable, _Lease] = {}
+        # Page loads per browser, by id()
+        self._pages: dict[int, int] = {}
+        self._stop = threading.Event()
+        self._reaper: threading.Thread | None = None
+        # Browsers alive or being launched
+        self._launched = 0
+        self.waiting = 0
+        self.acquires = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.launches = 0
+        self.reclaimed = 0
+        self.discarded = 0
+        self.recycled = 0
+        self.idle_shutdowns = 0
+
+    def _stale_lease(self) -> Hashable | None:
+        now = self._clock()
+        for key, lease in self._leases.items():
+            if now - lease.last_used >= self.lease_ttl:
+                return key
+        return None
+
+    def acquire(self, key: Hashable) -> Any:
+        """
+        Return the browser leased to `key`, leasing a free one if it has none.
+
+        Raises:
+            DriverPoolTimeout: if every browser stays leased for acquire_timeout seconds.
+        """
+        started = time.monotonic()
+        deadline = started + self.acquire_timeout
+        driver, launch, reclaimed = None, False, False
+        with self._cond:
+            lease = self._leases.get(key)
+            if lease is not None:
+                lease.last_used = self._clock()
+                return lease.driver
+
+            waited = False
+            while True:
+                if self._idle:
+                    driver = self._idle.pop()[0]
+                    break
+                if self._launched < self.size:
+                    self._launched += 1
+                    launch = True
+                    break
+                stale = self._stale_lease()
+                if stale is not None:
+                    driver = self._leases.pop(stale).driver
+                    self.reclaimed += 1
+                    reclaimed = True
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise DriverPoolTimeout(
+                        f"No browser free after {self.acquire_timeout:g}s ({self.size} in use)"
+                    )
+                # Wake up periodically to look for leases that went stale
+                waited = True
+                self.waiting += 1
+                self._cond.wait(min(remaining, 1.0))
+                self.waiting -= 1
+
+        if launch:
+            try:
+                driver = self.factory()
+            except BaseException:
+                with self._cond:
+                    self._launched -= 1
+                    self._cond.notify()
+                raise
+            self._start_reaper()
+        elif reclaimed and not self._reset(driver):
+            # Dropped; let the caller retry with a fresh browser
+            return self.acquire(key)
+
+        with self._cond:
+            self.acquires += 1
+            self.launches += launch
+            if waited:
+                self.waits += 1
+                self.wait_seconds += time.monotonic() - started
+            if key in self._leases:
+                # The session leased another browser concurrently; keep that one
+                self._idle.append((driver, self._clock()))
+                self._cond.notify()
+                return self._leases[key].driver
+            self._leases[key] = _Lease(driver, self._clock())
+        return driver
+
+    def record_page(self, key: Hashable) -> None:
+        """Count a page load in the session's browser, towards max_pages."""
+        with self._cond:
+            lease = self._leases.get(key)
+            if lease is not None:
+                self._pages[id(lease.driver)] = self._pages.get(id(lease.driver), 0) + 1
+
+    def _worn_out(self, driver: Any) -> bool:
+        if self.max_pages and self._pages.get(id(driver), 0) >= self.max_pages:
+            return True
+        if self.max_rss and self.rss is not None:
+            try:
+                return self.rss(driver) > self.max_rss
+            except Exception as e:
+                print(f"Could not measure browser memory: {e}")
+        return False
+
+    def release(self, key: Hashable) -> None:
+        """Reset the session's browser and return it to the pool (no-op without a lease)."""
+        with self._cond:
+            lease = self._leases.pop(key, None)
+        if lease is None:
+            return
+        if self._worn_out(lease.driver):
+            with self._cond:
+                self.recycled += 1
+            self._dispose(lease.driver)
+        elif self._reset(lease.driver):
+            with self._cond:
+                self._idle.append((lease.driver, self._clock()))
+                self._cond.notify()
+
+    def discard(self, key: Hashable) -> None:
+        """Shut down the session's browser instead of reusing it, e.g. after it crashed."""
+        with self._cond:
+            lease = self._leases.pop(key, None)
+        if lease is not None:
+            self._dispose(lease.driver)
+
+    def _reset(self, driver: Any) -> bool:
+        try:
+            self.reset(driver)
+            return True
+        except Exception as e:
+            print(f"Discarding browser that failed to reset: {e}")
+            self._dispose(driver)
+            return False
+
+    def _dispose(self, driver: Any) -> None:
+        try:
+            self.dispose(driver)
+        except Exception as e:
+            print(f"Error shutting down browser: {e}")
+        with self._cond:
+            self._launched -= 1
+            self.discarded += 1
+            self._pages.pop(id(driver), None)
+            self._cond.notify()
+
+    def reap_idle(self) -> int:
+        """Shut down browsers unused for idle_timeout seconds; returns how many."""
+        if not self.idle_timeout:
+            return 0
+        cutoff = self._clock() - self.idle_timeout
+        with self._cond:
+            expired = [driver for driver, since in self._idle if since <= cutoff]
+            self._idle = [(driver, since) for driver, since in self._idle if since > cutoff]
+            self.idle_shutdowns += len(expired)
+        for driver in expired:
+            self._dispose(driver)
+        return len(expired)
+
+    def _start_reaper(self) -> None:
+        with self._cond:
+            if not self.idle_timeout or self._reaper is not None:
+                return
+            self._stop.clear()
+            self._reaper = threading.Thread(target=self._reap, name="driver-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap(self) -> None:
+        while not self._stop.wait(max(self.idle_timeout / 4, 1.0)):
+            try:
+                self.reap_idle()
+            except Exception as e:
+                print(f"Browser idle check failed: {e}")
+
+    def fill(self) -> int:
+        """Launch browsers until the pool is full, so the first crawls do not wait for one."""
+        launched = 0
+        while True:
+            with self._cond:
+                if self._launched >= self.size:
+                    return launched
+                self._launched += 1
+            try:
+                driver = self.factory()
+            except BaseException:
+                with self._cond:
+                    self._launched -= 1
+                raise
+            with self._cond:
+                self._idle.append((driver, self._clock()))
+                self.launches += 1
+                self._cond.notify()
+            self._start_reaper()
+            launched += 1
+
+    def close(self) -> None:
+        """Stop the idle check and shut down every browser, leased or idle."""
+        self._stop.set()
+        with self._cond:
+            reaper, self._reaper = self._reaper, None
+            drivers = [driver for driver, _ in self._idle] + [lease.driver for lease in self._leases.values()]
+            self._idle, self._leases = [], {}
+        if reaper is not None and reaper is not threading.current_thread():
+            reaper.join()
+        for driver in drivers:
+            self._dispose(driver)
+
+    def stats(self) -> dict:
+        """Return pool occupancy and queueing counters."""
+        with self._cond:
+            return {
+                "size": self.size,
+                "launched": self._launched,
+                "idle": len(self._idle),
+                "leased": len(self._leases),
+                "waiting": self.waiting,
+                "acquires": self.acquires,
+                "waits": self.waits,
+                "avg_wait_ms": 1000 * self.wait_seconds / self.waits if self.waits else 0.0,
+                "timeouts": self.timeouts,
+                "launches": self.launches,
+                "reclaimed": self.reclaimed,
+                "discarded": self.discarded,
+                "recycled": self.recycled,
+                "idle_shutdowns": self.idle_shutdowns,
+            }
@@ -1,69 +1,392 @@
 from google.adk.agents.llm_agent import Agent
 from google.genai import types
 from . import prompt
+from .bm25 import BM25Index, reciprocal_rank_fusion
+from .budget import TrimStats, budget_chars, trim_results
+from .cache import LRUCache
+from .chunking import chunk_document
+from .dedup import find_duplicates
+from .docstore import DocumentStore, is_store_path
+from .embedding_store import EmbeddingStore, content_hash
+from .embeddings import EmbeddingBackend, create_embedding_backend, embed_texts, embedding_namespace
+from .ivf_index import IVFIndex
+from .metadata import PRODUCT_PAGES, MetadataIndex, normalize_value, page_metadata
+from .quantized_index import QuantizedIndex
+from .shared_index import SharedIndex, file_lock
+from .vector_index import VectorIndex, normalize_rows
+import asyncio
 import os
+import re
 import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import partial
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Callable
 import numpy as np
 import google.generativeai as genai
 from dotenv import load_dotenv
 load_dotenv()
 
+# Embedding provider: "gemini" (the Gemini API) or "local" (an offline
+# hashing embedder for CI, benchmarks and air-gapped deployments)
+EMBEDDING_PROVIDER = os.getenv("KB_EMBEDDING_PROVIDER", "gemini")
+EMBEDDING_MODEL = "models/text-embedding-004"
+LOCAL_EMBEDDING_DIM = int(os.getenv("KB_LOCAL_EMBEDDING_DIM", "384"))
+
 # Initialize embeddings model
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+if EMBEDDING_PROVIDER == "gemini":
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+
+# {url: page text} JSON file the knowledge base is loaded from and updated in,
+# or a SQLite document store (.db/.sqlite/.sqlite3, see docstore.py) whose
+# passage text stays on disk until a passage is returned
+KNOWLEDGE_BASE_PATH = os.getenv(
+    "KB_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "data", "mock_knowledge_base.json")
+)
+
+# Persistent embedding store, shared by every process and restart
+EMBEDDINGS_DIR = os.getenv(
+    "KB_EMBEDDINGS_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "data", "embeddings")
+)
+
+# Passage size and overlap (characters) used when chunking pages for retrieval
+CHUNK_SIZE = int(os.getenv("KB_CHUNK_SIZE", "1200"))
+CHUNK_OVERLAP = int(os.getenv("KB_CHUNK_OVERLAP", "200"))
+
+# Collapse exact and near-duplicate pages (estimated Jaccard similarity of word
+# shingles >= threshold) into one entry with alias urls before indexing
+DEDUP_ENABLED = int(os.getenv("KB_DEDUP", "1"))
+DEDUP_THRESHOLD = float(os.getenv("KB_DEDUP_THRESHOLD", "0.9"))
+
+# Batched index build: texts per request and requests in flight
+EMBEDDING_BATCH_SIZE = int(os.getenv("KB_EMBEDDING_BATCH_SIZE", "100"))
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("KB_EMBEDDING_MAX_CONCURRENCY", "4"))
+
+# Similarity index: "exact" (brute force), "quantized" (compact float16/int8
+# vectors with exact re-rank) or "ivf" (approximate, for large corpora)
+INDEX_TYPE = os.getenv("KB_INDEX_TYPE", "exact")
+# IVF lists (0 = pick from corpus size) and lists probed per query
+IVF_NLIST = int(os.getenv("KB_IVF_NLIST", "0"))
+IVF_NPROBE = int(os.getenv("KB_IVF_NPROBE", "8"))
+# Quantized index: "int8" or "float16", leading dimensions kept (0 = all) and
+# candidates re-ranked exactly per requested result (0 = no re-rank)
+QUANTIZATION = os.getenv("KB_QUANTIZATION", "int8")
+INDEX_DIMS = int(os.getenv("KB_INDEX_DIMS", "0"))
+RERANK_FACTOR = int(os.getenv("KB_RERANK_FACTOR", "4"))
+
+# Retrieval mode: "vector" (embeddings only), "lexical" (BM25 only, no embedding
+# call) or "hybrid" (both, fused with reciprocal rank fusion)
+RETRIEVAL_MODE = os.getenv("KB_RETRIEVAL_MODE", "hybrid")
+# Candidates taken from each ranking before fusion, per requested result
+HYBRID_CANDIDATES_PER_RESULT = 4
+# Seconds to wait for the query embedding before falling back to lexical search
+QUERY_EMBEDDING_TIMEOUT = float(os.getenv("KB_QUERY_EMBEDDING_TIMEOUT", "10"))
+
+# Default context budget for returned passages, in characters (0 = no limit)
+CONTEXT_BUDGET_CHARS = int(os.getenv("KB_CONTEXT_BUDGET_CHARS", "6000"))
+# Default relevance cut-offs (0 disables): an absolute minimum score, in the
+# retrieval mode's units (cosine, BM25 or fused rank score), and the largest
+# relative drop from the best score, e.g. 0.5 drops results under half of it
+MIN_SCORE = float(os.getenv("KB_MIN_SCORE", "0"))
+MAX_SCORE_GAP = float(os.getenv("KB_MAX_SCORE_GAP", "0"))
+
+# Worker threads that run blocking retrieval work (index build, scoring) for
+# query_knowledge_base_async, keeping it off the event loop
+RETRIEVAL_WORKERS = int(os.getenv("KB_RETRIEVAL_WORKERS", "4"))
+
+# Query embedding / ranked result caches: max entries and TTL in seconds
+QUERY_CACHE_SIZE = int(os.getenv("KB_QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("KB_QUERY_CACHE_TTL", "3600"))
+RESULT_CACHE_SIZE = int(os.getenv("KB_RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL = float(os.getenv("KB_RESULT_CACHE_TTL", "300"))
+
+# Memory-mapped index shared by every worker on the host ("" keeps a private
+# in-memory index per process), and seconds between checks for a new version
+SHARED_INDEX_DIR = os.getenv("KB_SHARED_INDEX_DIR", "")
+SHARED_INDEX_CHECK_INTERVAL = float(os.getenv("KB_SHARED_INDEX_CHECK_INTERVAL", "2"))
+
+# Seconds before retrying the embedding API after an index build fell back to
+# lexical search because embeddings were unavailable
+EMBEDDING_RETRY_INTERVAL = float(os.getenv("KB_EMBEDDING_RETRY_INTERVAL", "60"))
+
+
+@dataclass(frozen=True)
+class KnowledgeIndex:
+    """
+    Immutable snapshot of everything a query reads.
+
+    A new snapshot is published by replacing the module level reference, so a
+    query that grabbed the old one keeps a consistent view while the next
+    version is swapped in. `source` is the knowledge base dict the snapshot was
+    built from, or the name of the shared index version it maps.
+    """
+    version: int
+    source: dict | str
+    passages: list[dict]
+    vector_index: VectorIndex | QuantizedIndex | IVFIndex | None
+    bm25_index: BM25Index | None
+    metadata_index: MetadataIndex
+    built_at: float
+
 
 # Cache for knowledge base data and embeddings
 _knowledge_base_cache = None
+# Fingerprint of KB_PATH when _knowledge_base_cache was read from it
+_knowledge_base_fingerprint = None
+# (fingerprint of KB_PATH, when to stat it again), for checking shared index versions
+_fingerprint_check = (None, float("-inf"))
+# (last result of _current_source(), until when it can be reused without touching disk)
+_source_check = (None, float("-inf"))
 _embeddings_cache = None
+# Currently published KnowledgeIndex; read without locking on the query path
+_knowledge_index = None
+# Serializes cache builds so concurrent cold-start callers build only once
+_build_lock = threading.RLock()
+# Index build shared by concurrent query_knowledge_base_async callers
+_index_build_future = None
+# Backend used to embed documents; None means the Gemini API
+_embedding_backend = None
+# SharedIndex for SHARED_INDEX_DIR, created on first use
+_shared_index = None
+# Bumped whenever a new index snapshot is published; part of every result cache key
+_index_version = 0
+# (model, normalized query) -> query embedding
+_query_embedding_cache = LRUCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+# (normalized query, top_k, mode, index version) -> ranked results
+_result_cache = LRUCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+# What budgets and cut-offs removed from results so far
+_trim_stats = TrimStats()
+_retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="kb-retrieval")
 
 
-def load_knowledge_base() -> dict:
-    """Load knowledge base data from mock.json file."""
+def load_knowledge_base() -> Mapping[str, str]:
+    """Load knowledge base data from mock.json file (or the document store at KB_PATH)."""
     global _knowledge_base_cache
 
     if _knowledge_base_cache is not None:
         return _knowledge_base_cache
 
-    mock_data_path = os.path.join(
-        os.path.dirname(__file__),
-        "..",
-        "..",
-        "..",
-        "data",
-        "mock_knowledge_base.json"
-    )
-
-    with open(mock_data_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    global _knowledge_base_fingerprint
 
-    _knowledge_base_cache = data
+    with _build_lock:
+        if _knowledge_base_cache is None:
+            # Taken before reading, so a concurrent write makes it look stale, not current
+            _knowledge_base_fingerprint = knowledge_base_fingerprint()
+            _knowledge_base_cache = _read_knowledge_base()
     return _knowledge_base_cache
 
 
-def get_embedding(text: str, model: str = "models/text-embedding-004") -> np.ndarray:
+def knowledge_base_fingerprint() -> str | None:
+    """Size and modification time of KB_PATH, which change whenever it is written; None if missing."""
+    try:
+        stat = os.stat(KNOWLEDGE_BASE_PATH)
+    except OSError:
+        return None
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _current_fingerprint() -> str | None:
+    """knowledge_base_fingerprint(), re-read at most once per SHARED_INDEX_CHECK_INTERVAL."""
+    global _fingerprint_check
+
+    fingerprint, next_check = _fingerprint_check
+    now = time.monotonic()
+    if now >= next_check:
+        fingerprint = knowledge_base_fingerprint()
+        _fingerprint_check = (fingerprint, now + SHARED_INDEX_CHECK_INTERVAL)
+    return fingerprint
+
+
+def _read_knowledge_base() -> Mapping[str, str]:
+    if is_store_path(KNOWLEDGE_BASE_PATH):
+        return DocumentStore(KNOWLEDGE_BASE_PATH, CHUNK_SIZE, CHUNK_OVERLAP)
+    with open(KNOWLEDGE_BASE_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_knowledge_base(knowledge_base: dict) -> None:
+    """Replace the knowledge base file atomically, so readers never see a partial write."""
+    directory = os.path.dirname(os.path.abspath(KNOWLEDGE_BASE_PATH))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".knowledge_base.")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(knowledge_base, f)
+        os.replace(tmp_path, KNOWLEDGE_BASE_PATH)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def get_embedding(text: str, model: str = EMBEDDING_MODEL) -> np.ndarray:
     """Generate embedding for given text using Google's embedding model."""
     result = genai.embed_content(
         model=model,
         content=text,
-        task_type="retrieval_document"
+        task_type="retrieval_document",
+        request_options={"timeout": QUERY_EMBEDDING_TIMEOUT}
     )
-    return np.array(result['embedding'])
+    return np.array(result['embedding'], dtype=np.float32)
+
+
+async def get_embedding_async(text: str, model: str = EMBEDDING_MODEL) -> np.ndarray:
+    """Generate an embedding without blocking the event loop.
+
+    Uses the shared Gemini async client, so the connection is reused across calls.
+    """
+    result = await genai.embed_content_async(
+        model=model,
+        content=text,
+        task_type="retrieval_document",
+        request_options={"timeout": QUERY_EMBEDDING_TIMEOUT}
+    )
+    return np.array(result['embedding'], dtype=np.float32)
+
 
+def get_embedding_backend() -> EmbeddingBackend:
+    """Return the backend selected by KB_EMBEDDING_PROVIDER, used for documents and queries."""
+    global _embedding_backend
 
-def compute_embeddings(knowledge_base: dict) -> list[dict]:
-    """Compute embeddings for all content in the knowledge base."""
+    if _embedding_backend is None:
+        _embedding_backend = create_embedding_backend(EMBEDDING_PROVIDER, EMBEDDING_MODEL, LOCAL_EMBEDDING_DIM)
+    return _embedding_backend
+
+
+def compute_embeddings(knowledge_base: Mapping[str, str], backend: EmbeddingBackend | None = None) -> list[dict]:
+    """
+    Compute embeddings for every passage of the knowledge base, once.
+
+    The result is cached; concurrent first callers wait for a single build.
+    See embed_knowledge_base() for how passages are embedded.
+    """
     global _embeddings_cache
 
     if _embeddings_cache is not None:
         return _embeddings_cache
 
+    with _build_lock:
+        if _embeddings_cache is None:
+            _embeddings_cache = embed_knowledge_base(knowledge_base, backend)
+    return _embeddings_cache
+
+
+def _page_chunks(
+    knowledge_base: Mapping[str, str], reuse: dict[str, list[dict]], skip: set[str]
+) -> Iterator[tuple[str, list[dict]]]:
+    """Yield (url, passages) per page, in knowledge base order, leaving out `skip`."""
+    if isinstance(knowledge_base, DocumentStore):
+        # Chunked when stored; passage text is only read when it is used
+        for url, chunks in knowledge_base.passages_by_url():
+            if url not in skip:
+                yield url, chunks
+        return
+    for url, text in knowledge_base.items():
+        if url not in skip:
+            yield url, reuse.get(url) or chunk_document(url, text, CHUNK_SIZE, CHUNK_OVERLAP)
+
+
+def ingest_passages(knowledge_base: Mapping[str, str], reuse: dict[str, list[dict]] | None = None) -> list[dict]:
+    """
+    Deduplicate the knowledge base pages and split them into passages.
+
+    Duplicate pages are dropped and their urls listed under 'aliases' on the
+    passages of the page they duplicate, which the metadata index then also
+    files under the aliases' product and locale. Every passage carries its
+    page's filterable metadata ('product', 'locale'; see page_metadata()).
+
+    Args:
+        knowledge_base: Mapping of url to page text, or a DocumentStore
+        reuse: Passages by url for pages known to be unchanged; used as is
+            instead of chunking the page again
+    """
+    reuse = reuse or {}
+    aliases = {}
+    if DEDUP_ENABLED:
+        aliases = find_duplicates(knowledge_base, DEDUP_THRESHOLD)
+        if aliases:
+            print(f"Collapsed {sum(len(urls) for urls in aliases.values())} duplicate pages into {len(aliases)}")
+    duplicates = {url for urls in aliases.values() for url in urls}
+
+    passages = []
+    for url, chunks in _page_chunks(knowledge_base, reuse, duplicates):
+        metadata = page_metadata(url)
+        for chunk in chunks:
+            # Aliases of reused passages may be stale; they are re-derived here
+            passage = chunk.copy()
+            passage.pop('aliases', None)
+            passage.update(metadata)
+            if url in aliases:
+                passage['aliases'] = aliases[url]
+            passages.append(passage)
+    return passages
+
+
+def embed_knowledge_base(
+    knowledge_base: Mapping[str, str],
+    backend: EmbeddingBackend | None = None,
+    reuse: dict[str, list[dict]] | None = None,
+) -> list[dict]:
+    """
+    Split the knowledge base into passages and embed each of them (uncached).
+
+    Pages are deduplicated and split into overlapping passages first (see
+    ingest_passages()). Vectors are reused from the on-disk embedding store
+    when a passage's text is unchanged; only new or edited passages are sent
+    to the embedding backend, in concurrent batches.
+
+    Args:
+        knowledge_base: Mapping of url to page text
+        backend: Embedding backend (default: get_embedding_backend())
+        reuse: Already embedded passages by url, for pages known to be
+            unchanged; they are neither re-chunked nor re-embedded
+    """
+    backend = backend or get_embedding_backend()
+    store = EmbeddingStore(EMBEDDINGS_DIR, embedding_namespace(backend)).load()
+    chunks = ingest_passages(knowledge_base, reuse)
+
+    # Stored passages carry their hash, so unchanged text is never read
+    hashes = [chunk.get("content_hash") or content_hash(chunk["content"]) for chunk in chunks]
+    vectors = {}
+    missing = {}
+    for chunk, text_hash in zip(chunks, hashes):
+        embedding = chunk.get("embedding")
+        if embedding is None:
+            embedding = store.get(text_hash)
+        if embedding is None:
+            missing[text_hash] = chunk["content"]
+        else:
+            vectors[text_hash] = embedding
+
+    if missing:
+        new_vectors = embed_texts(
+            list(missing.values()),
+            backend,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            max_concurrency=EMBEDDING_MAX_CONCURRENCY,
+        )
+        vectors.update(zip(missing, new_vectors))
+
+    # One contiguous float32 matrix; each passage's embedding is a row view of
+    # it, so the vector index can use it without another copy
+    matrix = np.array([vectors[text_hash] for text_hash in hashes], dtype=np.float32)
     embeddings = []
-    for url, content in knowledge_base.items():
-        print(f"Computing embedding for item: {url}")
-        embedding = get_embedding(content)
-        embeddings.append({"url": url, "embedding": embedding, "content": content})
-    _embeddings_cache = embeddings
+    for row, chunk in enumerate(chunks):
+        passage = chunk.copy()
+        passage["embedding"] = matrix[row]
+        embeddings.append(passage)
+
+    # Rewrite the store only when it gained or lost vectors
+    if len(vectors) != len(store) or any(h not in store for h in vectors):
+        store.save(vectors)
+
     return embeddings
-    
+
 
 def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
     """Calculate cosine similarity between two vectors."""
@@ -73,48 +396,724 @@ def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
     return dot_product / (norm1 * norm2)
 
 
-def query_knowledge_base(query: str, top_k: int = 2) -> list[dict]:
+def build_vector_index(vectors: np.ndarray, normalized: bool = False) -> VectorIndex | QuantizedIndex | IVFIndex:
+    """
+    Build the similarity index selected by KB_INDEX_TYPE.
+
+    Args:
+        vectors: Embedding matrix, one row per passage
+        normalized: Rows are already unit length, so the exact index can use
+            the matrix (e.g. a memory-mapped one) without copying it
+    """
+    if INDEX_TYPE == "exact":
+        return VectorIndex.from_normalized(vectors) if normalized else VectorIndex(vectors)
+    if INDEX_TYPE == "quantized":
+        return QuantizedIndex(vectors, precision=QUANTIZATION, dims=INDEX_DIMS or None, rerank_factor=RERANK_FACTOR)
+    if INDEX_TYPE == "ivf":
+        return IVFIndex.build(vectors, nlist=IVF_NLIST or None, nprobe=IVF_NPROBE)
+    raise ValueError(f"Unknown KB_INDEX_TYPE: {INDEX_TYPE!r} (expected 'exact', 'quantized' or 'ivf')")
+
+
+def embedding_matrix(kb_embeddings: list[dict]) -> np.ndarray:
+    """
+    Return the passages' embeddings as one matrix.
+
+    Passages from embed_knowledge_base() are consecutive rows of a shared
+    matrix, which is returned as is; anything else is stacked into a copy.
+    """
+    rows = [item['embedding'] for item in kb_embeddings]
+    base = getattr(rows[0], 'base', None)
+    if (
+        isinstance(base, np.ndarray) and base.ndim == 2 and len(base) == len(rows)
+        and all(
+            row.base is base and row.ctypes.data == base.ctypes.data + i * base.strides[0]
+            for i, row in enumerate(rows)
+        )
+    ):
+        return base
+    return np.stack(rows)
+
+
+def build_bm25_index(passages: list[dict]) -> BM25Index:
+    """Build the keyword index over the passages' text."""
+    index = BM25Index()
+    for passage in passages:
+        index.add(passage['content'])
+    return index
+
+
+def build_metadata_index(records: Sequence[dict]) -> MetadataIndex:
+    """Build the posting lists of the passages' filterable metadata."""
+    index = MetadataIndex()
+    for record in records:
+        index.add(record)
+    return index
+
+
+def _retrieval_mode() -> str:
+    mode = RETRIEVAL_MODE
+    if mode not in ("vector", "lexical", "hybrid"):
+        raise ValueError(f"Unknown KB_RETRIEVAL_MODE: {mode!r} (expected 'vector', 'lexical' or 'hybrid')")
+    return mode
+
+
+def get_shared_index() -> SharedIndex | None:
+    """Return the on-disk index shared between worker processes, or None when disabled."""
+    global _shared_index
+
+    if not SHARED_INDEX_DIR:
+        return None
+    if _shared_index is None:
+        _shared_index = SharedIndex(
+            SHARED_INDEX_DIR, embedding_namespace(get_embedding_backend()), SHARED_INDEX_CHECK_INTERVAL
+        )
+    return _shared_index
+
+
+def _current_source() -> dict | str:
+    """
+    The shared index version to serve, or the knowledge base itself when
+    there is none or it was built from an older knowledge base.
+    """
+    global _knowledge_base_cache, _source_check
+
+    shared = get_shared_index()
+    version = shared.current() if shared is not None else None
+    source = None
+    if version is not None:
+        fingerprint = _current_fingerprint()
+        if shared.source(version) == fingerprint:
+            source = version
+        elif not _build_lock.acquire(blocking=False):
+            # KB_PATH is being updated: keep serving this version, which is
+            # replaced once the update publishes. Not remembered, so the next
+            # query checks again.
+            return version
+        else:
+            # KB_PATH changed since the version was published: rebuild from the file as it is now
+            try:
+                if _knowledge_base_fingerprint is not None and _knowledge_base_fingerprint != fingerprint:
+                    _knowledge_base_cache = None
+            finally:
+                _build_lock.release()
+    if source is None:
+        source = load_knowledge_base()
+    # A shared version is re-checked on the same schedule as CURRENT
+    interval = SHARED_INDEX_CHECK_INTERVAL if shared is not None else float("inf")
+    _source_check = (source, time.monotonic() + interval)
+    return source
+
+
+def _known_source() -> dict | str | None:
+    """The source _current_source() last returned, while it is still valid; None when it must be resolved again."""
+    source, valid_until = _source_check
+    if time.monotonic() >= valid_until:
+        return None
+    # A knowledge base replaced in memory (reload, update) is not the one remembered
+    if not isinstance(source, str) and source is not _knowledge_base_cache:
+        return None
+    return source
+
+
+def _serves(snapshot: KnowledgeIndex | None, source: dict | str, mode: str) -> bool:
+    """Whether the snapshot was built from this source with the indexes the mode needs."""
+    if snapshot is None:
+        return False
+    # Knowledge base dicts are compared by identity, shared index versions by name
+    if snapshot.source is not source and not (isinstance(source, str) and snapshot.source == source):
+        return False
+    if mode != "vector" and snapshot.bm25_index is None:
+        return False
+    if mode != "lexical" and snapshot.vector_index is None:
+        # Lexical fallback snapshot: keep serving it until the embedding retry is due
+        return (
+            snapshot.bm25_index is not None
+            and time.monotonic() - snapshot.built_at < EMBEDDING_RETRY_INTERVAL
+        )
+    return True
+
+
+def _usable(snapshot: KnowledgeIndex | None, mode: str) -> bool:
+    """Whether a snapshot, even an outdated one, can answer queries in this mode."""
+    if snapshot is None:
+        return False
+    return snapshot.bm25_index is not None or (mode != "lexical" and snapshot.vector_index is not None)
+
+
+def build_knowledge_index(
+    knowledge_base: Mapping[str, str],
+    mode: str,
+    embed: Callable[[dict], list[dict]] | None = None,
+) -> KnowledgeIndex:
+    """
+    Build (but do not publish) the indexes a retrieval mode needs.
+
+    Args:
+        knowledge_base: Mapping of url to page text
+        mode: Retrieval mode the snapshot must serve
+        embed: Function returning the embedded passages (default: compute_embeddings)
+
+    Returns:
+        An unpublished snapshot. When embeddings are unavailable it only holds
+        the keyword index, so queries fall back to lexical search.
+    """
+    embed = embed or compute_embeddings
+    kb_embeddings = None
+    if mode != "lexical":
+        try:
+            kb_embeddings = embed(knowledge_base)
+        except Exception as e:
+            print(f"Embeddings unavailable ({e}); falling back to lexical search")
+
+    if kb_embeddings is None:
+        passages = ingest_passages(knowledge_base)
+    else:
+        passages = kb_embeddings
+
+    vector_index = None
+    if kb_embeddings:
+        vector_index = build_vector_index(embedding_matrix(kb_embeddings))
+    bm25_index = None
+    if mode != "vector" or kb_embeddings is None:
+        bm25_index = build_bm25_index(passages)
+    return KnowledgeIndex(
+        0, knowledge_base, passages, vector_index, bm25_index, build_metadata_index(passages), time.monotonic()
+    )
+
+
+def _publish(snapshot: KnowledgeIndex) -> KnowledgeIndex:
+    """Assign the next version and swap the snapshot in; callers hold _build_lock."""
+    global _knowledge_index, _index_version
+
+    _index_version += 1
+    snapshot = replace(snapshot, version=_index_version)
+    # A single reference assignment: readers see either the old or the new snapshot
+    _knowledge_index = snapshot
+    _result_cache.clear()
+    return snapshot
+
+
+def get_knowledge_index(mode: str | None = None) -> KnowledgeIndex:
+    """
+    Return the published index snapshot, building it on first use.
+
+    The hot path is a plain read of the current snapshot. On a miss, the first
+    caller builds the indexes while concurrent callers wait for that build
+    instead of starting their own. Queries never wait for a reload or update:
+    while one holds the build lock they keep the current snapshot, and the
+    next query after it finishes picks up the new one.
+    """
+    mode = mode or _retrieval_mode()
+    snapshot = _knowledge_index
+    if _serves(snapshot, _current_source(), mode):
+        return snapshot
+
+    if _usable(snapshot, mode):
+        if not _build_lock.acquire(blocking=False):
+            return snapshot
+    else:
+        _build_lock.acquire()
+    try:
+        source = _current_source()
+        snapshot = _knowledge_index
+        if not _serves(snapshot, source, mode):
+            snapshot = _publish(_build_for_source(source, mode))
+    finally:
+        _build_lock.release()
+    return snapshot
+
+
+def _build_for_source(source: dict | str, mode: str) -> KnowledgeIndex:
+    shared = get_shared_index()
+    if isinstance(source, str):
+        return load_shared_knowledge_index(shared, source, mode)
+    if shared is None:
+        return build_knowledge_index(source, mode)
+
+    # The knowledge base as it was read, or as it is now for one built elsewhere
+    fingerprint = knowledge_base_fingerprint()
+    if source is _knowledge_base_cache and _knowledge_base_fingerprint is not None:
+        fingerprint = _knowledge_base_fingerprint
+    # The first worker to get the lock builds and publishes; the others then map its files
+    with shared.lock():
+        version = shared.current(refresh=True)
+        if version is not None and shared.source(version) == fingerprint:
+            return load_shared_knowledge_index(shared, version, mode)
+        snapshot = build_knowledge_index(source, mode)
+        if snapshot.vector_index is None:
+            return snapshot
+        version = shared.publish(
+            snapshot.passages, normalize_rows(embedding_matrix(snapshot.passages)), source=fingerprint
+        )
+    return replace(snapshot, source=version)
+
+
+def load_shared_knowledge_index(shared: SharedIndex, version: str, mode: str) -> KnowledgeIndex:
+    """
+    Build a snapshot over a memory-mapped shared index version.
+
+    Vectors and passage text stay in the shared files; only the keyword index
+    (and any compact or IVF structure) is built in this process.
+    """
+    passages, vectors = shared.open(version)
+    vector_index = None
+    if mode != "lexical" and len(passages):
+        vector_index = build_vector_index(vectors, normalized=True)
+    bm25_index = build_bm25_index(passages) if mode != "vector" else None
+    # Built from the records, so no passage text is decoded for it
+    metadata_index = build_metadata_index(passages.records)
+    return KnowledgeIndex(0, version, passages, vector_index, bm25_index, metadata_index, time.monotonic())
+
+
+async def get_knowledge_index_async(mode: str | None = None) -> KnowledgeIndex:
+    """Async counterpart of get_knowledge_index(); concurrent callers await one build."""
+    global _index_build_future
+
+    mode = mode or _retrieval_mode()
+    snapshot = _knowledge_index
+    # Resolving the source may read files (the knowledge base, CURRENT), so on
+    # the loop only a remembered source is used; the rest runs in the executor
+    source = _known_source()
+    if source is not None and _serves(snapshot, source, mode):
+        return snapshot
+
+    future = _index_build_future
+    if future is None or future.done():
+        loop = asyncio.get_running_loop()
+        future = _index_build_future = loop.run_in_executor(_retrieval_executor, get_knowledge_index, mode)
+    # Shielded so one cancelled caller does not cancel the build for the others
+    return await asyncio.shield(future)
+
+
+def reload_knowledge_base(knowledge_base: Mapping[str, str] | None = None) -> KnowledgeIndex:
+    """
+    Re-embed and re-index the knowledge base, then swap the new version in.
+
+    Queries keep being answered from the current snapshot while the new one is
+    built; they move to it as soon as it is published. With a shared index,
+    the new version is written to disk and other workers switch to it on
+    their next check.
+
+    Args:
+        knowledge_base: New url -> text mapping (default: re-read mock.json)
+
+    Returns:
+        The published snapshot.
+    """
+    global _knowledge_base_cache, _knowledge_base_fingerprint, _embeddings_cache
+
+    with _build_lock:
+        fingerprint = knowledge_base_fingerprint()
+        if knowledge_base is None:
+            knowledge_base = _read_knowledge_base()
+        embed = partial(embed_knowledge_base, reuse=_reusable_passages(knowledge_base))
+        snapshot = build_knowledge_index(knowledge_base, _retrieval_mode(), embed=embed)
+        shared = get_shared_index()
+        if shared is not None and snapshot.vector_index is not None:
+            with shared.lock():
+                version = shared.publish(
+                    snapshot.passages, normalize_rows(embedding_matrix(snapshot.passages)), source=fingerprint
+                )
+            snapshot = replace(snapshot, source=version)
+        _embeddings_cache = snapshot.passages if snapshot.vector_index is not None else None
+        snapshot = _publish(snapshot)
+        _knowledge_base_cache = knowledge_base
+        _knowledge_base_fingerprint = fingerprint
+    return snapshot
+
+
+def _reusable_passages(knowledge_base: Mapping[str, str]) -> dict[str, list[dict]]:
+    """Embedded passages, by url, of the pages whose text is unchanged since the last build."""
+    previous_kb, previous = _knowledge_base_cache, _embeddings_cache
+    # Document stores keep their chunking, and vectors come from the embedding store
+    if not previous_kb or not previous or isinstance(knowledge_base, DocumentStore):
+        return {}
+    by_url = {}
+    for passage in previous:
+        by_url.setdefault(passage['url'], []).append(passage)
+    return {
+        url: passages for url, passages in by_url.items()
+        if url in knowledge_base and previous_kb.get(url) == knowledge_base[url]
+    }
+
+
+def update_knowledge_base(upserts: dict[str, str] | None = None, deletes: list[str] | None = None) -> dict:
+    """
+    Add, update or delete knowledge base pages by url and publish the result.
+
+    The knowledge base file is rewritten atomically and a new index version is
+    swapped in; only pages whose text changed are re-chunked and re-embedded.
+    Queries in flight finish on the version they started with.
+
+    Args:
+        upserts: Pages to add or replace, url -> text
+        deletes: Urls of pages to remove
+
+    Returns:
+        Report with the published index version, document and passage counts
+        and the urls that were added, updated and deleted.
+    """
+    upserts = upserts or {}
+    deletes = deletes or []
+    # Serialize read-modify-write of the file with other workers and the CLI
+    with _build_lock, file_lock(KNOWLEDGE_BASE_PATH + ".lock"):
+        current = _read_knowledge_base()
+        if isinstance(current, DocumentStore):
+            # Written in one transaction; only the changed pages are rewritten
+            knowledge_base = current
+            added, updated, deleted = current.update(upserts, deletes)
+        else:
+            knowledge_base = {**current, **upserts}
+            for url in deletes:
+                knowledge_base.pop(url, None)
+
+            added = [url for url in upserts if url not in current and url in knowledge_base]
+            updated = [url for url in upserts if url in current and current[url] != upserts[url]]
+            deleted = [url for url in deletes if url in current]
+            if added or updated or deleted:
+                _write_knowledge_base(knowledge_base)
+        if added or updated or deleted:
+            snapshot = reload_knowledge_base(knowledge_base)
+        else:
+            snapshot = get_knowledge_index()
+
+    return {
+        "version": snapshot.version,
+        "documents": len(knowledge_base),
+        "passages": len(snapshot.passages),
+        "added": added,
+        "updated": updated,
+        "deleted": deleted,
+    }
+
+
+def sync_knowledge_base() -> KnowledgeIndex | None:
+    """
+    Reload the knowledge base file if it differs from the one being served.
+
+    Used by the file watcher; returns the new snapshot, or None when unchanged.
+    """
+    knowledge_base = _read_knowledge_base()
+    if isinstance(knowledge_base, DocumentStore) and isinstance(_knowledge_base_cache, DocumentStore):
+        # Compare write counters instead of reading every page
+        if knowledge_base.generation == _knowledge_base_cache.generation:
+            return None
+    elif knowledge_base == _knowledge_base_cache:
+        return None
+    return reload_knowledge_base(knowledge_base)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text for cache lookups (case and whitespace insensitive)."""
+    return re.sub(r"\s+", " ", query).strip().casefold()
+
+
+def get_query_embedding(query: str) -> np.ndarray:
+    """Embed a search query, reusing the cached vector for repeated questions."""
+    backend = get_embedding_backend()
+    key = (embedding_namespace(backend), normalize_query(query))
+    embedding = _query_embedding_cache.get(key)
+    if embedding is None:
+        if hasattr(backend, "embed_query"):
+            embedding = np.asarray(backend.embed_query(query), dtype=np.float32)
+        else:
+            embedding = get_embedding(query, model=backend.model)
+        _query_embedding_cache.set(key, embedding)
+    return embedding
+
+
+async def get_query_embedding_async(query: str) -> np.ndarray:
+    """Async counterpart of get_query_embedding(), sharing the same cache."""
+    backend = get_embedding_backend()
+    key = (embedding_namespace(backend), normalize_query(query))
+    embedding = _query_embedding_cache.get(key)
+    if embedding is None:
+        if hasattr(backend, "embed_query"):
+            # Local backends compute in-process; there is no I/O to await
+            embedding = np.asarray(backend.embed_query(query), dtype=np.float32)
+        else:
+            embedding = await asyncio.wait_for(
+                get_embedding_async(query, model=backend.model), QUERY_EMBEDDING_TIMEOUT
+            )
+        _query_embedding_cache.set(key, embedding)
+    return embedding
+
+
+def get_index_version() -> int:
+    """Version of the published knowledge index; 0 until the first one is built."""
+    return _index_version
+
+
+def get_cache_stats() -> dict:
+    """Return hit/miss counters of the retrieval caches."""
+    return {
+        "index_version": _index_version,
+        "query_embeddings": _query_embedding_cache.stats(),
+        "results": _result_cache.stats(),
+        "trimming": _trim_stats.stats(),
+    }
+
+
+def search_filters(
+    product: str | None = None,
+    locale: str | None = None,
+    url_prefix: str | None = None,
+) -> tuple[str | None, str | None, str | None]:
     """
-    Query the knowledge base using semantic search with embeddings.
+    Validate and normalize metadata filters.
+
+    Raises:
+        ValueError: If the product is not one of PRODUCT_PAGES.
+    """
+    product = normalize_value(product) if product else None
+    if product is not None and product not in PRODUCT_PAGES:
+        raise ValueError(f"Unknown product: {product!r} (expected one of {', '.join(PRODUCT_PAGES)})")
+    locale = normalize_value(locale) if locale else None
+    return product, locale, url_prefix or None
+
+
+def _tool_product(product: str | None) -> str | None:
+    """
+    The product filter of a tool call. The model may make up a product area;
+    an unknown one is dropped so the search still runs, instead of failing the agent.
+    """
+    if product and normalize_value(product) not in PRODUCT_PAGES:
+        print(f"Ignoring unknown product filter from the model: {product!r}")
+        return None
+    return product
+
+
+def _lexical_ranking(
+    snapshot: KnowledgeIndex, query: str, limit: int, ids: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    return snapshot.bm25_index.search(query, limit, ids=ids)
+
+
+def _vector_ranking(
+    snapshot: KnowledgeIndex,
+    query: str,
+    limit: int,
+    embed_query: Callable[[str], np.ndarray],
+    ids: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    found, scores = snapshot.vector_index.search(embed_query(query), limit, ids=ids)
+    # Approximate indexes pad with -1 when too few candidates were probed
+    keep = found >= 0
+    return found[keep], scores[keep]
+
+
+def apply_budget(
+    results: list[dict],
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    min_score: float | None = None,
+    max_score_gap: float | None = None,
+) -> tuple[list[dict], dict]:
+    """
+    Trim ranked results to a context budget and relevance cut-offs (see trim_results()).
+
+    Unset arguments fall back to KB_CONTEXT_BUDGET_CHARS, KB_MIN_SCORE and
+    KB_MAX_SCORE_GAP; a token budget is converted to characters.
+
+    Returns:
+        (kept results, trim report)
+    """
+    if max_chars is None and max_tokens is None:
+        max_chars = CONTEXT_BUDGET_CHARS
+    kept, report = trim_results(
+        results,
+        max_chars=budget_chars(max_chars, max_tokens),
+        min_score=MIN_SCORE if min_score is None else min_score,
+        max_score_gap=MAX_SCORE_GAP if max_score_gap is None else max_score_gap,
+    )
+    _trim_stats.record(report)
+    if report["trimmed_chars"]:
+        print(
+            f"Trimmed {len(results) - len(kept)} of {len(results)} results "
+            f"and {report['trimmed_chars']} characters (kept {report['chars']})"
+        )
+    return kept, report
+
+
+def query_knowledge_base(
+    query: str,
+    top_k: int = 2,
+    product: str | None = None,
+    locale: str | None = None,
+    url_prefix: str | None = None,
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    min_score: float | None = None,
+) -> list[dict]:
+    """
+    Query the knowledge base using semantic and keyword search.
+
+    Args:
+        query: The user's search query
+        top_k: Maximum number of results to return (default: 2)
+        product: Only search this product area: maquininha, conta-digital,
+            emprestimo, pix or cobranca
+        locale: Only search pages in this locale, e.g. pt-br
+        url_prefix: Only search pages whose url starts with this prefix
+        max_chars: Total characters of content to return (default: KB_CONTEXT_BUDGET_CHARS)
+        max_tokens: Total tokens of content to return, as an alternative to max_chars
+        min_score: Drop results scoring below this (default: KB_MIN_SCORE)
+
+    Returns:
+        The most relevant passages that fit the budget, best first, each with
+        its source url, character offset in the source page, relevance score
+        and content.
+    """
+    filters = search_filters(product, locale, url_prefix)
+    results = _query_knowledge_base(query, top_k, get_query_embedding, filters=filters)
+    return apply_budget(results, max_chars, max_tokens, min_score)[0]
+
+
+async def query_knowledge_base_async(
+    query: str,
+    top_k: int = 2,
+    product: str | None = None,
+    locale: str | None = None,
+    url_prefix: str | None = None,
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    min_score: float | None = None,
+) -> list[dict]:
+    """
+    Query the knowledge base using semantic and keyword search.
 
     Args:
         query: The user's search query
-        top_k: Number of top results to return (default: 2)
+        top_k: Maximum number of results to return (default: 2)
+        product: Only search this product area: maquininha, conta-digital,
+            emprestimo, pix or cobranca
+        locale: Only search pages in this locale, e.g. pt-br
+        url_prefix: Only search pages whose url starts with this prefix
+        max_chars: Total characters of content to return (default: KB_CONTEXT_BUDGET_CHARS)
+        max_tokens: Total tokens of content to return, as an alternative to max_chars
+        min_score: Drop results scoring below this (default: KB_MIN_SCORE)
 
     Returns:
-        A formatted string containing the most relevant results in markdown format.
+        The most relevant passages that fit the budget, best first, each with
+        its source url, character offset in the source page, relevance score
+        and content.
     """
-    # Load knowledge base and compute embeddings
-    knowledge_base = load_knowledge_base()
-    kb_embeddings = compute_embeddings(knowledge_base)
+    report = await search_knowledge_base_async(
+        query, top_k, _tool_product(product), locale, url_prefix, max_chars, max_tokens, min_score
+    )
+    return report["results"]
+
 
-    # Get query embedding
-    query_embedding = get_embedding(query, model="models/text-embedding-004")
+async def search_knowledge_base_async(
+    query: str,
+    top_k: int = 2,
+    product: str | None = None,
+    locale: str | None = None,
+    url_prefix: str | None = None,
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    min_score: float | None = None,
+    max_score_gap: float | None = None,
+) -> dict:
+    """
+    Like query_knowledge_base_async(), but also report what was trimmed.
 
-    # Calculate similarities
-    similarities = []
-    print(f"Calculating similarities for query: {query}", f"Number of embeddings: {len(kb_embeddings)}")
-    for i, kb_embedding in enumerate(kb_embeddings):
-        similarity = cosine_similarity(query_embedding, kb_embedding['embedding'])
-        similarities.append((i, similarity))
+    Returns:
+        {'results': kept results, 'trimmed': trim report (see trim_results())}
+    """
+    filters = search_filters(product, locale, url_prefix)
+    # The query embedding and a cold-start index build are awaited on the loop;
+    # scoring runs on the retrieval executor, so concurrent requests overlap their I/O.
+    embed_query = get_query_embedding
+    if _retrieval_mode() != "lexical":
+        try:
+            embedding = await get_query_embedding_async(query)
+        except Exception as e:
+            print(f"Async query embedding failed: {e}")
+            embedding = e
+        embed_query = partial(_resolved_embedding, embedding)
+    snapshot = await get_knowledge_index_async()
+
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(
+        _retrieval_executor, _query_knowledge_base, query, top_k, embed_query, snapshot, filters
+    )
+    results, report = apply_budget(results, max_chars, max_tokens, min_score, max_score_gap)
+    return {"results": results, "trimmed": report}
 
-    # Sort by similarity (descending)
-    similarities.sort(key=lambda x: x[1], reverse=True)
 
-    # Get top-k results
-    top_results = similarities[:top_k]
+def _resolved_embedding(result: np.ndarray | Exception, query: str) -> np.ndarray:
+    """Hand an already awaited query embedding (or its error) to the sync search."""
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def _query_knowledge_base(
+    query: str,
+    top_k: int,
+    embed_query: Callable[[str], np.ndarray],
+    snapshot: KnowledgeIndex | None = None,
+    filters: tuple[str | None, str | None, str | None] = (None, None, None),
+) -> list[dict]:
+    mode = _retrieval_mode()
+    # Everything below reads this one snapshot, even if a new version is published meanwhile
+    snapshot = snapshot or get_knowledge_index(mode)
+    if mode != "lexical" and snapshot.vector_index is None:
+        mode = "lexical"
+    passages = snapshot.passages
+    if not passages:
+        return []
+
+    # Repeated questions against the same index are answered from the cache
+    result_key = (normalize_query(query), top_k, mode, snapshot.version, filters)
+    cached = _result_cache.get(result_key)
+    if cached is not None:
+        return [dict(item) for item in cached]
+
+    # Filters resolve to passage ids up front, so only those passages are scored
+    ids = snapshot.metadata_index.select(*filters)
+    if ids is not None and len(ids) == 0:
+        return []
+
+    print(
+        f"Searching ({mode}) for query: {query}",
+        f"Number of passages: {len(passages) if ids is None else f'{len(ids)} of {len(passages)}'}",
+    )
+    degraded = False
+    if mode == "hybrid":
+        candidates = top_k * HYBRID_CANDIDATES_PER_RESULT
+        lexical_ids, _ = _lexical_ranking(snapshot, query, candidates, ids)
+        try:
+            vector_ids, _ = _vector_ranking(snapshot, query, candidates, embed_query, ids)
+        except Exception as e:
+            print(f"Query embedding failed ({e}); using lexical ranking only")
+            vector_ids, degraded = [], True
+        ranked = reciprocal_rank_fusion([list(vector_ids), list(lexical_ids)])[:top_k]
+    elif mode == "lexical":
+        ranked = zip(*_lexical_ranking(snapshot, query, top_k, ids))
+    else:
+        ranked = zip(*_vector_ranking(snapshot, query, top_k, embed_query, ids))
 
     # Format results
     results = []
-    for idx, score in top_results:
-        kb_item = kb_embeddings[idx]
-        results.append({
+    for idx, score in ranked:
+        kb_item = passages[idx]
+        result = {
             'url': kb_item['url'],
-            'score': score,
+            'offset': kb_item.get('offset', 0),
+            'score': float(score),
             'content': kb_item['content'].strip()
-        })
+        }
+        # Other urls serving the same page
+        if kb_item.get('aliases'):
+            result['aliases'] = list(kb_item['aliases'])
+        results.append(result)
 
-    return results
+    # Degraded (lexical-only) answers are not cached, so recovery is immediate
+    if not degraded:
+        _result_cache.set(result_key, results)
+    return [dict(item) for item in results]
 
 
 root_agent = Agent(
@@ -122,7 +1121,7 @@ root_agent = Agent(
     model=os.getenv("MODEL_GEMINI_2_0_FLASH"),
     description="Helpful assistant that can answer questions about InfinitePay's products and services.",
     instruction=prompt.RETRIEVER_INSTRUCTION,
-    tools=[query_knowledge_base],
+    tools=[query_knowledge_base_async],
     output_key="knowledgeable_response",
     generate_content_config=types.GenerateContentConfig(
         temperature=0.2,
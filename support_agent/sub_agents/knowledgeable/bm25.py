@@ -0,0 +1,137 @@
+import math
+import re
+import unicodedata
+import numpy as np
+
+# Common Portuguese function words; they carry no signal for product questions
+PORTUGUESE_STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e em entre era essa esse esta este eu
+foi ha isso isto ja la mais mas me meu minha na nas nem no nos o os ou para
+pela pelas pelo pelos por qual quando que se sem ser seu sua sao so tambem te
+tem um uma umas uns voce voces
+""".split())
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def fold_accents(text: str) -> str:
+    """Strip diacritics, e.g. 'Empréstimo à vista' -> 'Emprestimo a vista'."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, accent-fold and split text into terms, dropping Portuguese stopwords."""
+    return [
+        token for token in _TOKEN_PATTERN.findall(fold_accents(text).lower())
+        if token not in PORTUGUESE_STOPWORDS
+    ]
+
+
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 scoring.
+
+    Documents are added one at a time; posting lists are kept as Python lists
+    while building and converted to NumPy arrays lazily on first search.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, tuple[list[int], list[int]]] = {}
+        self._arrays: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_lengths: list[int] = []
+        self._lengths_array: np.ndarray | None = None
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, text: str) -> int:
+        """Index a document and return its id (ids are assigned sequentially)."""
+        doc_id = len(self._doc_lengths)
+        tokens = tokenize(text)
+        counts: dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for term, tf in counts.items():
+            doc_ids, tfs = self._postings.setdefault(term, ([], []))
+            doc_ids.append(doc_id)
+            tfs.append(tf)
+            self._arrays.pop(term, None)
+        self._doc_lengths.append(len(tokens))
+        self._lengths_array = None
+        self._total_length += len(tokens)
+        return doc_id
+
+    def _posting_arrays(self, term: str) -> tuple[np.ndarray, np.ndarray] | None:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            posting = self._postings.get(term)
+            if posting is None:
+                return None
+            arrays = (np.asarray(posting[0], dtype=np.int64), np.asarray(posting[1], dtype=np.float32))
+            self._arrays[term] = arrays
+        return arrays
+
+    def scores(self, query: str) -> np.ndarray:
+        """Return the BM25 score of every document for the query."""
+        n_docs = len(self._doc_lengths)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        if n_docs == 0:
+            return scores
+
+        if self._lengths_array is None:
+            self._lengths_array = np.asarray(self._doc_lengths, dtype=np.float32)
+        lengths = self._lengths_array
+        avg_length = self._total_length / n_docs or 1.0
+        for term in set(tokenize(query)):
+            arrays = self._posting_arrays(term)
+            if arrays is None:
+                continue
+            doc_ids, tfs = arrays
+            idf = math.log(1 + (n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[doc_ids] / avg_length)
+            scores[doc_ids] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+        return scores
+
+    def search(self, query: str, top_k: int, ids: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the `top_k` best matching documents; documents sharing no term are skipped.
+
+        Args:
+            query: Search text
+            top_k: Number of results
+            ids: Only rank these documents (e.g. a metadata filter); None ranks all
+
+        Returns:
+            (ids, scores) 1-D arrays, best match first.
+        """
+        if top_k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self.scores(query)
+        if ids is None:
+            matched = np.flatnonzero(scores > 0)
+        else:
+            matched = ids[scores[ids] > 0]
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        order = np.argsort(-scores[matched], kind="stable")
+        return matched[order], scores[matched[order]]
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], k: int = 60) -> list[tuple[int, float]]:
+    """
+    Fuse several rankings of document ids with reciprocal rank fusion.
+
+    Each document scores sum(1 / (k + rank)) over the rankings it appears in.
+
+    Returns:
+        (id, fused score) pairs, best first.
+    """
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
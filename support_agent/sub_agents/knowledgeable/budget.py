@@ -0,0 +1,124 @@
+import threading
+
+# Rough characters per Gemini token for Portuguese and English prose
+CHARS_PER_TOKEN = 4
+
+
+def budget_chars(max_chars: int | None = None, max_tokens: int | None = None) -> int | None:
+    """
+    Combine a character and a token budget into one character budget.
+
+    Returns:
+        The tighter of the two limits in characters, or None when neither is set.
+    """
+    limits = [limit for limit in (max_chars, max_tokens and max_tokens * CHARS_PER_TOKEN) if limit]
+    return min(limits) if limits else None
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Cut text to at most `limit` characters, at a word boundary when there is one."""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    return cut[:space] if space > limit // 2 else cut
+
+
+def trim_results(
+    results: list[dict],
+    max_chars: int | None = None,
+    min_score: float | None = None,
+    max_score_gap: float | None = None,
+) -> tuple[list[dict], dict]:
+    """
+    Keep the best results that are relevant enough and fit a context budget.
+
+    Results are taken in rank order. One is dropped when its score is below
+    `min_score`, or below `(1 - max_score_gap)` times the best score. Each
+    remaining result is kept if its content still fits in `max_chars`; the
+    best one is always kept, cut down to the budget if it alone exceeds it.
+
+    Args:
+        results: Ranked results with 'score' and 'content', best first
+        max_chars: Total content characters to return; None or 0 for no limit
+        min_score: Absolute score cut-off, in the retrieval mode's score units
+        max_score_gap: Largest allowed relative drop from the best score, e.g.
+            0.5 drops results scoring under half of the best; None or 0 disables
+
+    Returns:
+        (kept, report): the kept results (copies) and how much was trimmed.
+    """
+    report = {
+        "returned": 0,
+        "below_min_score": 0,
+        "below_score_gap": 0,
+        "over_budget": 0,
+        "chars": 0,
+        "trimmed_chars": 0,
+    }
+    if not results:
+        return [], report
+
+    best = results[0]['score']
+    relevant = []
+    for result in results:
+        if min_score and result['score'] < min_score:
+            report["below_min_score"] += 1
+            report["trimmed_chars"] += len(result['content'])
+        elif max_score_gap and best > 0 and result['score'] < best * (1 - max_score_gap):
+            report["below_score_gap"] += 1
+            report["trimmed_chars"] += len(result['content'])
+        else:
+            relevant.append(result)
+
+    kept = []
+    used = 0
+    for result in relevant:
+        content = result['content']
+        if max_chars and used + len(content) > max_chars:
+            if kept:
+                report["over_budget"] += 1
+                report["trimmed_chars"] += len(content)
+                continue
+            # Never return nothing: the best passage is shortened instead
+            content = _truncate(content, max_chars)
+            report["trimmed_chars"] += len(result['content']) - len(content)
+            result = {**result, 'content': content, 'truncated': True}
+        kept.append(dict(result))
+        used += len(content)
+
+    report["returned"] = len(kept)
+    report["chars"] = used
+    return kept, report
+
+
+class TrimStats:
+    """Running totals of what trim_results() removed, for monitoring."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.trimmed_queries = 0
+        self.dropped_results = 0
+        self.trimmed_chars = 0
+        self.returned_chars = 0
+
+    def record(self, report: dict) -> None:
+        dropped = report["below_min_score"] + report["below_score_gap"] + report["over_budget"]
+        with self._lock:
+            self.queries += 1
+            self.trimmed_queries += bool(report["trimmed_chars"])
+            self.dropped_results += dropped
+            self.trimmed_chars += report["trimmed_chars"]
+            self.returned_chars += report["chars"]
+
+    def stats(self) -> dict:
+        total = self.returned_chars + self.trimmed_chars
+        return {
+            "queries": self.queries,
+            "trimmed_queries": self.trimmed_queries,
+            "dropped_results": self.dropped_results,
+            "trimmed_chars": self.trimmed_chars,
+            "returned_chars": self.returned_chars,
+            "trimmed_ratio": self.trimmed_chars / total if total else 0.0,
+        }
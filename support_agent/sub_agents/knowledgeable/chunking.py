@@ -0,0 +1,114 @@
+import re
+
+DEFAULT_CHUNK_SIZE = 1200
+DEFAULT_CHUNK_OVERLAP = 200
+
+# Sentence ends, line breaks and markdown headings are preferred split points
+_SEGMENT_PATTERN = re.compile(r".*?(?:[.!?]+(?=\s|$)|\n+|$)")
+_HEADING_PATTERN = re.compile(r"#{1,6}\s")
+
+
+def split_segments(text: str) -> list[tuple[int, int]]:
+    """
+    Split text into sentence/line segments.
+
+    Returns:
+        (start, end) character spans into `text`, with surrounding whitespace trimmed.
+    """
+    spans = []
+    for match in _SEGMENT_PATTERN.finditer(text):
+        start, end = match.span()
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            spans.append((start, end))
+    return spans
+
+
+def _split_long_span(text: str, start: int, end: int, chunk_size: int) -> list[tuple[int, int]]:
+    """Break a span longer than chunk_size at whitespace (or hard, if there is none)."""
+    spans = []
+    while end - start > chunk_size:
+        cut = text.rfind(" ", start + 1, start + chunk_size + 1)
+        if cut <= start:
+            cut = start + chunk_size
+        spans.append((start, cut))
+        start = cut
+        while start < end and text[start].isspace():
+            start += 1
+    if start < end:
+        spans.append((start, end))
+    return spans
+
+
+def chunk_text(
+    text: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> list[tuple[int, str]]:
+    """
+    Split text into overlapping passages of at most `chunk_size` characters.
+
+    Passages are packed from whole sentences where possible, a markdown heading
+    starts a new passage once the current one is half full, and each passage
+    repeats up to `overlap` characters of trailing sentences from the previous one.
+
+    Returns:
+        (offset, passage) tuples, where offset is the passage start in `text`.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+
+    segments = []
+    for start, end in split_segments(text):
+        segments.extend(_split_long_span(text, start, end, chunk_size))
+
+    chunks = []
+    current: list[tuple[int, int]] = []
+    for start, end in segments:
+        is_heading = _HEADING_PATTERN.match(text, start) is not None
+        length = end - current[0][0] if current else 0
+        full = current and (end - current[0][0] > chunk_size
+                            or (is_heading and length >= chunk_size // 2))
+        if full:
+            chunks.append((current[0][0], current[-1][1]))
+            # Carry trailing segments over as overlap, keeping room for this one
+            carried = []
+            for seg in reversed(current):
+                if end - seg[0] > chunk_size or current[-1][1] - seg[0] > overlap:
+                    break
+                carried.insert(0, seg)
+            current = carried
+        current.append((start, end))
+
+    if current:
+        chunks.append((current[0][0], current[-1][1]))
+
+    return [(start, text[start:end]) for start, end in chunks]
+
+
+def chunk_document(
+    url: str,
+    text: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> list[dict]:
+    """Split one knowledge base page into passage dicts with source metadata."""
+    return [
+        {"chunk_id": f"{url}#{i}", "url": url, "offset": offset, "content": passage}
+        for i, (offset, passage) in enumerate(chunk_text(text, chunk_size, overlap))
+    ]
+
+
+def chunk_knowledge_base(
+    knowledge_base: dict,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> list[dict]:
+    """Split every page of a {url: text} knowledge base into passages."""
+    chunks = []
+    for url, text in knowledge_base.items():
+        chunks.extend(chunk_document(url, text, chunk_size, overlap))
+    return chunks
@@ -0,0 +1,61 @@
+"""
+Manage knowledge base documents from the command line.
+
+    python -m support_agent.sub_agents.knowledgeable.cli upsert https://www.infinitepay.io/pix --file pix.txt
+    python -m support_agent.sub_agents.knowledgeable.cli delete https://www.infinitepay.io/rendimento
+    python -m support_agent.sub_agents.knowledgeable.cli convert data/knowledge_base.json data/knowledge_base.db
+
+The knowledge base file is updated in place and a new index version is
+published; running workers pick it up through the shared index
+(KB_SHARED_INDEX_DIR) or the file watcher (KB_WATCH=1). `convert` copies a
+JSON knowledge base into a SQLite document store; point KB_PATH at the .db
+file to serve from it.
+"""
+
+import argparse
+import json
+import sys
+
+from .agent import CHUNK_OVERLAP, CHUNK_SIZE, update_knowledge_base
+from .docstore import convert_json
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Add, update or delete knowledge base documents by URL.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upsert = commands.add_parser("upsert", help="add or replace a document")
+    upsert.add_argument("url")
+    source = upsert.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="read the document text from this file ('-' for stdin)")
+    source.add_argument("--text", help="document text")
+
+    delete = commands.add_parser("delete", help="remove documents")
+    delete.add_argument("urls", nargs="+")
+
+    convert = commands.add_parser("convert", help="copy a JSON knowledge base into a SQLite document store")
+    convert.add_argument("source", help="{url: text} JSON file")
+    convert.add_argument("target", help="document store to create or update (.db)")
+
+    args = parser.parse_args(argv)
+    if args.command == "upsert":
+        if args.text is not None:
+            text = args.text
+        elif args.file == "-":
+            text = sys.stdin.read()
+        else:
+            with open(args.file, 'r', encoding='utf-8') as f:
+                text = f.read()
+        report = update_knowledge_base(upserts={args.url: text})
+    elif args.command == "delete":
+        report = update_knowledge_base(deletes=args.urls)
+    else:
+        store = convert_json(args.source, args.target, CHUNK_SIZE, CHUNK_OVERLAP)
+        report = {"documents": len(store), "generation": store.generation, "path": args.target}
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import hashlib
+import re
+import zlib
+from urllib.parse import urlparse
+import numpy as np
+
+from .bm25 import fold_accents
+
+# Pages whose estimated Jaccard similarity reaches this are near-duplicates
+DEFAULT_THRESHOLD = 0.9
+# Words per shingle
+SHINGLE_SIZE = 5
+# MinHash signature length, split into LSH bands of NUM_PERM // BANDS rows
+NUM_PERM = 128
+BANDS = 16
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalized_hash(text: str) -> str:
+    """Hash of the text with case, accents and whitespace differences removed."""
+    words = _WORD_PATTERN.findall(fold_accents(text).lower())
+    return hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[str]:
+    """Overlapping word n-grams of the normalized text."""
+    words = _WORD_PATTERN.findall(fold_accents(text).lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    MinHash signatures with multiply-shift hash functions.
+
+    Shingles are hashed once with CRC32; each of the `num_perm` hash functions
+    is then (a * x + b) >> 32 over 64-bit integers, evaluated for every shingle
+    at once with NumPy.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # Odd multipliers keep the multiply-shift family universal
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, items: set[str]) -> np.ndarray:
+        """Return the MinHash signature (uint32 array of length num_perm) of a set of strings."""
+        keys = np.fromiter((zlib.crc32(item.encode("utf-8")) for item in items), dtype=np.uint64, count=len(items))
+        with np.errstate(over="ignore"):
+            hashed = (self._a[:, np.newaxis] * keys[np.newaxis, :] + self._b[:, np.newaxis]) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+
+def estimated_jaccard(sig1: np.ndarray, sig2: np.ndarray) -> float:
+    """Fraction of agreeing MinHash slots, an unbiased Jaccard estimate."""
+    return float(np.mean(sig1 == sig2))
+
+
+def path_match(url: str, text: str) -> float:
+    """
+    Share of the words of a url's last path segment found in the page text,
+    e.g. 1.0 for /gestao-de-cobranca-2 over a page about gestão de cobrança
+    (numbers are ignored). 0.0 for the site root.
+    """
+    segments = [segment for segment in urlparse(url).path.split("/") if segment]
+    if not segments:
+        return 0.0
+    slug = [word for word in _WORD_PATTERN.findall(fold_accents(segments[-1]).lower()) if not word.isdigit()]
+    if not slug:
+        return 0.0
+    words = set(_WORD_PATTERN.findall(fold_accents(text).lower()))
+    return sum(word in words for word in slug) / len(slug)
+
+
+def canonical_rank(url: str, text: str) -> tuple[float, bool, int, str]:
+    """
+    Sort key choosing a duplicate group's canonical page: the url whose path
+    best matches the text, then the site root (a homepage body crawled under
+    another url stays the homepage's), then the shortest url, then
+    alphabetical order.
+    """
+    return -path_match(url, text), bool(urlparse(url).path.strip("/")), len(url), url
+
+
+def find_duplicates(
+    knowledge_base: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    hasher: MinHasher | None = None,
+) -> dict[str, list[str]]:
+    """
+    Group pages with identical or near-identical text.
+
+    Exact duplicates are found by normalized text hash. The remaining pages are
+    compared with MinHash: LSH banding proposes candidate pairs, which are kept
+    when their estimated Jaccard similarity of word shingles reaches `threshold`.
+
+    Returns:
+        {canonical url: [duplicate urls]} for every group of two or more
+        pages; the canonical url is the group's first by canonical_rank(),
+        whatever the knowledge base order, and duplicates keep that order.
+    """
+    urls = list(knowledge_base)
+    parent = list(range(len(urls)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    first_by_hash: dict[str, int] = {}
+    distinct = []
+    for i, url in enumerate(urls):
+        text_hash = normalized_hash(knowledge_base[url])
+        if text_hash in first_by_hash:
+            union(first_by_hash[text_hash], i)
+        else:
+            first_by_hash[text_hash] = i
+            distinct.append(i)
+
+    if threshold < 1.0 and len(distinct) > 1:
+        hasher = hasher or MinHasher()
+        signatures = {i: hasher.signature(shingles(knowledge_base[urls[i]])) for i in distinct}
+        rows = hasher.num_perm // BANDS
+        buckets: dict[tuple[int, bytes], list[int]] = {}
+        for i, signature in signatures.items():
+            for band in range(BANDS):
+                key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+                buckets.setdefault(key, []).append(i)
+
+        checked = set()
+        for members in buckets.values():
+            for a, i in enumerate(members):
+                for j in members[a + 1:]:
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    if estimated_jaccard(signatures[i], signatures[j]) >= threshold:
+                        union(i, j)
+
+    groups: dict[int, list[str]] = {}
+    for i, url in enumerate(urls):
+        groups.setdefault(find(i), []).append(url)
+    duplicates = {}
+    for members in groups.values():
+        if len(members) > 1:
+            canonical = min(members, key=lambda url: canonical_rank(url, knowledge_base[url]))
+            duplicates[canonical] = [url for url in members if url != canonical]
+    return duplicates
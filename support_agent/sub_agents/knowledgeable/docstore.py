@@ -0,0 +1,257 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Iterator, Mapping
+
+from .chunking import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE, chunk_text
+from .embedding_store import content_hash
+
+# File extensions that select the SQLite store instead of a JSON knowledge base
+STORE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    url TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    url TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    PRIMARY KEY (url, seq)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def is_store_path(path: str) -> bool:
+    """Whether a knowledge base path names a SQLite document store."""
+    return path.lower().endswith(STORE_EXTENSIONS)
+
+
+class StoredPassage(dict):
+    """
+    Passage metadata whose 'content' is read from the document store on access.
+
+    The text is not kept: every `passage['content']` is a fresh read of the
+    passage's span of its page, so holding many passages costs only their
+    metadata. `'content' in passage` and `passage.get('content')` do not load it.
+    """
+
+    __slots__ = ("_store",)
+
+    def __init__(self, store: "DocumentStore", record: dict):
+        super().__init__(record)
+        self._store = store
+
+    def __missing__(self, key: str):
+        if key == "content":
+            return self._store.passage_text(self["url"], self["offset"], self["length"])
+        raise KeyError(key)
+
+    def copy(self) -> "StoredPassage":
+        return StoredPassage(self._store, self)
+
+
+class DocumentStore(Mapping):
+    """
+    SQLite knowledge base: a read-only {url: page text} mapping plus its passages.
+
+    Pages are split into passages when they are written, and only each
+    passage's span (offset and length in its page) and content hash are
+    stored, so passage text is never duplicated and is read with one indexed
+    lookup when needed. Iterating pages streams them from disk instead of
+    holding the whole knowledge base in memory.
+
+    Every write bumps `generation`, which readers compare to notice changes
+    made by other processes. Each thread uses its own connection.
+    """
+
+    def __init__(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_CHUNK_OVERLAP):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(_SCHEMA)
+        self.generation = self.current_generation()
+        if self._meta("chunking") != self._chunking_key():
+            self.rechunk()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = self._local.connection = sqlite3.connect(self.path)
+        return connection
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _meta(self, key: str) -> str | None:
+        row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _chunking_key(self) -> str:
+        return f"{self.chunk_size}/{self.overlap}"
+
+    def current_generation(self) -> int:
+        """Read the store's write counter from disk."""
+        return int(self._meta("generation") or 0)
+
+    def __getitem__(self, url: str) -> str:
+        row = self._connection().execute("SELECT content FROM documents WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            raise KeyError(url)
+        return row[0]
+
+    def __contains__(self, url: object) -> bool:
+        query = "SELECT 1 FROM documents WHERE url = ?"
+        return self._connection().execute(query, (url,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._connection().execute("SELECT url FROM documents ORDER BY position").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        """Stream (url, text) pairs in insertion order, one page in memory at a time."""
+        cursor = self._connection().execute("SELECT url, content FROM documents ORDER BY position")
+        while rows := cursor.fetchmany(64):
+            yield from rows
+
+    def passage_text(self, url: str, offset: int, length: int) -> str:
+        """Read one passage's text out of its page."""
+        # SQLite substr() is 1-based and counts characters, like Python slicing
+        row = self._connection().execute(
+            "SELECT substr(content, ?, ?) FROM documents WHERE url = ?", (offset + 1, length, url)
+        ).fetchone()
+        if row is None:
+            raise KeyError(url)
+        return row[0]
+
+    def passages_by_url(self) -> Iterator[tuple[str, list[StoredPassage]]]:
+        """Yield (url, passages) for every page in order; passage text is loaded lazily."""
+        rows = self._connection().execute(
+            "SELECT c.url, c.seq, c.start, c.length, c.content_hash FROM chunks c "
+            "JOIN documents d ON d.url = c.url ORDER BY d.position, c.seq"
+        ).fetchall()
+        current_url, passages = None, []
+        for url, seq, start, length, text_hash in rows:
+            if url != current_url:
+                if passages:
+                    yield current_url, passages
+                current_url, passages = url, []
+            passages.append(StoredPassage(self, {
+                "chunk_id": f"{url}#{seq}",
+                "url": url,
+                "offset": start,
+                "length": length,
+                "content_hash": text_hash,
+            }))
+        if passages:
+            yield current_url, passages
+
+    def _write_chunks(self, connection: sqlite3.Connection, url: str, text: str) -> None:
+        connection.execute("DELETE FROM chunks WHERE url = ?", (url,))
+        connection.executemany(
+            "INSERT INTO chunks (url, seq, start, length, content_hash) VALUES (?, ?, ?, ?, ?)",
+            [
+                (url, seq, offset, len(passage), content_hash(passage))
+                for seq, (offset, passage) in enumerate(chunk_text(text, self.chunk_size, self.overlap))
+            ],
+        )
+
+    def _bump_generation(self, connection: sqlite3.Connection) -> None:
+        self.generation = self.current_generation() + 1
+        connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (str(self.generation),)
+        )
+
+    def update(
+        self, upserts: dict[str, str] | None = None, deletes: list[str] | None = None
+    ) -> tuple[list[str], list[str], list[str]]:
+        """
+        Add, replace and delete pages in one transaction.
+
+        Returns:
+            (added, updated, deleted) urls; unchanged pages are not rewritten.
+        """
+        upserts = upserts or {}
+        deletes = deletes or []
+        added, updated, deleted = [], [], []
+        connection = self._connection()
+        with connection:
+            position = connection.execute("SELECT COALESCE(MAX(position), -1) FROM documents").fetchone()[0]
+            for url, text in upserts.items():
+                if url in deletes:
+                    continue
+                text_hash = content_hash(text)
+                row = connection.execute("SELECT content_hash FROM documents WHERE url = ?", (url,)).fetchone()
+                if row is None:
+                    position += 1
+                    connection.execute(
+                        "INSERT INTO documents (url, position, content, content_hash) VALUES (?, ?, ?, ?)",
+                        (url, position, text, text_hash),
+                    )
+                    added.append(url)
+                elif row[0] != text_hash:
+                    connection.execute(
+                        "UPDATE documents SET content = ?, content_hash = ? WHERE url = ?", (text, text_hash, url)
+                    )
+                    updated.append(url)
+                else:
+                    continue
+                self._write_chunks(connection, url, text)
+            for url in deletes:
+                if connection.execute("DELETE FROM documents WHERE url = ?", (url,)).rowcount:
+                    connection.execute("DELETE FROM chunks WHERE url = ?", (url,))
+                    deleted.append(url)
+            if added or updated or deleted:
+                self._bump_generation(connection)
+        return added, updated, deleted
+
+    def rechunk(self) -> None:
+        """Split every page again with the store's chunk size and overlap."""
+        connection = self._connection()
+        with connection:
+            for url, text in connection.execute("SELECT url, content FROM documents").fetchall():
+                self._write_chunks(connection, url, text)
+            connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('chunking', ?)", (self._chunking_key(),)
+            )
+            if self.generation:
+                self._bump_generation(connection)
+
+
+def convert_json(
+    json_path: str,
+    store_path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> DocumentStore:
+    """
+    Create a document store from a {url: page text} JSON knowledge base.
+
+    Pages keep their JSON order. An existing store at `store_path` is updated
+    in place: new pages are added and changed pages replaced.
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        knowledge_base = json.load(f)
+    store = DocumentStore(store_path, chunk_size, overlap)
+    store.update(upserts=knowledge_base)
+    return store
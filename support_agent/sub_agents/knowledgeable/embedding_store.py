@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-256 hex digest of a document's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Persistent embedding matrix keyed by (model, content hash).
+
+    Vectors live in a single ``.npy`` matrix that is memory-mapped on load, and
+    ``manifest.json`` names that matrix and maps each content hash to its row.
+    Every model gets its own sub-directory, so vectors from different models
+    never mix.
+    """
+
+    def __init__(self, directory: str, model: str):
+        self.model = model
+        self.directory = os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]+", "_", model))
+        self._rows: dict[str, int] = {}
+        self._vectors: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, text_hash: str) -> bool:
+        return text_hash in self._rows
+
+    def load(self) -> "EmbeddingStore":
+        """Load the manifest and memory-map the vector matrix, if present."""
+        manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return self
+
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            vectors = np.load(os.path.join(self.directory, manifest["vectors"]), mmap_mode="r")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable embedding store at {self.directory}: {e}")
+            return self
+
+        hashes = manifest.get("hashes", [])
+        if manifest.get("model") != self.model or len(hashes) != len(vectors):
+            print(f"Ignoring stale embedding store at {self.directory}")
+            return self
+
+        self._rows = {text_hash: row for row, text_hash in enumerate(hashes)}
+        self._vectors = vectors
+        return self
+
+    def get(self, text_hash: str) -> np.ndarray | None:
+        """Return the stored vector for a content hash, or None if missing."""
+        row = self._rows.get(text_hash)
+        if row is None:
+            return None
+        return np.asarray(self._vectors[row])
+
+    def save(self, vectors: dict[str, np.ndarray]) -> None:
+        """
+        Replace the store contents with the given {content hash: vector} mapping.
+
+        The matrix is written under a content-derived name and the manifest is
+        swapped in last with os.replace, so concurrent readers (other workers)
+        always see a consistent store.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        hashes = list(vectors)
+        matrix = np.asarray([vectors[h] for h in hashes], dtype=np.float32)
+        vectors_file = f"vectors-{content_hash(''.join(hashes))[:16]}.npy"
+
+        self._atomic_write(vectors_file, lambda f: np.save(f, matrix))
+        manifest = {
+            "model": self.model,
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "vectors": vectors_file,
+            "hashes": hashes,
+        }
+        self._atomic_write(MANIFEST_FILE, lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+
+        # Readers that already mapped an older matrix keep their open handle.
+        for name in os.listdir(self.directory):
+            if name.startswith("vectors-") and name != vectors_file:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+        self._rows = {text_hash: row for row, text_hash in enumerate(hashes)}
+        self._vectors = matrix
+
+    def _atomic_write(self, filename: str, write) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{filename}.")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, os.path.join(self.directory, filename))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,188 @@
+import random
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Protocol
+import numpy as np
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from .bm25 import tokenize
+
+# Gemini accepts at most 100 texts per batchEmbedContents request
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_INITIAL_BACKOFF = 1.0
+# Output dimensions of the local hashing embedder
+DEFAULT_LOCAL_DIM = 384
+
+
+class EmbeddingBackend(Protocol):
+    """
+    Anything that can turn a batch of texts into an embedding matrix.
+
+    A backend may also define ``embed_query(text)``; otherwise search queries
+    are embedded with the Gemini API under the backend's model.
+    """
+
+    provider: str
+    model: str
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        """Return one embedding row per input text, in input order."""
+        ...
+
+
+def embedding_namespace(backend: EmbeddingBackend) -> str:
+    """Key that keeps vectors of different providers and models apart, e.g. 'local/hashing-v1-384'."""
+    return f"{backend.provider}/{backend.model}"
+
+
+class GeminiEmbeddingBackend:
+    """Embedding backend backed by the Gemini embedding API."""
+
+    provider = "gemini"
+
+    def __init__(self, model: str, task_type: str = "retrieval_document"):
+        self.model = model
+        self.task_type = task_type
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        result = genai.embed_content(
+            model=self.model,
+            content=texts,
+            task_type=self.task_type
+        )
+        return np.asarray(result['embedding'], dtype=np.float32)
+
+
+class LocalEmbeddingBackend:
+    """
+    Deterministic offline embedder: hashed word and bigram counts.
+
+    Terms (accent-folded, lowercased, stopwords removed; see tokenize()) and
+    adjacent term pairs are hashed with CRC32 into `dim` signed buckets, the
+    hashing-trick form of a sparse random projection of their counts. Counts
+    are log-scaled and rows L2-normalized. The vectors only depend on the text,
+    so they are stable across processes and machines and need no network;
+    they capture word overlap, not meaning, and are meant for CI, benchmarks
+    and air-gapped deployments.
+    """
+
+    provider = "local"
+
+    def __init__(self, dim: int = DEFAULT_LOCAL_DIM):
+        self.dim = dim
+        # Bump the version whenever the features change, so stored vectors are not reused
+        self.model = f"hashing-v1-{dim}"
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        rows, keys = [], []
+        for row, text in enumerate(texts):
+            terms = tokenize(text)
+            features = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+            rows.extend([row] * len(features))
+            keys.extend(zlib.crc32(feature.encode("utf-8")) for feature in features)
+
+        # Sign in the lowest bit of the hash, bucket in the rest
+        keys = np.asarray(keys, dtype=np.int64)
+        cells = np.asarray(rows, dtype=np.int64) * self.dim + (keys >> 1) % self.dim
+        signs = np.where(keys & 1, 1.0, -1.0)
+        # Signed counts per (row, bucket), then sublinear scaling of their magnitude
+        counts = np.bincount(cells, weights=signs, minlength=len(texts) * self.dim)
+        matrix = (np.sign(counts) * np.log1p(np.abs(counts))).reshape(len(texts), self.dim).astype(np.float32)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed_batch([text])[0]
+
+
+def create_embedding_backend(provider: str, model: str, local_dim: int = DEFAULT_LOCAL_DIM) -> EmbeddingBackend:
+    """
+    Create the embedding backend for a provider name.
+
+    Args:
+        provider: 'gemini' or 'local'
+        model: Gemini model name (ignored by the local backend)
+        local_dim: Dimensions of the local backend's vectors
+    """
+    if provider == "gemini":
+        return GeminiEmbeddingBackend(model)
+    if provider == "local":
+        return LocalEmbeddingBackend(local_dim)
+    raise ValueError(f"Unknown embedding provider: {provider!r} (expected 'gemini' or 'local')")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return True if the error means the embedding API is throttling us."""
+    if isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)):
+        return True
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+
+def _embed_with_retry(
+    backend: EmbeddingBackend,
+    texts: list[str],
+    max_retries: int,
+    initial_backoff: float,
+    sleep: Callable[[float], None],
+) -> np.ndarray:
+    for attempt in range(max_retries + 1):
+        try:
+            return backend.embed_batch(texts)
+        except Exception as e:
+            if attempt == max_retries or not is_rate_limit_error(e):
+                raise
+            # Exponential backoff with jitter so parallel batches don't retry in lockstep
+            delay = initial_backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+            print(f"Embedding API rate limited, retrying batch of {len(texts)} in {delay:.1f}s")
+            sleep(delay)
+
+
+def embed_texts(
+    texts: list[str],
+    backend: EmbeddingBackend,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+    sleep: Callable[[float], None] = time.sleep,
+) -> np.ndarray:
+    """
+    Embed many texts using batched requests with bounded concurrency.
+
+    Args:
+        texts: Texts to embed
+        backend: Embedding backend used for each batch request
+        batch_size: Maximum number of texts sent in one request
+        max_concurrency: Maximum number of requests in flight at once
+        max_retries: Retries per batch on rate-limit errors
+        initial_backoff: Delay in seconds before the first retry; doubled on each retry
+        sleep: Function used to wait between retries
+
+    Returns:
+        A (len(texts), dim) float32 matrix, rows in input order.
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    print(f"Embedding {len(texts)} texts in {len(batches)} batches")
+
+    def run(batch: list[str]) -> np.ndarray:
+        return _embed_with_retry(backend, batch, max_retries, initial_backoff, sleep)
+
+    if len(batches) == 1 or max_concurrency <= 1:
+        results = [run(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches))) as executor:
+            results = list(executor.map(run, batches))
+
+    return np.concatenate([np.asarray(r, dtype=np.float32) for r in results])
@@ -0,0 +1,232 @@
+import numpy as np
+from .vector_index import normalize_rows, top_k_rows
+
+DEFAULT_NPROBE = 8
+DEFAULT_KMEANS_ITERATIONS = 20
+# k-means is trained on a sample of at most this many points per list
+TRAINING_POINTS_PER_LIST = 64
+# Rows scored against the centroids at once, to bound temporary memory
+ASSIGN_BATCH_SIZE = 8192
+
+
+def default_nlist(n_vectors: int) -> int:
+    """Number of inverted lists to use for a corpus of the given size (~4 * sqrt(n))."""
+    return max(1, min(n_vectors, int(4 * np.sqrt(n_vectors))))
+
+
+def nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Return the index of the most similar centroid for each vector."""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_BATCH_SIZE):
+        block = vectors[start:start + ASSIGN_BATCH_SIZE]
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    n_iter: int = DEFAULT_KMEANS_ITERATIONS,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Cluster unit-length vectors by cosine similarity.
+
+    Returns:
+        A (n_clusters, dim) float32 matrix of unit-length centroids.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = nearest_centroids(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=n_clusters)
+
+        # Re-seed empty clusters with random points so every list stays useful
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+
+        new_centroids = normalize_rows(sums)
+        if np.allclose(new_centroids, centroids, atol=1e-6):
+            break
+        centroids = new_centroids
+
+    return centroids
+
+
+class IVFIndex:
+    """
+    Approximate cosine-similarity index using an inverted file (IVF).
+
+    Vectors are assigned to the nearest of `nlist` k-means centroids. A query
+    only scores the vectors in its `nprobe` closest lists, trading recall for
+    latency: raise `nprobe` for better recall, lower it for faster queries.
+    Vectors can be added after training without rebuilding the index.
+    """
+
+    def __init__(self, nlist: int | None = None, nprobe: int = DEFAULT_NPROBE, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.seed = seed
+        self.centroids: np.ndarray | None = None
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._assignments = np.empty(0, dtype=np.int64)
+        self._size = 0
+        self._lists: list[np.ndarray] = []
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: int | None = None, nprobe: int = DEFAULT_NPROBE) -> "IVFIndex":
+        """Train the coarse quantizer on `vectors` and add them to a new index."""
+        index = cls(nlist=nlist, nprobe=nprobe)
+        index.train(vectors)
+        index.add(vectors)
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dim(self) -> int:
+        return self._vectors.shape[1]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The normalized vectors, in insertion order."""
+        return self._vectors[:self._size]
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vectors: np.ndarray) -> None:
+        """Learn the coarse quantizer centroids from a sample of vectors."""
+        matrix = normalize_rows(vectors)
+        nlist = min(self.nlist or default_nlist(len(matrix)), len(matrix))
+        sample_size = nlist * TRAINING_POINTS_PER_LIST
+        if len(matrix) > sample_size:
+            rng = np.random.default_rng(self.seed)
+            matrix = matrix[rng.choice(len(matrix), size=sample_size, replace=False)]
+        self.nlist = nlist
+        self.centroids = spherical_kmeans(matrix, nlist, seed=self.seed)
+        self._vectors = np.empty((0, matrix.shape[1]), dtype=np.float32)
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+
+    def add(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Insert vectors into their nearest lists.
+
+        Returns:
+            The ids assigned to the new vectors.
+        """
+        matrix = normalize_rows(vectors)
+        if not self.is_trained:
+            self.train(matrix)
+
+        start = self._size
+        ids = np.arange(start, start + len(matrix))
+        self._reserve(start + len(matrix))
+        self._vectors[start:start + len(matrix)] = matrix
+        self._size += len(matrix)
+
+        assignments = nearest_centroids(matrix, self.centroids)
+        self._assignments = np.concatenate([self._assignments, assignments])
+        for list_id in np.unique(assignments):
+            self._lists[list_id] = np.concatenate([self._lists[list_id], ids[assignments == list_id]])
+        return ids
+
+    def _reserve(self, capacity: int) -> None:
+        # Grow geometrically so repeated small inserts stay amortized O(1)
+        if capacity <= len(self._vectors):
+            return
+        grown = np.empty((max(capacity, 2 * len(self._vectors)), self.centroids.shape[1]), dtype=np.float32)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+
+    def search(
+        self, query: np.ndarray, top_k: int, nprobe: int | None = None, ids: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find approximately the `top_k` most similar vectors to a query.
+
+        Returns:
+            (ids, scores) 1-D arrays, best match first.
+        """
+        found, scores = self.search_batch(np.asarray(query)[np.newaxis, :], top_k, nprobe, ids)
+        return found[0], scores[0]
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        nprobe: int | None = None,
+        ids: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Search several queries; centroids for all queries are scored in one product.
+
+        Args:
+            queries: Query vectors, one per row
+            top_k: Number of results per query
+            nprobe: Lists probed per query (default: self.nprobe)
+            ids: Sorted ids of the only vectors that may be returned (e.g. a
+                metadata filter); None allows all. A selection no larger than
+                the probed lists is scored exhaustively instead, which is both
+                cheaper and exact.
+
+        Returns:
+            (ids, scores) arrays of shape (n_queries, k), best match first.
+            Rows are padded with id -1 and score -inf when fewer than k
+            candidates were probed.
+        """
+        queries = normalize_rows(queries)
+        k = min(top_k, self._size if ids is None else len(ids))
+        out_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        if k == 0:
+            return out_ids, out_scores
+
+        n_probe = min(nprobe or self.nprobe, self.nlist)
+        if ids is not None and len(ids) <= n_probe * self._size / self.nlist:
+            found, scores = top_k_rows(queries @ self._vectors[ids].T, k)
+            return ids[found], scores
+
+        probe_lists, _ = top_k_rows(queries @ self.centroids.T, n_probe)
+        for row, (query, lists) in enumerate(zip(queries, probe_lists)):
+            candidates = np.concatenate([self._lists[i] for i in lists])
+            if ids is not None:
+                candidates = candidates[np.isin(candidates, ids, assume_unique=True)]
+            if len(candidates) == 0:
+                continue
+            scores = self._vectors[candidates] @ query
+            best, best_scores = top_k_rows(scores[np.newaxis, :], k)
+            found = best.shape[1]
+            out_ids[row, :found] = candidates[best[0]]
+            out_scores[row, :found] = best_scores[0]
+        return out_ids, out_scores
+
+    def save(self, path: str) -> None:
+        """Serialize the trained index to a .npz file."""
+        np.savez(
+            path,
+            centroids=self.centroids,
+            vectors=self.matrix,
+            assignments=self._assignments,
+            nprobe=self.nprobe,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        """Load an index written by save()."""
+        with np.load(path) as data:
+            index = cls(nlist=len(data["centroids"]), nprobe=int(data["nprobe"]))
+            index.centroids = data["centroids"]
+            index._vectors = np.ascontiguousarray(data["vectors"], dtype=np.float32)
+            index._assignments = data["assignments"].astype(np.int64)
+        index._size = len(index._vectors)
+        order = np.argsort(index._assignments, kind="stable")
+        bounds = np.searchsorted(index._assignments[order], np.arange(index.nlist + 1))
+        index._lists = [order[bounds[i]:bounds[i + 1]] for i in range(index.nlist)]
+        return index
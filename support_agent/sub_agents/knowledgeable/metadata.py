@@ -0,0 +1,137 @@
+import re
+from bisect import bisect_left
+from urllib.parse import urlparse
+import numpy as np
+
+from .bm25 import fold_accents
+
+# Product areas and the page slugs that belong to them; a slug also covers
+# its variants (e.g. 'pix' covers 'pix-parcelado')
+PRODUCT_PAGES = {
+    "maquininha": ("maquininha", "tap-to-pay", "pdv", "receba-na-hora"),
+    "conta-digital": ("conta-digital", "conta-pj", "cartao", "rendimento"),
+    "emprestimo": ("emprestimo",),
+    "pix": ("pix",),
+    "cobranca": ("gestao-de-cobranca", "link-de-pagamento", "boleto", "loja-online"),
+}
+# Pages without a locale segment in their path are in the site's default language
+DEFAULT_LOCALE = "pt-br"
+
+_LOCALE_SEGMENT = re.compile(r"^[a-z]{2}(-[a-z]{2})?$")
+# Filterable fields kept as posting lists
+FIELDS = ("product", "locale")
+
+
+def normalize_value(value: str) -> str:
+    """Canonical form of a filter value, e.g. 'Conta Digital' -> 'conta-digital'."""
+    return re.sub(r"[\s_]+", "-", fold_accents(value).strip().lower())
+
+
+def page_metadata(url: str) -> dict:
+    """
+    Derive the filterable fields of a page from its url.
+
+    Returns:
+        {'product': product area or None, 'locale': locale code}
+    """
+    segments = [segment.lower() for segment in urlparse(url).path.split("/") if segment]
+    locale = DEFAULT_LOCALE
+    if segments and _LOCALE_SEGMENT.match(segments[0]):
+        locale = segments.pop(0)
+
+    product = None
+    if segments:
+        slug = segments[0]
+        for area, slugs in PRODUCT_PAGES.items():
+            if any(slug == page or slug.startswith(page + "-") for page in slugs):
+                product = area
+                break
+    return {"product": product, "locale": locale}
+
+
+class MetadataIndex:
+    """
+    Posting lists of passage ids per metadata value, plus a sorted url table.
+
+    select() resolves filters to the sorted ids of the matching passages
+    without looking at any vector, so the retrievers only score those
+    passages. Like BM25Index, lists are built as Python lists and converted
+    to NumPy arrays on first use.
+    """
+
+    def __init__(self):
+        self._postings: dict[tuple[str, str], list[int]] = {}
+        self._arrays: dict[tuple[str, str], np.ndarray] = {}
+        self._urls: list[str] = []
+        self._sorted_urls: list[str] | None = None
+        self._url_order: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def add(self, passage: dict) -> int:
+        """Index a passage's metadata and return its id (ids are assigned sequentially)."""
+        passage_id = len(self._urls)
+        # Passages ingested before metadata existed get it from their url
+        metadata = passage if "locale" in passage else page_metadata(passage["url"])
+        # A page that absorbed duplicates also matches the filters of their urls
+        sources = [metadata] + [page_metadata(url) for url in passage.get("aliases") or ()]
+        for field in FIELDS:
+            for value in dict.fromkeys(source.get(field) for source in sources):
+                if value is not None:
+                    self._postings.setdefault((field, value), []).append(passage_id)
+                    self._arrays.pop((field, value), None)
+        self._urls.append(passage["url"])
+        self._sorted_urls = None
+        return passage_id
+
+    def values(self, field: str) -> list[str]:
+        """Distinct values of a field, sorted."""
+        return sorted(value for name, value in self._postings if name == field)
+
+    def _posting(self, field: str, value: str) -> np.ndarray:
+        key = (field, value)
+        array = self._arrays.get(key)
+        if array is None:
+            array = np.asarray(self._postings.get(key, []), dtype=np.int64)
+            self._arrays[key] = array
+        return array
+
+    def _url_range(self, prefix: str) -> np.ndarray:
+        if self._sorted_urls is None:
+            order = np.argsort(np.asarray(self._urls, dtype=object), kind="stable")
+            self._sorted_urls = [self._urls[i] for i in order]
+            self._url_order = order.astype(np.int64)
+        start = bisect_left(self._sorted_urls, prefix)
+        end = bisect_left(self._sorted_urls, prefix + "\U0010ffff", lo=start)
+        return np.sort(self._url_order[start:end])
+
+    def select(
+        self,
+        product: str | None = None,
+        locale: str | None = None,
+        url_prefix: str | None = None,
+    ) -> np.ndarray | None:
+        """
+        Resolve filters to passage ids.
+
+        Returns:
+            Sorted ids of the passages matching every given filter, or None
+            when no filter was given (every passage matches).
+        """
+        selections = []
+        if product:
+            selections.append(self._posting("product", normalize_value(product)))
+        if locale:
+            selections.append(self._posting("locale", normalize_value(locale)))
+        if url_prefix:
+            selections.append(self._url_range(url_prefix))
+        if not selections:
+            return None
+
+        # Intersect the shortest lists first
+        selections.sort(key=len)
+        ids = selections[0]
+        for other in selections[1:]:
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
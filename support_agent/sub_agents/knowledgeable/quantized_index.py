@@ -0,0 +1,139 @@
+import numpy as np
+
+from .vector_index import normalize_rows, top_k_rows
+
+PRECISIONS = ("float16", "int8")
+# Candidates re-ranked with exact float32 scores, per requested result
+DEFAULT_RERANK_FACTOR = 4
+# Rows decoded to float32 at a time during the first pass; small enough to stay in cache
+SCORE_BLOCK_ROWS = 1024
+
+
+class QuantizedIndex:
+    """
+    Cosine-similarity index over compact (float16 or int8) vectors.
+
+    Vectors may be truncated to their first `dims` dimensions (Matryoshka style
+    embeddings such as text-embedding-004 keep most of their quality) before
+    being re-normalized and quantized. int8 uses a symmetric per-dimension
+    scale, folded into the query at search time.
+
+    A first pass scores every compact vector; the best `top_k * rerank_factor`
+    candidates are then re-scored exactly in float32 against the original
+    vectors, which are only read for those rows. The original matrix is kept by
+    reference, not copied, so it can be shared with the passages or memory-mapped.
+
+    NumPy has no fast float16 matrix product, so float16 is decoded in software
+    and mainly saves memory; int8 is both smaller and faster to scan.
+    """
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        precision: str = "int8",
+        dims: int | None = None,
+        rerank_factor: int = DEFAULT_RERANK_FACTOR,
+    ):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision!r} (expected one of {PRECISIONS})")
+
+        self.precision = precision
+        self.rerank_factor = rerank_factor
+        self.exact = np.asarray(embeddings, dtype=np.float32)
+        if self.exact.ndim != 2:
+            raise ValueError("embeddings must be a 2-D matrix")
+        self.dims = min(dims or self.exact.shape[1], self.exact.shape[1])
+
+        norms = np.linalg.norm(self.exact, axis=1)
+        norms[norms == 0] = 1.0
+        self._exact_norms = norms
+
+        compact = normalize_rows(self.exact[:, :self.dims])
+        if precision == "float16":
+            self.scale = None
+            self.codes = compact.astype(np.float16)
+        else:
+            scale = np.abs(compact).max(axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            self.scale = scale.astype(np.float32)
+            self.codes = np.round(compact / self.scale).astype(np.int8)
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.exact.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the compact vectors scanned on every query."""
+        scale_bytes = self.scale.nbytes if self.scale is not None else 0
+        return self.codes.nbytes + scale_bytes
+
+    def approximate_scores(self, queries: np.ndarray, ids: np.ndarray | None = None) -> np.ndarray:
+        """
+        Score the compact vectors against a batch of queries (first pass).
+
+        Args:
+            queries: Query vectors, one per row
+            ids: Only score these rows; None scores all
+
+        Returns:
+            A (n_queries, n_scored) matrix, columns in the order of `ids`.
+        """
+        queries = normalize_rows(queries)[:, :self.dims]
+        if self.scale is not None:
+            queries = queries * self.scale
+        n_rows = len(self) if ids is None else len(ids)
+        scores = np.empty((queries.shape[0], n_rows), dtype=np.float32)
+        for start in range(0, n_rows, SCORE_BLOCK_ROWS):
+            if ids is None:
+                block = self.codes[start:start + SCORE_BLOCK_ROWS]
+            else:
+                block = self.codes[ids[start:start + SCORE_BLOCK_ROWS]]
+            scores[:, start:start + len(block)] = queries @ block.astype(np.float32).T
+        return scores
+
+    def search(
+        self, query: np.ndarray, top_k: int, ids: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the `top_k` most similar embeddings to a single query vector.
+
+        Returns:
+            (ids, scores) 1-D arrays, best match first.
+        """
+        found, scores = self.search_batch(np.asarray(query)[np.newaxis, :], top_k, ids)
+        return found[0], scores[0]
+
+    def search_batch(
+        self, queries: np.ndarray, top_k: int, ids: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate first pass over the compact vectors, then an exact re-rank.
+
+        Args:
+            queries: Query vectors, one per row
+            top_k: Number of results per query
+            ids: Only score these rows (e.g. a metadata filter); None scores all
+
+        Returns:
+            (ids, scores) arrays of shape (n_queries, k), best match first.
+            Scores are exact cosine similarities unless re-ranking is disabled.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        approx = self.approximate_scores(queries, ids)
+        if self.rerank_factor <= 0:
+            found, scores = top_k_rows(approx, top_k)
+            return (found if ids is None else ids[found]), scores
+
+        candidates, _ = top_k_rows(approx, top_k * self.rerank_factor)
+        if ids is not None:
+            candidates = ids[candidates]
+        unit_queries = normalize_rows(queries)
+        exact = np.einsum(
+            "qkd,qd->qk", self.exact[candidates], unit_queries
+        ) / self._exact_norms[candidates]
+        ids, scores = top_k_rows(exact, top_k)
+        return np.take_along_axis(candidates, ids, axis=1), scores
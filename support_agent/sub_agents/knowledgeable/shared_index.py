@@ -0,0 +1,193 @@
+import fcntl
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from collections.abc import Sequence
+from contextlib import contextmanager
+from typing import Callable, Iterator
+import numpy as np
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+VECTORS_FILE = "vectors.npy"
+OFFSETS_FILE = "offsets.npy"
+TEXTS_FILE = "texts.bin"
+META_FILE = "meta.json"
+# Published versions kept on disk: the current one and its predecessor
+KEEP_VERSIONS = 2
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive advisory lock on `path`, shared by every process on the host."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class MappedPassages(Sequence):
+    """
+    Read-only passages backed by a text blob and an offsets table.
+
+    Passage text is decoded from the memory-mapped blob on access, so every
+    process shares one page-cache copy instead of holding its own strings.
+    """
+
+    def __init__(self, texts: np.ndarray, offsets: np.ndarray, records: list[dict]):
+        self._texts = texts
+        self._offsets = offsets
+        self._records = records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def records(self) -> list[dict]:
+        """Passage metadata without the text."""
+        return self._records
+
+    def __getitem__(self, index: int) -> dict:
+        if not -len(self) <= index < len(self):
+            raise IndexError("passage index out of range")
+        index %= len(self)
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return {**self._records[index], "content": self._texts[start:end].tobytes().decode("utf-8")}
+
+
+class SharedIndex:
+    """
+    Versioned on-disk index that worker processes memory-map read-only.
+
+    Each published version is a directory holding the unit-normalized float32
+    vector matrix, an offsets table and a UTF-8 text blob, plus passage
+    metadata. ``CURRENT`` names the live version and is replaced atomically, so
+    readers switch to a new version without a restart. Every embedding model
+    gets its own sub-directory, like the embedding store.
+    """
+
+    def __init__(self, directory: str, model: str, check_interval: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.model = model
+        self.directory = os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]+", "_", model))
+        self.check_interval = check_interval
+        self._clock = clock
+        self._current: str | None = None
+        self._next_check = float("-inf")
+        # Version -> fingerprint of the knowledge base it was built from
+        self._sources: dict[str, str | None] = {}
+
+    def current(self, refresh: bool = False) -> str | None:
+        """
+        Return the live version name, or None if nothing was published yet.
+
+        ``CURRENT`` is re-read at most once per `check_interval` seconds, so
+        calling this on every query costs a clock read.
+        """
+        now = self._clock()
+        if refresh or now >= self._next_check:
+            self._next_check = now + self.check_interval
+            try:
+                with open(os.path.join(self.directory, CURRENT_FILE), 'r', encoding='utf-8') as f:
+                    version = f.read().strip() or None
+            except FileNotFoundError:
+                version = None
+            # Keep the same string object while the version is unchanged
+            if version != self._current:
+                self._current = version
+        return self._current
+
+    def lock(self):
+        """Hold an exclusive lock shared by all processes using this directory."""
+        return file_lock(os.path.join(self.directory, LOCK_FILE))
+
+    def source(self, version: str) -> str | None:
+        """Fingerprint of the knowledge base a version was built from (None if not recorded)."""
+        if version not in self._sources:
+            try:
+                with open(os.path.join(self.directory, version, META_FILE), 'r', encoding='utf-8') as f:
+                    self._sources[version] = json.load(f).get("source")
+            except FileNotFoundError:
+                return None
+        return self._sources[version]
+
+    def publish(self, passages: list[dict], vectors: np.ndarray, source: str | None = None) -> str:
+        """
+        Write a new version and make it current.
+
+        Args:
+            passages: Passage dicts; 'content' goes to the text blob and every
+                other field except 'embedding' is kept as metadata
+            vectors: Unit-normalized embedding matrix, one row per passage
+            source: Fingerprint of the knowledge base the passages come from,
+                so readers can tell when the version is out of date
+
+        Returns:
+            The new version name.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        # Names sort by publish time
+        version = f"v{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        tmp_dir = tempfile.mkdtemp(dir=self.directory, prefix=f".{version}.")
+        try:
+            encoded = [passage['content'].encode("utf-8") for passage in passages]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(text) for text in encoded])
+            with open(os.path.join(tmp_dir, TEXTS_FILE), 'wb') as f:
+                f.write(b"".join(encoded))
+            np.save(os.path.join(tmp_dir, OFFSETS_FILE), offsets)
+            np.save(os.path.join(tmp_dir, VECTORS_FILE), np.asarray(vectors, dtype=np.float32))
+            meta = {
+                "model": self.model,
+                "source": source,
+                "count": len(passages),
+                "records": [
+                    {key: value for key, value in passage.items() if key not in ("content", "embedding")}
+                    for passage in passages
+                ],
+            }
+            with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.rename(tmp_dir, os.path.join(self.directory, version))
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{CURRENT_FILE}.")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(self.directory, CURRENT_FILE))
+        self._remove_old_versions(version)
+        self.current(refresh=True)
+        return version
+
+    def open(self, version: str) -> tuple[MappedPassages, np.ndarray]:
+        """Memory-map a published version; returns (passages, vectors)."""
+        path = os.path.join(self.directory, version)
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+        if os.path.getsize(os.path.join(path, TEXTS_FILE)):
+            texts = np.memmap(os.path.join(path, TEXTS_FILE), dtype=np.uint8, mode="r")
+        else:
+            texts = np.empty(0, dtype=np.uint8)
+        return MappedPassages(texts, offsets, meta["records"]), vectors
+
+    def _remove_old_versions(self, current: str) -> None:
+        # Readers that mapped a removed version keep their open mappings.
+        versions = sorted(
+            name for name in os.listdir(self.directory)
+            if not name.startswith(".") and os.path.isdir(os.path.join(self.directory, name))
+        )
+        keep = set(versions[-KEEP_VERSIONS:]) | {current}
+        for name in versions:
+            if name not in keep:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
@@ -0,0 +1,94 @@
+import numpy as np
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return a contiguous float32 copy of `vectors` with unit-length rows."""
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2, order="C")
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def top_k_rows(scores: np.ndarray, top_k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Select the `top_k` highest scores of each row of a 2-D score matrix.
+
+    Uses argpartition so only the selected candidates are sorted.
+
+    Returns:
+        (ids, scores) arrays of shape (n_rows, k), best match first.
+    """
+    k = min(top_k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(candidates, order, axis=1),
+        np.take_along_axis(candidate_scores, order, axis=1),
+    )
+
+
+class VectorIndex:
+    """
+    Exact cosine-similarity index.
+
+    Embeddings are L2-normalized once and kept in a single contiguous float32
+    matrix, so scoring a query is one matrix-vector product (or one
+    matrix-matrix product for a batch of queries).
+    """
+
+    def __init__(self, embeddings: np.ndarray):
+        self.matrix = normalize_rows(embeddings)
+
+    @classmethod
+    def from_normalized(cls, matrix: np.ndarray) -> "VectorIndex":
+        """Wrap an already unit-normalized float32 matrix (e.g. memory-mapped) without copying it."""
+        index = cls.__new__(cls)
+        index.matrix = matrix
+        return index
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    def search(
+        self, query: np.ndarray, top_k: int, ids: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the `top_k` most similar embeddings to a single query vector.
+
+        Returns:
+            (ids, scores) 1-D arrays, best match first.
+        """
+        found, scores = self.search_batch(np.asarray(query)[np.newaxis, :], top_k, ids)
+        return found[0], scores[0]
+
+    def search_batch(
+        self, queries: np.ndarray, top_k: int, ids: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Score a batch of query vectors with a single matrix product.
+
+        Args:
+            queries: Query vectors, one per row
+            top_k: Number of results per query
+            ids: Only score these rows (e.g. a metadata filter); None scores all
+
+        Returns:
+            (ids, scores) arrays of shape (n_queries, k), best match first.
+        """
+        if ids is None:
+            return top_k_rows(normalize_rows(queries) @ self.matrix.T, top_k)
+        found, scores = top_k_rows(normalize_rows(queries) @ self.matrix[ids].T, top_k)
+        return ids[found], scores
@@ -0,0 +1,59 @@
+import os
+import threading
+from typing import Callable
+
+
+class FileWatcher:
+    """
+    Polls a file's modification time and size from a daemon thread.
+
+    `callback` runs on the watcher thread whenever the file changes; errors it
+    raises are printed and the watcher keeps going. Polling avoids a dependency
+    on OS-specific notification APIs and works on mounted volumes.
+    """
+
+    def __init__(self, path: str, callback: Callable[[], object], interval: float = 2.0):
+        self.path = path
+        self.callback = callback
+        self.interval = interval
+        self._signature = self._stat()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> bool:
+        """Poll once; run the callback and return True if the file changed."""
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        if signature is not None:
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"Watcher callback for {self.path} failed: {e}")
+        return True
+
+    def start(self) -> "FileWatcher":
+        """Start polling in the background."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="kb-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop polling and wait for the thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
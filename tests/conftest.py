@@ -19,18 +19,70 @@ def set_env_vars(monkeypatch):
     monkeypatch.setenv("GOOGLE_API_KEY", "test-api-key")
     monkeypatch.setenv("TAVILY_API_KEY", "test-tavily-key")
     monkeypatch.setenv("DISABLE_WEB_DRIVER", "1")
+    # Crawler tests drive a mocked browser; the HTTP fast path is tested on its own
+    monkeypatch.setenv("CRAWLER_HTTP_FETCH", "0")
+    monkeypatch.setenv("CRAWLER_CACHE_TTL", "0")
+
+
+@pytest.fixture(autouse=True)
+def reset_crawler_pages(set_env_vars, monkeypatch):
+    """Forget the page text crawler sessions keep between tool calls."""
+    from support_agent.sub_agents.crawler import agent as crawler_agent
+    monkeypatch.setattr(crawler_agent, "_fetched_text", {})
 
 
 @pytest.fixture
-def reset_knowledgeable_cache():
+def reset_knowledgeable_cache(tmp_path, monkeypatch):
     """Reset the knowledge base caches before each test."""
     from support_agent.sub_agents.knowledgeable import agent as knowledgeable_agent
+    monkeypatch.setattr(knowledgeable_agent, "EMBEDDINGS_DIR", str(tmp_path / "embeddings"))
     knowledgeable_agent._knowledge_base_cache = None
+    knowledgeable_agent._knowledge_base_fingerprint = None
+    knowledgeable_agent._fingerprint_check = (None, float("-inf"))
+    knowledgeable_agent._source_check = (None, float("-inf"))
     knowledgeable_agent._embeddings_cache = None
+    knowledgeable_agent._knowledge_index = None
+    knowledgeable_agent._index_build_future = None
+    knowledgeable_agent._shared_index = None
+    knowledgeable_agent._query_embedding_cache.clear()
+    knowledgeable_agent._result_cache.clear()
     yield
     # Clean up after test
     knowledgeable_agent._knowledge_base_cache = None
+    knowledgeable_agent._knowledge_base_fingerprint = None
+    knowledgeable_agent._fingerprint_check = (None, float("-inf"))
+    knowledgeable_agent._source_check = (None, float("-inf"))
     knowledgeable_agent._embeddings_cache = None
+    knowledgeable_agent._knowledge_index = None
+    knowledgeable_agent._index_build_future = None
+    knowledgeable_agent._shared_index = None
+    knowledgeable_agent._query_embedding_cache.clear()
+    knowledgeable_agent._result_cache.clear()
+
+
+@pytest.fixture
+def fake_embedding_backend(monkeypatch):
+    """Install a deterministic, offline embedding backend for the knowledge base."""
+    from support_agent.sub_agents.knowledgeable import agent as knowledgeable_agent
+    from tests.fixtures.mock_data import FakeEmbeddingBackend
+
+    backend = FakeEmbeddingBackend()
+    monkeypatch.setattr(knowledgeable_agent, "_embedding_backend", backend)
+    return backend
+
+
+@pytest.fixture
+def crawler(monkeypatch):
+    """The crawler agent module with the HTTP fast path enabled and a mocked browser."""
+    from support_agent.sub_agents.crawler import agent as crawler_agent
+    from support_agent.sub_agents.crawler.fetch import FetchStats
+
+    driver = MagicMock()
+    driver.page_source = "<html><body><p>Rendered by the browser</p></body></html>"
+    monkeypatch.setattr(crawler_agent, "CRAWLER_HTTP_FETCH", 1)
+    monkeypatch.setattr(crawler_agent, "_fetch_stats", FetchStats())
+    monkeypatch.setattr(crawler_agent, "get_driver", MagicMock(return_value=driver))
+    return crawler_agent
 
 
 @pytest.fixture
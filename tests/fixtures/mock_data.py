@@ -2,7 +2,12 @@
 Mock data and responses for unit tests.
 """
 
+import hashlib
+import threading
 import numpy as np
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
 
 
 # Sample HTML pages for crawler tests
@@ -113,6 +118,61 @@ def create_mock_embeddings():
     }
 
 
+class FakeEmbeddingBackend:
+    """Deterministic in-process embedding backend that records each batch it receives."""
+
+    provider = "fake"
+
+    def __init__(self, model="models/fake-embedding", dim=8, failures=None):
+        self.model = model
+        self.dim = dim
+        self.batches = []
+        # Exceptions raised (in order) before batches start succeeding
+        self.failures = list(failures or [])
+
+    def embed_batch(self, texts):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.batches.append(list(texts))
+        rows = []
+        for text in texts:
+            rng = np.random.default_rng(int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16))
+            rows.append(rng.normal(size=self.dim))
+        return np.asarray(rows, dtype=np.float32)
+
+    @property
+    def embedded_texts(self):
+        return [text for batch in self.batches for text in batch]
+
+
+class FakeClock:
+    """Clock for TTL tests: returns `now`, which the test moves forward by hand."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def tool_context(session_id):
+    """Minimal ADK tool context: just the session the tool call belongs to."""
+    return SimpleNamespace(session=SimpleNamespace(id=session_id))
+
+
+@contextmanager
+def serve_http(handler):
+    """Serve `handler` (a BaseHTTPRequestHandler) from a local HTTP server; yields its base url."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
 # Query embeddings for testing similarity
 def create_query_embedding(query_type="products"):
     """Create mock query embeddings that will match specific content."""
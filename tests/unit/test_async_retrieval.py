@@ -0,0 +1,165 @@
+"""
+Unit tests for the non-blocking knowledge base tool.
+"""
+
+import asyncio
+import threading
+import time
+import numpy as np
+from unittest.mock import patch
+
+from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE
+
+
+class TestQueryKnowledgeBaseAsync:
+    """Tests for the query_knowledge_base_async tool."""
+
+    async def test_matches_sync_results(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that the async tool returns the same passages as the sync one."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        embedding = fake_embedding_backend.embed_batch(["pricing"])[0]
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+
+        async def fake_async_embedding(text, model=None):
+            return embedding
+
+        with patch.object(kb_agent, 'get_embedding_async', side_effect=fake_async_embedding), \
+                patch.object(kb_agent, 'get_embedding', return_value=embedding):
+            async_result = await kb_agent.query_knowledge_base_async("pricing", top_k=3)
+            kb_agent._result_cache.clear()
+            sync_result = kb_agent.query_knowledge_base("pricing", top_k=3)
+
+        assert async_result == sync_result
+
+    async def test_search_runs_on_retrieval_executor(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that index build and scoring happen off the event loop thread."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        threads = []
+        original = kb_agent._query_knowledge_base
+
+        def recording_search(*args):
+            threads.append(threading.current_thread().name)
+            return original(*args)
+
+        async def fake_async_embedding(text, model=None):
+            return fake_embedding_backend.embed_batch([text])[0]
+
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        with patch.object(kb_agent, '_query_knowledge_base', side_effect=recording_search), \
+                patch.object(kb_agent, 'get_embedding_async', side_effect=fake_async_embedding):
+            await kb_agent.query_knowledge_base_async("pix")
+
+        assert threads and threads[0].startswith("kb-retrieval")
+
+    async def test_concurrent_queries_overlap_embedding_io(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that N concurrent queries wait on the embedding API in parallel."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        async def slow_async_embedding(text, model=None):
+            await asyncio.sleep(0.2)
+            return fake_embedding_backend.embed_batch([text])[0]
+
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        with patch.object(kb_agent, 'get_embedding_async', side_effect=slow_async_embedding):
+            started = time.perf_counter()
+            results = await asyncio.gather(*(
+                kb_agent.query_knowledge_base_async(f"question {i}") for i in range(5)
+            ))
+            elapsed = time.perf_counter() - started
+
+        assert len(results) == 5
+        assert elapsed < 0.6
+
+    async def test_index_build_does_not_block_event_loop(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that the first-time index build leaves the loop free to run other tasks."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        original = kb_agent.compute_embeddings
+
+        def slow_build(knowledge_base):
+            time.sleep(0.3)
+            return original(knowledge_base)
+
+        async def fake_async_embedding(text, model=None):
+            return fake_embedding_backend.embed_batch([text])[0]
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        with patch.object(kb_agent, 'compute_embeddings', side_effect=slow_build), \
+                patch.object(kb_agent, 'get_embedding_async', side_effect=fake_async_embedding):
+            ticking = asyncio.create_task(ticker())
+            await kb_agent.query_knowledge_base_async("pix")
+            ticking.cancel()
+
+        assert ticks >= 10
+
+    async def test_knowledge_base_load_does_not_block_event_loop(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that reading the knowledge base on a cold start happens off the loop too."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        def slow_load():
+            time.sleep(0.3)
+            kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+            return MOCK_KNOWLEDGE_BASE
+
+        async def fake_async_embedding(text, model=None):
+            return fake_embedding_backend.embed_batch([text])[0]
+
+        longest_gap = 0.0
+
+        async def ticker():
+            nonlocal longest_gap
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                longest_gap = max(longest_gap, time.perf_counter() - started)
+
+        with patch.object(kb_agent, 'load_knowledge_base', side_effect=slow_load), \
+                patch.object(kb_agent, 'get_embedding_async', side_effect=fake_async_embedding):
+            ticking = asyncio.create_task(ticker())
+            await asyncio.sleep(0)
+            await kb_agent.query_knowledge_base_async("pix")
+            ticking.cancel()
+
+        assert longest_gap < 0.2
+
+    async def test_embedding_failure_falls_back_to_lexical(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that an async embedding error degrades to keyword results in hybrid mode."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        with patch.object(kb_agent, 'get_embedding_async', side_effect=TimeoutError("slow API")), \
+                patch.object(kb_agent, 'get_embedding') as mock_sync_embedding:
+            result = await kb_agent.query_knowledge_base_async("support team chat", top_k=1)
+
+        assert result[0]['url'] == "https://www.infinitepay.io/support"
+        mock_sync_embedding.assert_not_called()
+
+    async def test_query_embedding_cache_is_shared(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that an embedding fetched asynchronously is reused by the sync path."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        async def fake_async_embedding(text, model=None):
+            return np.ones(fake_embedding_backend.dim)
+
+        with patch.object(kb_agent, 'get_embedding_async', side_effect=fake_async_embedding), \
+                patch.object(kb_agent, 'get_embedding') as mock_sync_embedding:
+            await kb_agent.get_query_embedding_async("Pix parcelado")
+            kb_agent.get_query_embedding("pix PARCELADO")
+
+        mock_sync_embedding.assert_not_called()
+
+    def test_agent_registers_async_tool(self):
+        """Test that the knowledgeable agent uses the non-blocking tool."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        assert kb_agent.query_knowledge_base_async in kb_agent.root_agent.tools
@@ -0,0 +1,57 @@
+"""
+Smoke tests for the benchmark harnesses.
+"""
+
+import json
+
+
+class TestRetrievalBenchmark:
+    """Tests for benchmarks/retrieval.py."""
+
+    def test_small_run_writes_results(self, tmp_path):
+        """Test that a tiny offline run measures every mode and writes JSON."""
+        from benchmarks.retrieval import MODES, main
+
+        output = tmp_path / "retrieval.json"
+
+        assert main(["--sizes", "300", "--queries", "10", "--top-k", "5", "--output", str(output)]) == 0
+
+        report = json.loads(output.read_text(encoding="utf-8"))
+        assert [record["mode"] for record in report["results"]] == list(MODES)
+        exact = next(record for record in report["results"] if record["mode"] == "exact")
+        assert exact["recall_at_k"] == 1.0
+        assert exact["memory_bytes"] > 300 * 384 * 4 * 0.9
+
+    def test_loop_baseline_matches_exact_index(self):
+        """Test that the loop baseline ranks like the vectorized index."""
+        import numpy as np
+        from benchmarks.retrieval import loop_search
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+        vectors = np.random.default_rng(0).normal(size=(50, 8)).astype(np.float32)
+
+        assert loop_search(list(vectors), vectors[3], 5) == VectorIndex(vectors).search(vectors[3], 5)[0].tolist()
+
+    def test_compare_flags_regressions(self):
+        """Test that slower or less accurate modes are reported against a baseline."""
+        from benchmarks.retrieval import compare
+
+        baseline = [{"size": 1000, "mode": "exact", "p50_ms": 1.0, "recall_at_k": 1.0}]
+        slower = [{"size": 1000, "mode": "exact", "p50_ms": 1.5, "recall_at_k": 0.7}]
+        same = [{"size": 1000, "mode": "exact", "p50_ms": 1.1, "recall_at_k": 1.0}]
+
+        assert len(compare(slower, baseline, tolerance=0.2)) == 2
+        assert compare(same, baseline, tolerance=0.2) == []
+
+
+class TestHtmlExtractBenchmark:
+    """Tests for benchmarks/html_extract.py."""
+
+    def test_synthetic_page_matches_original_extraction(self, capsys):
+        """Test that a small run completes and the new extraction gives the original text."""
+        from benchmarks.html_extract import main
+
+        assert main(["--sizes", "20000", "--repeats", "1"]) == 0
+
+        rows = [line.split() for line in capsys.readouterr().out.splitlines()[1:]]
+        assert all(row[-1] in ("yes", "main") for row in rows)
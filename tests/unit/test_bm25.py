@@ -0,0 +1,197 @@
+"""
+Unit tests for lexical (BM25) and hybrid knowledge base retrieval.
+"""
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+
+PASSAGES = {
+    "https://www.infinitepay.io/tap-to-pay": "Tap to Pay: aceite pagamentos por aproximação no iPhone.",
+    "https://www.infinitepay.io/pdv": "PDV completo para sua loja, com controle de estoque.",
+    "https://www.infinitepay.io/emprestimo": "Empréstimo com taxas baixas, parcele em até 12x.",
+    "https://www.infinitepay.io/pix": "Pix grátis e Pix parcelado para seus clientes.",
+}
+
+
+class TestTokenize:
+    """Tests for Portuguese-aware tokenization."""
+
+    def test_accents_are_folded(self):
+        """Test that accented and unaccented spellings produce the same term."""
+        from support_agent.sub_agents.knowledgeable.bm25 import tokenize
+
+        assert tokenize("Empréstimo") == tokenize("emprestimo") == ["emprestimo"]
+
+    def test_stopwords_are_dropped(self):
+        """Test that Portuguese function words are not indexed."""
+        from support_agent.sub_agents.knowledgeable.bm25 import tokenize
+
+        assert tokenize("taxas da maquininha para o cliente") == ["taxas", "maquininha", "cliente"]
+
+    def test_product_codes_are_kept(self):
+        """Test that tokens like 12x and PDV survive tokenization."""
+        from support_agent.sub_agents.knowledgeable.bm25 import tokenize
+
+        assert tokenize("Parcele em 12x no PDV") == ["parcele", "12x", "pdv"]
+
+
+class TestBM25Index:
+    """Tests for the BM25Index class."""
+
+    def _index(self):
+        from support_agent.sub_agents.knowledgeable.bm25 import BM25Index
+
+        index = BM25Index()
+        for text in PASSAGES.values():
+            index.add(text)
+        return index
+
+    def test_exact_product_name_ranks_first(self):
+        """Test that an exact product name finds its page."""
+        ids, scores = self._index().search("Tap to Pay", top_k=2)
+
+        assert ids[0] == 0
+        assert scores[0] > 0
+
+    def test_accent_insensitive_match(self):
+        """Test that a query without accents matches accented text."""
+        ids, _ = self._index().search("emprestimo", top_k=1)
+
+        assert ids[0] == 2
+
+    def test_documents_without_shared_terms_are_skipped(self):
+        """Test that unrelated documents are not returned."""
+        ids, _ = self._index().search("12x", top_k=4)
+
+        assert list(ids) == [2]
+
+    def test_rarer_terms_weigh_more(self):
+        """Test that a term in fewer documents has a higher idf contribution."""
+        from support_agent.sub_agents.knowledgeable.bm25 import BM25Index
+
+        index = BM25Index()
+        index.add("pix pix boleto")
+        index.add("pix cartao")
+        index.add("pix")
+
+        scores = index.scores("pix boleto")
+        assert np.argmax(scores) == 0
+
+    def test_incremental_add_is_searchable(self):
+        """Test that documents added after a search are found by later searches."""
+        index = self._index()
+        index.search("pdv", top_k=1)
+
+        new_id = index.add("Maquininha Smart com PDV integrado")
+        ids, _ = index.search("maquininha", top_k=1)
+
+        assert ids[0] == new_id
+
+    def test_empty_index(self):
+        """Test that searching an empty index returns nothing."""
+        from support_agent.sub_agents.knowledgeable.bm25 import BM25Index
+
+        ids, scores = BM25Index().search("pix", top_k=3)
+
+        assert len(ids) == 0
+
+
+class TestReciprocalRankFusion:
+    """Tests for the reciprocal_rank_fusion function."""
+
+    def test_documents_in_both_rankings_win(self):
+        """Test that agreement between rankings is rewarded."""
+        from support_agent.sub_agents.knowledgeable.bm25 import reciprocal_rank_fusion
+
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]])
+
+        assert [doc_id for doc_id, _ in fused][:2] == [1, 3]
+
+    def test_single_ranking_order_is_preserved(self):
+        """Test that fusing with an empty ranking keeps the original order."""
+        from support_agent.sub_agents.knowledgeable.bm25 import reciprocal_rank_fusion
+
+        fused = reciprocal_rank_fusion([[5, 2, 9], []])
+
+        assert [doc_id for doc_id, _ in fused] == [5, 2, 9]
+
+
+class TestRetrievalModes:
+    """Tests for lexical-only and hybrid modes of query_knowledge_base."""
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.compute_embeddings')
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_lexical_mode_makes_no_embedding_calls(
+        self, mock_get_embedding, mock_compute, reset_knowledgeable_cache, monkeypatch
+    ):
+        """Test that lexical mode answers without touching the embedding API."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+        kb_agent._knowledge_base_cache = PASSAGES
+
+        result = kb_agent.query_knowledge_base("PDV", top_k=2)
+
+        assert result[0]['url'] == "https://www.infinitepay.io/pdv"
+        mock_get_embedding.assert_not_called()
+        mock_compute.assert_not_called()
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_hybrid_mode_finds_exact_terms_missed_by_vectors(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache, monkeypatch
+    ):
+        """Test that a keyword hit is fused into the results even when vectors miss it."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "hybrid")
+        kb_agent._knowledge_base_cache = PASSAGES
+        # Query vector identical to the Pix page, so vector search ranks Pix first
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch([PASSAGES["https://www.infinitepay.io/pix"]])[0]
+
+        result = kb_agent.query_knowledge_base("parcele em 12x", top_k=2)
+
+        urls = [item['url'] for item in result]
+        assert "https://www.infinitepay.io/emprestimo" in urls
+        assert "https://www.infinitepay.io/pix" in urls
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_hybrid_mode_falls_back_when_embedding_fails(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache, monkeypatch
+    ):
+        """Test that an embedding API outage degrades to lexical results."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "hybrid")
+        kb_agent._knowledge_base_cache = PASSAGES
+        mock_get_embedding.side_effect = TimeoutError("embedding API timed out")
+
+        result = kb_agent.query_knowledge_base("Tap to Pay", top_k=1)
+
+        assert result[0]['url'] == "https://www.infinitepay.io/tap-to-pay"
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.compute_embeddings')
+    def test_index_build_failure_falls_back_to_lexical(
+        self, mock_compute, reset_knowledgeable_cache, monkeypatch
+    ):
+        """Test that a cold start with the embedding API down still answers."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "vector")
+        kb_agent._knowledge_base_cache = PASSAGES
+        mock_compute.side_effect = ConnectionError("embedding API down")
+
+        result = kb_agent.query_knowledge_base("pix parcelado", top_k=1)
+
+        assert result[0]['url'] == "https://www.infinitepay.io/pix"
+
+    def test_unknown_mode_is_rejected(self, reset_knowledgeable_cache, monkeypatch):
+        """Test that a typo in KB_RETRIEVAL_MODE is reported."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "semantic")
+        kb_agent._knowledge_base_cache = PASSAGES
+
+        with pytest.raises(ValueError):
+            kb_agent.query_knowledge_base("pix")
@@ -0,0 +1,151 @@
+"""
+Unit tests for budgeted retrieval results.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE
+
+
+def ranked(*scores, length=100):
+    return [
+        {'url': f"https://example.com/{i}", 'score': score, 'content': "x" * length}
+        for i, score in enumerate(scores)
+    ]
+
+
+class TestTrimResults:
+    """Tests for the trim_results function."""
+
+    def test_no_limits_keeps_everything(self):
+        """Test that results pass through untouched without limits."""
+        from support_agent.sub_agents.knowledgeable.budget import trim_results
+
+        kept, report = trim_results(ranked(0.9, 0.5, 0.1))
+
+        assert len(kept) == 3
+        assert report["trimmed_chars"] == 0
+        assert report["chars"] == 300
+
+    def test_budget_keeps_best_passages(self):
+        """Test that results are taken in rank order until the budget is spent."""
+        from support_agent.sub_agents.knowledgeable.budget import trim_results
+
+        results = ranked(0.9, 0.8, 0.7)
+        results[2]['content'] = "short"
+        kept, report = trim_results(results, max_chars=150)
+
+        assert [item['url'] for item in kept] == ["https://example.com/0", "https://example.com/2"]
+        assert report["over_budget"] == 1
+        assert report["trimmed_chars"] == 100
+
+    def test_best_result_is_truncated_not_dropped(self):
+        """Test that a budget smaller than the best passage shortens it."""
+        from support_agent.sub_agents.knowledgeable.budget import trim_results
+
+        results = [{'url': "u", 'score': 1.0, 'content': "palavra " * 50}]
+        kept, report = trim_results(results, max_chars=60)
+
+        assert len(kept[0]['content']) <= 60
+        assert kept[0]['content'].endswith("palavra")
+        assert kept[0]['truncated'] is True
+        assert report["trimmed_chars"] == 400 - len(kept[0]['content'])
+
+    def test_min_score(self):
+        """Test that results below the absolute threshold are dropped."""
+        from support_agent.sub_agents.knowledgeable.budget import trim_results
+
+        kept, report = trim_results(ranked(0.9, 0.5, 0.1), min_score=0.4)
+
+        assert [item['score'] for item in kept] == [0.9, 0.5]
+        assert report["below_min_score"] == 1
+
+    def test_nothing_relevant_returns_empty(self):
+        """Test that no result is returned when none reaches the threshold."""
+        from support_agent.sub_agents.knowledgeable.budget import trim_results
+
+        assert trim_results(ranked(0.3, 0.2), min_score=0.5)[0] == []
+
+    def test_score_gap(self):
+        """Test that results far below the best one are dropped."""
+        from support_agent.sub_agents.knowledgeable.budget import trim_results
+
+        kept, report = trim_results(ranked(0.8, 0.7, 0.3), max_score_gap=0.5)
+
+        assert [item['score'] for item in kept] == [0.8, 0.7]
+        assert report["below_score_gap"] == 1
+
+    def test_input_is_not_modified(self):
+        """Test that cached result dicts are never changed in place."""
+        from support_agent.sub_agents.knowledgeable.budget import trim_results
+
+        results = ranked(0.9)
+        trim_results(results, max_chars=10)
+
+        assert len(results[0]['content']) == 100
+
+    def test_token_budget(self):
+        """Test that token budgets are converted to characters and the tighter limit wins."""
+        from support_agent.sub_agents.knowledgeable.budget import CHARS_PER_TOKEN, budget_chars
+
+        assert budget_chars(max_tokens=100) == 100 * CHARS_PER_TOKEN
+        assert budget_chars(max_chars=50, max_tokens=100) == 50
+        assert budget_chars() is None
+
+
+class TestBudgetedQuery:
+    """Tests for budgets on query_knowledge_base."""
+
+    @pytest.fixture
+    def lexical(self, reset_knowledgeable_cache, monkeypatch):
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        return kb_agent
+
+    def test_budget_limits_returned_content(self, lexical):
+        """Test that the total content returned stays within max_chars."""
+        unlimited = lexical.query_knowledge_base("payment pricing support", top_k=3, max_chars=0)
+        budget = len(unlimited[0]['content']) + 1
+
+        result = lexical.query_knowledge_base("payment pricing support", top_k=3, max_chars=budget)
+
+        assert len(unlimited) > 1
+        assert result == unlimited[:1]
+
+    def test_default_budget(self, lexical, monkeypatch):
+        """Test that KB_CONTEXT_BUDGET_CHARS applies when no budget is given."""
+        monkeypatch.setattr(lexical, "CONTEXT_BUDGET_CHARS", 20)
+
+        result = lexical.query_knowledge_base("payment pricing support", top_k=3)
+
+        assert len(result) == 1
+        assert len(result[0]['content']) <= 20
+
+    def test_trimming_is_reported(self, lexical):
+        """Test that trimmed characters show up in the cache stats."""
+        before = lexical.get_cache_stats()["trimming"]["trimmed_chars"]
+
+        lexical.query_knowledge_base("payment pricing support", top_k=3, max_tokens=5)
+
+        assert lexical.get_cache_stats()["trimming"]["trimmed_chars"] > before
+
+    async def test_search_returns_report(self, lexical):
+        """Test that the async search reports what it trimmed alongside the results."""
+        report = await lexical.search_knowledge_base_async("payment pricing support", top_k=3, min_score=1e9)
+
+        assert report["results"] == []
+        assert report["trimmed"]["returned"] == 0
+        assert report["trimmed"]["below_min_score"] > 1
+
+    def test_search_route_reports_trimming(self, lexical):
+        """Test that the search endpoint returns the trim report."""
+        from api.main import init_api
+
+        client = TestClient(init_api())
+        params = {"q": "payment pricing support", "top_k": 3, "max_chars": 30}
+        response = client.get("/api/v1/knowledge-base/search", params=params)
+
+        assert response.json()["trimmed"]["chars"] <= 30
@@ -0,0 +1,139 @@
+"""
+Unit tests for knowledge base passage chunking.
+"""
+
+import pytest
+from unittest.mock import patch
+
+
+LONG_PAGE = " ".join(
+    f"Sentence number {i} talks about the maquininha and its fees." for i in range(100)
+)
+
+
+class TestChunkText:
+    """Tests for the chunk_text function."""
+
+    def test_short_text_is_single_chunk(self):
+        """Test that text shorter than chunk_size is returned unchanged."""
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_text
+
+        text = "InfinitePay offers card machines. No monthly fees."
+
+        assert chunk_text(text, chunk_size=200, overlap=20) == [(0, text)]
+
+    def test_chunks_respect_size_limit(self):
+        """Test that no passage is longer than chunk_size."""
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_text
+
+        chunks = chunk_text(LONG_PAGE, chunk_size=300, overlap=80)
+
+        assert len(chunks) > 1
+        assert all(len(passage) <= 300 for _, passage in chunks)
+
+    def test_offsets_point_into_source_text(self):
+        """Test that each offset locates its passage in the original page."""
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_text
+
+        for offset, passage in chunk_text(LONG_PAGE, chunk_size=300, overlap=80):
+            assert LONG_PAGE[offset:offset + len(passage)] == passage
+
+    def test_chunks_split_on_sentence_boundaries(self):
+        """Test that passages end at the end of a sentence."""
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_text
+
+        for _, passage in chunk_text(LONG_PAGE, chunk_size=300, overlap=80):
+            assert passage.endswith(".")
+
+    def test_consecutive_chunks_overlap(self):
+        """Test that each passage repeats the tail of the previous one."""
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_text
+
+        chunks = chunk_text(LONG_PAGE, chunk_size=300, overlap=80)
+
+        for (prev_offset, prev), (offset, _) in zip(chunks, chunks[1:]):
+            assert prev_offset < offset < prev_offset + len(prev)
+
+    def test_all_text_is_covered(self):
+        """Test that every sentence appears in at least one passage."""
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_text
+
+        joined = " ".join(passage for _, passage in chunk_text(LONG_PAGE, chunk_size=300, overlap=0))
+
+        for i in range(100):
+            assert f"Sentence number {i} " in joined
+
+    def test_decimal_numbers_are_not_sentence_breaks(self):
+        """Test that fee values like 2.99 stay in one segment."""
+        from support_agent.sub_agents.knowledgeable.chunking import split_segments
+
+        text = "Taxa de 2.99 no débito. Parcele em 12x."
+
+        assert [text[s:e] for s, e in split_segments(text)] == ["Taxa de 2.99 no débito.", "Parcele em 12x."]
+
+    def test_heading_starts_new_chunk(self):
+        """Test that a markdown heading opens a new passage once the current one is half full."""
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_text
+
+        text = "Intro sentence one. Intro sentence two.\n## Pricing\nFees are low."
+        chunks = chunk_text(text, chunk_size=60, overlap=0)
+
+        assert chunks[-1][1].startswith("## Pricing")
+
+    def test_text_without_punctuation_is_hard_split(self):
+        """Test that a long run without sentence ends is split at whitespace."""
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_text
+
+        text = " ".join(["palavra"] * 200)
+        chunks = chunk_text(text, chunk_size=100, overlap=0)
+
+        assert all(len(passage) <= 100 for _, passage in chunks)
+        assert all(not passage.startswith(" ") for _, passage in chunks)
+
+    def test_overlap_must_be_smaller_than_chunk_size(self):
+        """Test that an overlap as large as the chunk is rejected."""
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_text
+
+        with pytest.raises(ValueError):
+            chunk_text("text", chunk_size=100, overlap=100)
+
+
+class TestChunkDocument:
+    """Tests for per-chunk metadata."""
+
+    def test_chunk_metadata(self):
+        """Test that each passage carries its source url, offset and id."""
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_document
+
+        chunks = chunk_document("https://www.infinitepay.io/pix", LONG_PAGE, chunk_size=300, overlap=80)
+
+        for i, chunk in enumerate(chunks):
+            assert chunk["url"] == "https://www.infinitepay.io/pix"
+            assert chunk["chunk_id"] == f"https://www.infinitepay.io/pix#{i}"
+            assert LONG_PAGE[chunk["offset"]:].startswith(chunk["content"])
+
+
+class TestChunkAwareRetrieval:
+    """Tests for retrieval over passages instead of whole pages."""
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.load_knowledge_base')
+    def test_query_returns_passages_not_pages(
+        self, mock_load_kb, fake_embedding_backend, reset_knowledgeable_cache, monkeypatch
+    ):
+        """Test that results are bounded by the chunk size and carry offsets."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_knowledge_base
+
+        monkeypatch.setattr(kb_agent, "CHUNK_SIZE", 300)
+        monkeypatch.setattr(kb_agent, "CHUNK_OVERLAP", 50)
+        mock_load_kb.return_value = {"https://www.infinitepay.io/maquininha": LONG_PAGE}
+        passage = chunk_knowledge_base(mock_load_kb.return_value, 300, 50)[3]["content"]
+
+        with patch.object(kb_agent, 'get_embedding',
+                          side_effect=lambda text, model=None: fake_embedding_backend.embed_batch([text])[0]):
+            result = kb_agent.query_knowledge_base(passage, top_k=2)
+
+        assert len(result) == 2
+        assert result[0]['content'] == passage
+        assert all(len(item['content']) <= 300 for item in result)
+        assert LONG_PAGE[result[0]['offset']:].startswith(result[0]['content'])
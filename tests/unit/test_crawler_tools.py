@@ -196,6 +196,25 @@ class TestGetPageText:
         # Quotes should be escaped
         assert '\\"' in result or "double quotes" in result
 
+    @patch('support_agent.sub_agents.crawler.agent.get_driver')
+    def test_get_page_text_read_twice(self, mock_get_driver):
+        """Test that the page can be read again until the next navigation."""
+        from support_agent.sub_agents.crawler.agent import get_page_text, go_to_url
+
+        mock_driver = MagicMock()
+        mock_driver.page_source = SIMPLE_HTML
+        mock_get_driver.return_value = mock_driver
+
+        go_to_url("https://example.com")
+        first = get_page_text()
+        mock_driver.page_source = EMPTY_HTML
+
+        assert get_page_text() == first
+        assert "Hello World" in first
+
+        go_to_url("https://example.com/empty")
+        assert "Hello World" not in get_page_text()
+
     @patch('support_agent.sub_agents.crawler.agent.get_driver')
     def test_get_page_text_empty_page(self, mock_get_driver):
         """Test handling of empty page."""
@@ -0,0 +1,142 @@
+"""
+Unit tests for duplicate page detection at ingest time.
+"""
+
+import numpy as np
+
+HOME = " ".join(f"Aceite pagamentos com a maquininha InfinitePay modelo {i} e receba na hora." for i in range(40))
+COBRANCA = " ".join(f"Gestão de cobrança automática para o cliente {i}, por Pix ou cartão." for i in range(40))
+PIX = " ".join(f"Pix parcelado em até 12x para o cliente número {i}, você recebe à vista." for i in range(40))
+
+
+class TestFindDuplicates:
+    """Tests for the find_duplicates function."""
+
+    def test_identical_pages_are_grouped(self):
+        """Test that the same body under two urls is detected."""
+        from support_agent.sub_agents.knowledgeable.dedup import find_duplicates
+
+        groups = find_duplicates({"https://a": HOME, "https://b": PIX, "https://a/rendimento": HOME})
+
+        assert groups == {"https://a": ["https://a/rendimento"]}
+
+    def test_whitespace_and_case_differences_are_exact_duplicates(self):
+        """Test that normalization ignores formatting noise."""
+        from support_agent.sub_agents.knowledgeable.dedup import find_duplicates
+
+        groups = find_duplicates({"https://a": PIX, "https://b": "  " + PIX.upper().replace(" ", "\n")}, threshold=1.0)
+
+        assert groups == {"https://a": ["https://b"]}
+
+    def test_near_duplicates_are_grouped(self):
+        """Test that pages differing in a few words are collapsed."""
+        from support_agent.sub_agents.knowledgeable.dedup import find_duplicates
+
+        page = " ".join(f"palavra{i}" for i in range(400))
+        edited = page.replace("palavra200 ", "alterada ")
+
+        assert find_duplicates({"https://a": page, "https://b": edited}) == {"https://a": ["https://b"]}
+
+    def test_canonical_page_does_not_depend_on_order(self):
+        """Test that a group keeps the shortest url matching its text whatever order pages come in."""
+        from support_agent.sub_agents.knowledgeable.dedup import find_duplicates
+
+        urls = ["https://x.io/gestao-de-cobranca-2", "https://x.io", "https://x.io/boleto", "https://x.io/gestao-de-cobranca"]
+
+        for order in (urls, urls[::-1]):
+            assert find_duplicates(dict.fromkeys(order, COBRANCA)) == {
+                "https://x.io/gestao-de-cobranca": [url for url in order if url != "https://x.io/gestao-de-cobranca"]
+            }
+
+    def test_homepage_body_stays_the_homepage(self):
+        """Test that a homepage crawled again under a product url keeps the root as canonical."""
+        from support_agent.sub_agents.knowledgeable.dedup import find_duplicates
+
+        assert find_duplicates({"https://x.io/rendimento": HOME, "https://x.io/": HOME}) == {
+            "https://x.io/": ["https://x.io/rendimento"]
+        }
+
+    def test_distinct_pages_are_kept(self):
+        """Test that unrelated pages are not grouped."""
+        from support_agent.sub_agents.knowledgeable.dedup import find_duplicates
+
+        assert find_duplicates({"https://a": HOME, "https://b": PIX}) == {}
+
+    def test_minhash_estimates_jaccard(self):
+        """Test that signature agreement tracks the true shingle overlap."""
+        from support_agent.sub_agents.knowledgeable.dedup import MinHasher, estimated_jaccard
+
+        a = {f"s{i}" for i in range(200)}
+        b = {f"s{i}" for i in range(100, 300)}
+        hasher = MinHasher(num_perm=256)
+
+        assert abs(estimated_jaccard(hasher.signature(a), hasher.signature(b)) - 1 / 3) < 0.1
+
+    def test_signatures_are_deterministic(self):
+        """Test that signatures do not depend on the process hash seed."""
+        from support_agent.sub_agents.knowledgeable.dedup import MinHasher, shingles
+
+        assert np.array_equal(MinHasher().signature(shingles(PIX)), MinHasher().signature(shingles(PIX)))
+
+
+class TestDeduplicatedIngest:
+    """Tests for deduplication in the knowledge base ingest path."""
+
+    def test_duplicates_are_embedded_once(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that a duplicate page costs no embeddings and its url becomes an alias."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        passages = kb_agent.compute_embeddings({"https://a": HOME, "https://b": PIX, "https://a/rendimento": HOME})
+
+        assert {passage['url'] for passage in passages} == {"https://a", "https://b"}
+        assert len(fake_embedding_backend.embedded_texts) == len(set(fake_embedding_backend.embedded_texts))
+        assert all(
+            passage.get('aliases') == ["https://a/rendimento"]
+            for passage in passages if passage['url'] == "https://a"
+        )
+
+    def test_results_do_not_repeat_duplicates(self, reset_knowledgeable_cache, monkeypatch):
+        """Test that duplicate pages no longer take several top-k slots."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+        kb_agent._knowledge_base_cache = {"https://a": HOME, "https://b": PIX, "https://a/rendimento": HOME}
+
+        result = kb_agent.query_knowledge_base("maquininha", top_k=2)
+
+        assert [item['url'] for item in result] == ["https://a", "https://a"]
+        assert result[0]['aliases'] == ["https://a/rendimento"]
+
+    def test_merged_pages_keep_their_product_filters(self, reset_knowledgeable_cache, monkeypatch):
+        """Test that a product filter still finds a page collapsed into another product's page."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+        kb_agent._knowledge_base_cache = {"https://a/pix": PIX, "https://a/boleto": HOME, "https://a/maquininha": HOME}
+
+        result = kb_agent.query_knowledge_base("maquininha", top_k=1, product="cobranca")
+
+        assert result[0]['url'] == "https://a/maquininha"
+        assert kb_agent.query_knowledge_base("maquininha", top_k=1, product="maquininha") == result
+
+    def test_dedup_can_be_disabled(self, reset_knowledgeable_cache, monkeypatch):
+        """Test that KB_DEDUP=0 indexes every page."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "DEDUP_ENABLED", 0)
+        passages = kb_agent.ingest_passages({"https://a": HOME, "https://a/rendimento": HOME})
+
+        assert {passage['url'] for passage in passages} == {"https://a", "https://a/rendimento"}
+
+    def test_mock_knowledge_base_duplicate_groups(self):
+        """Test the canonical pages of the crawled knowledge base's duplicate groups."""
+        from support_agent.sub_agents.knowledgeable.agent import _read_knowledge_base
+        from support_agent.sub_agents.knowledgeable.dedup import find_duplicates
+
+        groups = find_duplicates(_read_knowledge_base())
+
+        # /rendimento was crawled as a second copy of the homepage
+        assert groups["https://www.infinitepay.io"] == ["https://www.infinitepay.io/rendimento"]
+        assert sorted(groups["https://www.infinitepay.io/gestao-de-cobranca"]) == [
+            "https://www.infinitepay.io/boleto", "https://www.infinitepay.io/gestao-de-cobranca-2",
+        ]
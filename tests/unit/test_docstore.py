@@ -0,0 +1,186 @@
+"""
+Unit tests for the SQLite document store.
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+
+from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE
+
+LONG_TEXT = " ".join(f"Frase número {i} sobre a maquininha e o Pix." for i in range(60))
+
+
+@pytest.fixture
+def store(tmp_path):
+    from support_agent.sub_agents.knowledgeable.docstore import DocumentStore
+
+    store = DocumentStore(str(tmp_path / "kb.db"), chunk_size=300, overlap=50)
+    store.update(upserts={**MOCK_KNOWLEDGE_BASE, "https://www.infinitepay.io/maquininha": LONG_TEXT})
+    return store
+
+
+@pytest.fixture
+def kb_store(tmp_path, monkeypatch, reset_knowledgeable_cache, fake_embedding_backend):
+    """Point the knowledgeable agent at a document store converted from the mock knowledge base."""
+    from support_agent.sub_agents.knowledgeable import agent as kb_agent
+    from support_agent.sub_agents.knowledgeable.docstore import convert_json
+
+    source = tmp_path / "knowledge_base.json"
+    source.write_text(json.dumps(MOCK_KNOWLEDGE_BASE), encoding="utf-8")
+    path = str(tmp_path / "knowledge_base.db")
+    convert_json(str(source), path, kb_agent.CHUNK_SIZE, kb_agent.CHUNK_OVERLAP)
+    monkeypatch.setattr(kb_agent, "KNOWLEDGE_BASE_PATH", path)
+    monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+    return path
+
+
+class TestDocumentStore:
+    """Tests for the DocumentStore class."""
+
+    def test_mapping_of_pages(self, store):
+        """Test that the store reads like the {url: text} JSON knowledge base, in order."""
+        assert list(store) == [*MOCK_KNOWLEDGE_BASE, "https://www.infinitepay.io/maquininha"]
+        assert len(store) == 4
+        assert store["https://www.infinitepay.io/pricing"] == MOCK_KNOWLEDGE_BASE["https://www.infinitepay.io/pricing"]
+        assert "https://www.infinitepay.io/pix" not in store
+        assert dict(store.items())["https://www.infinitepay.io/maquininha"] == LONG_TEXT
+
+    def test_passages_match_chunking(self, store):
+        """Test that stored passages are the chunk_document() passages of each page."""
+        from support_agent.sub_agents.knowledgeable.chunking import chunk_document
+
+        passages = dict(store.passages_by_url())["https://www.infinitepay.io/maquininha"]
+        expected = chunk_document("https://www.infinitepay.io/maquininha", LONG_TEXT, 300, 50)
+
+        assert len(passages) > 1
+        assert [p['chunk_id'] for p in passages] == [p['chunk_id'] for p in expected]
+        assert [p['offset'] for p in passages] == [p['offset'] for p in expected]
+        assert [p['content'] for p in passages] == [p['content'] for p in expected]
+
+    def test_passage_text_is_loaded_lazily(self, store):
+        """Test that passages hold no text until their content is read."""
+        passage = next(store.passages_by_url())[1][0]
+
+        with patch.object(store, 'passage_text', wraps=store.passage_text) as read:
+            copy = passage.copy()
+            assert 'content' not in passage and passage.get('content') is None
+            assert read.call_count == 0
+            assert copy['content'] == MOCK_KNOWLEDGE_BASE[passage['url']]
+            assert read.call_count == 1
+
+    def test_update_reports_changes(self, store):
+        """Test that updates report what changed and bump the generation only then."""
+        generation = store.generation
+
+        added, updated, deleted = store.update(
+            upserts={"https://www.infinitepay.io/pix": "Pix grátis.", "https://www.infinitepay.io/pricing": "Novo."},
+            deletes=["https://www.infinitepay.io/support", "https://www.infinitepay.io/missing"],
+        )
+        unchanged = store.update(upserts={"https://www.infinitepay.io/pix": "Pix grátis."})
+
+        assert (added, updated, deleted) == (
+            ["https://www.infinitepay.io/pix"],
+            ["https://www.infinitepay.io/pricing"],
+            ["https://www.infinitepay.io/support"],
+        )
+        assert unchanged == ([], [], [])
+        assert store.generation == store.current_generation() == generation + 1
+        assert "https://www.infinitepay.io/support" not in dict(store.passages_by_url())
+
+    def test_rechunked_when_settings_change(self, store):
+        """Test that reopening with another chunk size splits the pages again."""
+        from support_agent.sub_agents.knowledgeable.docstore import DocumentStore
+
+        before = len(dict(store.passages_by_url())["https://www.infinitepay.io/maquininha"])
+        reopened = DocumentStore(store.path, chunk_size=1200, overlap=200)
+
+        assert len(dict(reopened.passages_by_url())["https://www.infinitepay.io/maquininha"]) < before
+        assert reopened.generation > store.generation
+
+    def test_convert_json(self, tmp_path):
+        """Test that a JSON knowledge base converts to a store with the same pages."""
+        from support_agent.sub_agents.knowledgeable.docstore import convert_json
+
+        source = tmp_path / "kb.json"
+        source.write_text(json.dumps(MOCK_KNOWLEDGE_BASE), encoding="utf-8")
+
+        store = convert_json(str(source), str(tmp_path / "kb.db"))
+
+        assert dict(store.items()) == MOCK_KNOWLEDGE_BASE
+
+
+class TestStoreBackedKnowledgeBase:
+    """Tests for serving the knowledgeable agent from a document store."""
+
+    @pytest.mark.parametrize("mode", ["lexical", "hybrid"])
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_same_results_as_json(self, mock_get_embedding, mode, kb_store, fake_embedding_backend, monkeypatch):
+        """Test that a converted store answers queries like the JSON file it came from."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", mode)
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch(["payment pricing"])[0]
+
+        from_store = kb_agent.query_knowledge_base("payment pricing", top_k=3)
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        kb_agent._knowledge_index = None
+        kb_agent._embeddings_cache = None
+        kb_agent._result_cache.clear()
+        from_json = kb_agent.query_knowledge_base("payment pricing", top_k=3)
+
+        assert from_store == from_json
+
+    def test_only_returned_passages_are_read(self, kb_store):
+        """Test that a query loads the text of its hits and nothing else."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        store = kb_agent.load_knowledge_base()
+        kb_agent.get_knowledge_index()
+
+        with patch.object(store, 'passage_text', wraps=store.passage_text) as read:
+            result = kb_agent.query_knowledge_base("payment", top_k=1)
+
+        assert len(result) == 1
+        assert read.call_count == 1
+
+    def test_update_writes_to_store(self, kb_store):
+        """Test that updates go into the store and are served by the next query."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+        from support_agent.sub_agents.knowledgeable.docstore import DocumentStore
+
+        url = "https://www.infinitepay.io/conta-pj"
+        report = kb_agent.update_knowledge_base(upserts={url: "Conta PJ gratuita com Pix ilimitado."})
+        result = kb_agent.query_knowledge_base("conta pj gratuita", top_k=1)
+
+        assert report["added"] == [url]
+        assert report["documents"] == 4
+        assert result[0]['url'] == url
+        assert url in DocumentStore(kb_store)
+
+    def test_sync_follows_generation(self, kb_store):
+        """Test that the watcher reloads only after another writer changed the store."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+        from support_agent.sub_agents.knowledgeable.docstore import DocumentStore
+
+        kb_agent.get_knowledge_index()
+        assert kb_agent.sync_knowledge_base() is None
+
+        DocumentStore(kb_store).update(deletes=["https://www.infinitepay.io/support"])
+        snapshot = kb_agent.sync_knowledge_base()
+
+        assert snapshot is not None
+        assert "https://www.infinitepay.io/support" not in {p['url'] for p in snapshot.passages}
+
+    def test_cli_convert(self, tmp_path, capsys):
+        """Test that the CLI converts a JSON knowledge base into a store."""
+        from support_agent.sub_agents.knowledgeable.cli import main
+        from support_agent.sub_agents.knowledgeable.docstore import DocumentStore
+
+        source = tmp_path / "kb.json"
+        source.write_text(json.dumps(MOCK_KNOWLEDGE_BASE), encoding="utf-8")
+
+        assert main(["convert", str(source), str(tmp_path / "kb.db")]) == 0
+
+        assert json.loads(capsys.readouterr().out)["documents"] == 3
+        assert list(DocumentStore(str(tmp_path / "kb.db"))) == list(MOCK_KNOWLEDGE_BASE)
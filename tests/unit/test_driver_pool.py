@@ -0,0 +1,276 @@
+"""
+Unit tests for the crawler's browser pool.
+"""
+
+import asyncio
+import os
+import threading
+import pytest
+from unittest.mock import MagicMock
+
+from tests.fixtures.mock_data import FakeClock, tool_context
+
+
+def make_pool(size=2, **kwargs):
+    from support_agent.sub_agents.crawler.pool import DriverPool
+
+    return DriverPool(MagicMock, size, **{"acquire_timeout": 0.2, **kwargs})
+
+
+class TestDriverPool:
+    """Tests for the DriverPool class."""
+
+    def test_lease_is_sticky_per_session(self):
+        """Test that a session gets the same browser until it releases it."""
+        pool = make_pool()
+
+        first = pool.acquire("a")
+
+        assert pool.acquire("a") is first
+        assert pool.acquire("b") is not first
+        assert pool.stats()["launches"] == 2
+
+    def test_released_browser_is_reset_and_reused(self):
+        """Test that a released browser is reset before the next session gets it."""
+        reset = MagicMock()
+        pool = make_pool(size=1, reset=reset)
+
+        driver = pool.acquire("a")
+        pool.release("a")
+
+        assert pool.acquire("b") is driver
+        reset.assert_called_once_with(driver)
+
+    def test_acquire_timeout(self):
+        """Test that a session waiting for a full pool fails after the timeout."""
+        from support_agent.sub_agents.crawler.pool import DriverPoolTimeout
+
+        pool = make_pool(size=1)
+        pool.acquire("a")
+
+        with pytest.raises(DriverPoolTimeout):
+            pool.acquire("b")
+        assert pool.stats()["timeouts"] == 1
+
+    def test_waiter_gets_released_browser(self):
+        """Test that a queued session is served as soon as a browser is released."""
+        pool = make_pool(size=1, acquire_timeout=5)
+        driver = pool.acquire("a")
+        result = {}
+
+        waiter = threading.Thread(target=lambda: result.setdefault("driver", pool.acquire("b")))
+        waiter.start()
+        while pool.stats()["waiting"] == 0:
+            pass
+        pool.release("a")
+        waiter.join(timeout=5)
+
+        assert result["driver"] is driver
+        assert pool.stats()["waits"] == 1
+
+    def test_stale_lease_is_reclaimed(self):
+        """Test that a browser left leased past the TTL is given to a waiting session."""
+        clock = FakeClock()
+        pool = make_pool(size=1, lease_ttl=60, clock=clock)
+        driver = pool.acquire("a")
+
+        clock.now = 61
+
+        assert pool.acquire("b") is driver
+        assert pool.stats()["reclaimed"] == 1
+        assert pool.stats()["leased"] == 1
+
+    def test_failed_reset_discards_browser(self):
+        """Test that a browser that cannot be reset is shut down, freeing its slot."""
+        pool = make_pool(size=1, reset=MagicMock(side_effect=RuntimeError("crashed")))
+        driver = pool.acquire("a")
+
+        pool.release("a")
+
+        driver.quit.assert_called_once()
+        assert pool.acquire("b") is not driver
+        assert pool.stats()["discarded"] == 1
+
+    def test_failed_launch_frees_slot(self):
+        """Test that a browser that fails to start does not use up the pool."""
+        from support_agent.sub_agents.crawler.pool import DriverPool
+
+        pool = DriverPool(MagicMock(side_effect=[RuntimeError("no chromium"), MagicMock()]), 1, acquire_timeout=0.2)
+
+        with pytest.raises(RuntimeError):
+            pool.acquire("a")
+        assert pool.acquire("a") is not None
+
+    def test_fill_and_close(self):
+        """Test that fill() pre-launches the pool and close() shuts every browser down."""
+        pool = make_pool(size=3)
+
+        assert pool.fill() == 3
+        leased = pool.acquire("a")
+        pool.close()
+
+        assert pool.stats()["launches"] == 3
+        leased.quit.assert_called_once()
+        assert pool.stats()["launched"] == 0
+
+
+class TestBrowserLifecycle:
+    """Tests for recycling and idle shutdown in the DriverPool class."""
+
+    def test_recycled_after_max_pages(self):
+        """Test that a browser is shut down instead of reused once it loaded max_pages pages."""
+        pool = make_pool(size=1, max_pages=2)
+        driver = pool.acquire("a")
+        pool.record_page("a")
+        pool.release("a")
+        assert pool.acquire("a") is driver
+
+        pool.record_page("a")
+        pool.release("a")
+
+        driver.quit.assert_called_once()
+        assert pool.acquire("b") is not driver
+        assert pool.stats()["recycled"] == 1
+
+    def test_recycled_above_memory_ceiling(self):
+        """Test that a browser using more than max_rss is recycled on release."""
+        pool = make_pool(size=1, max_rss=100, rss=lambda driver: 101)
+        driver = pool.acquire("a")
+
+        pool.release("a")
+
+        driver.quit.assert_called_once()
+        assert pool.stats()["recycled"] == 1
+
+    def test_idle_browsers_are_shut_down(self):
+        """Test that browsers unused for idle_timeout seconds are shut down."""
+        clock = FakeClock()
+        pool = make_pool(size=2, idle_timeout=300, clock=clock)
+        first, second = pool.acquire("a"), pool.acquire("b")
+        pool.release("a")
+        clock.now = 200
+        pool.release("b")
+
+        clock.now = 301
+        assert pool.reap_idle() == 1
+
+        first.quit.assert_called_once()
+        second.quit.assert_not_called()
+        assert pool.stats()["idle_shutdowns"] == 1
+        pool.close()
+
+    def test_close_stops_idle_check(self):
+        """Test that close() stops the background idle check."""
+        pool = make_pool(idle_timeout=300)
+        pool.acquire("a")
+        reaper = pool._reaper
+
+        pool.close()
+
+        assert reaper.is_alive() is False
+
+    def test_process_tree_rss(self):
+        """Test that the memory of the current process is measured."""
+        from support_agent.sub_agents.crawler.pool import process_tree_rss
+
+        if not os.path.exists("/proc/self/status"):
+            pytest.skip("needs /proc")
+        assert process_tree_rss(os.getpid()) > 0
+        assert process_tree_rss(2 ** 30) == 0
+
+
+class TestCrawlerSessions:
+    """Tests for browser leases in the crawler tools."""
+
+    @pytest.fixture
+    def pool(self, monkeypatch):
+        from support_agent.sub_agents.crawler import agent as crawler_agent
+
+        drivers = []
+
+        def create_driver():
+            driver = MagicMock()
+            driver.page_source = f"<html><body><p>browser {len(drivers)}</p></body></html>"
+            drivers.append(driver)
+            return driver
+
+        monkeypatch.setattr(crawler_agent, "ACTIVATE_WEB_DRIVER", 1)
+        monkeypatch.setattr(crawler_agent, "WEB_DRIVER_POOL_SIZE", 2)
+        monkeypatch.setattr(crawler_agent, "WEB_DRIVER_ACQUIRE_TIMEOUT", 1)
+        monkeypatch.setattr(crawler_agent, "create_driver", create_driver)
+        monkeypatch.setattr(crawler_agent, "_driver_pool", None)
+        yield crawler_agent.get_driver_pool()
+        monkeypatch.setattr(crawler_agent, "_driver_pool", None)
+
+    def test_sessions_use_separate_browsers(self, pool):
+        """Test that concurrent sessions never read each other's page."""
+        from support_agent.sub_agents.crawler.agent import get_page_text, go_to_url
+
+        go_to_url("https://example.com/a", tool_context("a"))
+        go_to_url("https://example.com/b", tool_context("b"))
+
+        assert get_page_text(tool_context("a")) == "browser 0"
+        assert get_page_text(tool_context("b")) == "browser 1"
+
+    def test_reading_the_page_releases_the_browser(self, pool):
+        """Test that get_page_text returns the browser to the pool."""
+        from support_agent.sub_agents.crawler.agent import get_page_text, go_to_url
+
+        go_to_url("https://example.com", tool_context("a"))
+        get_page_text(tool_context("a"))
+
+        assert pool.stats()["leased"] == 0
+        assert pool.stats()["idle"] == 1
+
+    async def test_async_tools_run_off_the_event_loop(self, pool):
+        """Test that crawls of different sessions run concurrently in threads."""
+        from support_agent.sub_agents.crawler.agent import get_page_text_async, go_to_url_async
+
+        await asyncio.gather(
+            go_to_url_async("https://example.com/a", tool_context("a")),
+            go_to_url_async("https://example.com/b", tool_context("b")),
+        )
+        texts = await asyncio.gather(get_page_text_async(tool_context("a")), get_page_text_async(tool_context("b")))
+
+        assert sorted(texts) == ["browser 0", "browser 1"]
+
+    def test_page_load_timeout_keeps_partial_page(self, pool):
+        """Test that a page that does not finish loading is stopped, not waited on."""
+        from selenium.common.exceptions import TimeoutException
+        from support_agent.sub_agents.crawler.agent import get_driver, go_to_url
+
+        get_driver("a").get.side_effect = TimeoutException()
+
+        result = go_to_url("https://example.com/slow", tool_context("a"))
+
+        assert "timed out" in result
+        get_driver("a").execute_script.assert_called_once_with("window.stop();")
+
+    def test_crashed_browser_is_discarded(self, pool):
+        """Test that a browser that errors is shut down instead of returned to the pool."""
+        from selenium.common.exceptions import WebDriverException
+        from support_agent.sub_agents.crawler.agent import get_driver, go_to_url
+
+        driver = get_driver("a")
+        driver.get.side_effect = WebDriverException("chrome not reachable")
+
+        with pytest.raises(WebDriverException):
+            go_to_url("https://example.com", tool_context("a"))
+
+        driver.quit.assert_called_once()
+        assert pool.stats()["leased"] == 0
+
+    def test_shutdown_removes_profiles(self, pool, tmp_path):
+        """Test that shutting the pool down quits browsers and deletes their profiles."""
+        from support_agent.sub_agents.crawler import agent as crawler_agent
+
+        driver = crawler_agent.get_driver("a")
+        profile = tmp_path / "profile"
+        profile.mkdir()
+        crawler_agent._profile_dirs[id(driver)] = str(profile)
+
+        crawler_agent.shutdown_driver_pool()
+
+        driver.quit.assert_called_once()
+        assert not profile.exists()
+        assert crawler_agent._driver_pool is None
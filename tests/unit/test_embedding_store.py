@@ -0,0 +1,98 @@
+"""
+Unit tests for the persistent knowledge base embedding store.
+"""
+
+import os
+import numpy as np
+
+from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE
+
+
+class TestEmbeddingStore:
+    """Tests for the EmbeddingStore class."""
+
+    def test_load_missing_directory_is_empty(self, tmp_path):
+        """Test that loading a store that was never written yields no vectors."""
+        from support_agent.sub_agents.knowledgeable.embedding_store import EmbeddingStore
+
+        store = EmbeddingStore(str(tmp_path), "models/test").load()
+
+        assert len(store) == 0
+        assert store.get("missing") is None
+
+    def test_save_and_reload_round_trip(self, tmp_path):
+        """Test that saved vectors are returned by a freshly loaded store."""
+        from support_agent.sub_agents.knowledgeable.embedding_store import EmbeddingStore, content_hash
+
+        text_hash = content_hash("hello")
+        EmbeddingStore(str(tmp_path), "models/test").save({text_hash: np.array([0.1, 0.2, 0.3])})
+
+        store = EmbeddingStore(str(tmp_path), "models/test").load()
+
+        assert text_hash in store
+        assert np.allclose(store.get(text_hash), [0.1, 0.2, 0.3])
+
+    def test_stores_are_namespaced_by_model(self, tmp_path):
+        """Test that vectors saved for one model are invisible to another."""
+        from support_agent.sub_agents.knowledgeable.embedding_store import EmbeddingStore, content_hash
+
+        text_hash = content_hash("hello")
+        EmbeddingStore(str(tmp_path), "models/a").save({text_hash: np.array([1.0, 0.0])})
+
+        store = EmbeddingStore(str(tmp_path), "models/b").load()
+
+        assert store.get(text_hash) is None
+
+    def test_save_removes_previous_matrix(self, tmp_path):
+        """Test that only the latest vector matrix is kept on disk."""
+        from support_agent.sub_agents.knowledgeable.embedding_store import EmbeddingStore
+
+        store = EmbeddingStore(str(tmp_path), "models/test")
+        store.save({"a": np.array([1.0, 0.0])})
+        store.save({"a": np.array([1.0, 0.0]), "b": np.array([0.0, 1.0])})
+
+        matrices = [name for name in os.listdir(store.directory) if name.endswith(".npy")]
+        assert len(matrices) == 1
+
+    def test_corrupt_manifest_is_ignored(self, tmp_path):
+        """Test that an unreadable manifest falls back to an empty store."""
+        from support_agent.sub_agents.knowledgeable.embedding_store import EmbeddingStore
+
+        store = EmbeddingStore(str(tmp_path), "models/test")
+        store.save({"a": np.array([1.0, 0.0])})
+        with open(os.path.join(store.directory, "manifest.json"), "w") as f:
+            f.write("{not json")
+
+        assert len(EmbeddingStore(str(tmp_path), "models/test").load()) == 0
+
+
+class TestComputeEmbeddingsPersistence:
+    """Tests for embedding reuse across process restarts."""
+
+    def test_restart_reuses_persisted_vectors(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that a cold start with unchanged documents makes no API calls."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        kb_agent.compute_embeddings(MOCK_KNOWLEDGE_BASE)
+
+        # Simulate a new process: in-memory cache gone, disk store kept
+        kb_agent._embeddings_cache = None
+        fake_embedding_backend.batches.clear()
+        result = kb_agent.compute_embeddings(MOCK_KNOWLEDGE_BASE)
+
+        assert fake_embedding_backend.embedded_texts == []
+        assert len(result) == len(MOCK_KNOWLEDGE_BASE)
+
+    def test_only_changed_documents_are_embedded(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that editing one document re-embeds only that document."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        kb_agent.compute_embeddings(MOCK_KNOWLEDGE_BASE)
+
+        changed = dict(MOCK_KNOWLEDGE_BASE)
+        changed["https://www.infinitepay.io/pricing"] = "New pricing page text."
+        kb_agent._embeddings_cache = None
+        fake_embedding_backend.batches.clear()
+        kb_agent.compute_embeddings(changed)
+
+        assert fake_embedding_backend.embedded_texts == ["New pricing page text."]
@@ -0,0 +1,243 @@
+"""
+Unit tests for batched knowledge base embedding generation.
+"""
+
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from unittest.mock import patch
+from google.api_core import exceptions as google_exceptions
+
+from tests.fixtures.mock_data import FakeEmbeddingBackend
+
+
+class TestEmbedTexts:
+    """Tests for the embed_texts function."""
+
+    def test_embed_texts_returns_rows_in_input_order(self):
+        """Test that rows line up with the input texts across batches."""
+        from support_agent.sub_agents.knowledgeable.embeddings import embed_texts
+
+        backend = FakeEmbeddingBackend()
+        texts = [f"text {i}" for i in range(10)]
+
+        result = embed_texts(texts, backend, batch_size=3, max_concurrency=4)
+
+        assert result.shape == (10, backend.dim)
+        for text, row in zip(texts, result):
+            assert np.allclose(row, backend.embed_batch([text])[0])
+
+    def test_embed_texts_respects_batch_size(self):
+        """Test that no request carries more than batch_size texts."""
+        from support_agent.sub_agents.knowledgeable.embeddings import embed_texts
+
+        backend = FakeEmbeddingBackend()
+
+        embed_texts([f"text {i}" for i in range(7)], backend, batch_size=3)
+
+        assert sorted(len(batch) for batch in backend.batches) == [1, 3, 3]
+
+    def test_embed_texts_bounds_concurrency(self):
+        """Test that at most max_concurrency batches are in flight at once."""
+        from support_agent.sub_agents.knowledgeable.embeddings import embed_texts
+
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+
+        class SlowBackend(FakeEmbeddingBackend):
+            def embed_batch(self, texts):
+                nonlocal in_flight, peak
+                with lock:
+                    in_flight += 1
+                    peak = max(peak, in_flight)
+                time.sleep(0.02)
+                with lock:
+                    in_flight -= 1
+                return super().embed_batch(texts)
+
+        embed_texts([f"text {i}" for i in range(12)], SlowBackend(), batch_size=1, max_concurrency=3)
+
+        assert 1 < peak <= 3
+
+    def test_embed_texts_empty_input(self):
+        """Test that no requests are made for an empty input."""
+        from support_agent.sub_agents.knowledgeable.embeddings import embed_texts
+
+        backend = FakeEmbeddingBackend()
+
+        result = embed_texts([], backend)
+
+        assert len(result) == 0
+        assert backend.batches == []
+
+    def test_embed_texts_retries_rate_limit_errors(self):
+        """Test that rate-limited batches are retried with growing backoff."""
+        from support_agent.sub_agents.knowledgeable.embeddings import embed_texts
+
+        backend = FakeEmbeddingBackend(failures=[
+            google_exceptions.ResourceExhausted("quota"),
+            google_exceptions.TooManyRequests("slow down"),
+        ])
+        delays = []
+
+        with patch('support_agent.sub_agents.knowledgeable.embeddings.random.uniform', return_value=1.0):
+            result = embed_texts(["a"], backend, initial_backoff=0.5, sleep=delays.append)
+
+        assert result.shape == (1, backend.dim)
+        assert delays == [0.5, 1.0]
+
+    def test_embed_texts_gives_up_after_max_retries(self):
+        """Test that persistent rate limiting is eventually raised."""
+        from support_agent.sub_agents.knowledgeable.embeddings import embed_texts
+
+        backend = FakeEmbeddingBackend(failures=[google_exceptions.ResourceExhausted("quota")] * 3)
+
+        with pytest.raises(google_exceptions.ResourceExhausted):
+            embed_texts(["a"], backend, max_retries=2, sleep=lambda _: None)
+
+    def test_embed_texts_does_not_retry_other_errors(self):
+        """Test that non rate-limit errors fail fast."""
+        from support_agent.sub_agents.knowledgeable.embeddings import embed_texts
+
+        backend = FakeEmbeddingBackend(failures=[ValueError("bad input")])
+        delays = []
+
+        with pytest.raises(ValueError):
+            embed_texts(["a"], backend, sleep=delays.append)
+
+        assert delays == []
+
+
+class TestGeminiEmbeddingBackend:
+    """Tests for the Gemini embedding backend."""
+
+    @patch('support_agent.sub_agents.knowledgeable.embeddings.genai')
+    def test_embed_batch_sends_all_texts_in_one_request(self, mock_genai):
+        """Test that a batch is a single embed_content call."""
+        from support_agent.sub_agents.knowledgeable.embeddings import GeminiEmbeddingBackend
+
+        mock_genai.embed_content.return_value = {'embedding': [[0.1, 0.2], [0.3, 0.4]]}
+        backend = GeminiEmbeddingBackend("models/text-embedding-004")
+
+        result = backend.embed_batch(["a", "b"])
+
+        mock_genai.embed_content.assert_called_once_with(
+            model="models/text-embedding-004",
+            content=["a", "b"],
+            task_type="retrieval_document"
+        )
+        assert result.shape == (2, 2)
+        assert result.dtype == np.float32
+
+
+class TestLocalEmbeddingBackend:
+    """Tests for the offline hashing embedder."""
+
+    def test_vectors_are_deterministic_unit_rows(self):
+        """Test that separate instances return identical normalized float32 rows."""
+        from support_agent.sub_agents.knowledgeable.embeddings import LocalEmbeddingBackend
+
+        texts = ["Maquininha com Pix", "Conta digital gratuita", ""]
+        first = LocalEmbeddingBackend(dim=64).embed_batch(texts)
+        second = LocalEmbeddingBackend(dim=64).embed_batch(texts)
+
+        assert first.shape == (3, 64) and first.dtype == np.float32
+        assert np.array_equal(first, second)
+        assert np.allclose(np.linalg.norm(first[:2], axis=1), 1.0)
+        assert not first[2].any()
+
+    def test_overlapping_texts_are_closer(self):
+        """Test that texts sharing words score higher than unrelated ones."""
+        from support_agent.sub_agents.knowledgeable.embeddings import LocalEmbeddingBackend
+
+        query, related, unrelated = LocalEmbeddingBackend().embed_batch([
+            "taxas da maquininha",
+            "Conheça as taxas da maquininha InfinitePay no débito e crédito",
+            "Empréstimo para sua empresa com parcelas fixas",
+        ])
+
+        assert query @ related > query @ unrelated
+
+    def test_accents_and_case_are_ignored(self):
+        """Test that the local embedder folds accents and case like BM25 does."""
+        from support_agent.sub_agents.knowledgeable.embeddings import LocalEmbeddingBackend
+
+        backend = LocalEmbeddingBackend()
+
+        assert np.allclose(backend.embed_query("Empréstimo PIX"), backend.embed_query("emprestimo pix"))
+
+    def test_namespaces_differ_by_provider_and_model(self):
+        """Test that vectors of different providers or sizes never share a namespace."""
+        from support_agent.sub_agents.knowledgeable.embeddings import (
+            GeminiEmbeddingBackend, LocalEmbeddingBackend, embedding_namespace,
+        )
+
+        namespaces = {
+            embedding_namespace(GeminiEmbeddingBackend("models/text-embedding-004")),
+            embedding_namespace(LocalEmbeddingBackend(dim=128)),
+            embedding_namespace(LocalEmbeddingBackend(dim=384)),
+        }
+
+        assert len(namespaces) == 3
+
+    def test_unknown_provider(self):
+        """Test that a misconfigured provider fails loudly."""
+        from support_agent.sub_agents.knowledgeable.embeddings import create_embedding_backend
+
+        with pytest.raises(ValueError, match="Unknown embedding provider"):
+            create_embedding_backend("openai", "text-embedding-3-small")
+
+
+class TestOfflineRetrieval:
+    """Tests for running the knowledge base with KB_EMBEDDING_PROVIDER=local."""
+
+    @patch('support_agent.sub_agents.knowledgeable.embeddings.genai')
+    @patch('support_agent.sub_agents.knowledgeable.agent.genai')
+    def test_vector_search_without_network(self, mock_agent_genai, mock_genai, reset_knowledgeable_cache, monkeypatch):
+        """Test that documents and queries are embedded locally and the Gemini API is never called."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+        from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE
+
+        monkeypatch.setattr(kb_agent, "EMBEDDING_PROVIDER", "local")
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "vector")
+        monkeypatch.setattr(kb_agent, "_embedding_backend", None)
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+
+        result = kb_agent.query_knowledge_base("transparent pricing monthly fees", top_k=1)
+
+        assert result[0]['url'] == "https://www.infinitepay.io/pricing"
+        assert kb_agent.get_knowledge_index().vector_index.dim == kb_agent.LOCAL_EMBEDDING_DIM
+        mock_genai.embed_content.assert_not_called()
+        mock_agent_genai.embed_content.assert_not_called()
+
+    async def test_async_query_embeds_locally(self, reset_knowledgeable_cache, monkeypatch):
+        """Test that the async tool does not wait on the Gemini client for a local backend."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+        from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE
+
+        monkeypatch.setattr(kb_agent, "EMBEDDING_PROVIDER", "local")
+        monkeypatch.setattr(kb_agent, "_embedding_backend", None)
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+
+        with patch.object(kb_agent, 'get_embedding_async', side_effect=AssertionError("network")):
+            result = await kb_agent.query_knowledge_base_async("support team chat email", top_k=1)
+
+        assert result[0]['url'] == "https://www.infinitepay.io/support"
+
+    def test_stores_are_namespaced(self, fake_embedding_backend, reset_knowledgeable_cache, monkeypatch):
+        """Test that switching provider never reuses the other provider's stored vectors."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+        from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE
+
+        kb_agent.compute_embeddings(MOCK_KNOWLEDGE_BASE)
+        monkeypatch.setattr(kb_agent, "EMBEDDING_PROVIDER", "local")
+        monkeypatch.setattr(kb_agent, "_embedding_backend", None)
+        kb_agent._embeddings_cache = None
+
+        passages = kb_agent.compute_embeddings(MOCK_KNOWLEDGE_BASE)
+
+        assert passages[0]['embedding'].shape == (kb_agent.LOCAL_EMBEDDING_DIM,)
+        assert len(os.listdir(kb_agent.EMBEDDINGS_DIR)) == 2
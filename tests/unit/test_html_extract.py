@@ -0,0 +1,129 @@
+"""
+Unit tests for the crawler's HTML to text extraction.
+"""
+
+import importlib.util
+import pytest
+
+from tests.fixtures.mock_data import COMPLEX_HTML, SIMPLE_HTML
+
+PARSERS = [
+    "html.parser",
+    pytest.param("lxml", marks=pytest.mark.skipif(importlib.util.find_spec("lxml") is None, reason="needs lxml")),
+]
+
+BOILERPLATE_PAGE = """
+<html>
+<head><title>Taxas da maquininha</title></head>
+<body>
+    <div class="top-links"><a href="/a">Conta</a> <a href="/b">Cartão</a> <a href="/c">Pix</a></div>
+    <div id="content">
+        <h1>Quanto custa vender</h1>
+        <p>O débito custa 0,75% por venda e o crédito à vista 2,69%.</p>
+        <p>Parcelado em até 12 vezes, com a taxa mostrada antes de cada venda.</p>
+        <p>O dinheiro cai na conta na hora, inclusive aos finais de semana.</p>
+    </div>
+    <div class="related-posts"><p>Leia também: como abrir sua conta digital em minutos</p></div>
+</body>
+</html>
+"""
+
+
+def bs4_text(html):
+    """The original extraction: BeautifulSoup tree, one find_all per unwanted tag, get_text."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in ["script", "style", "nav", "footer", "aside", "header", "path"]:
+        for element in soup.find_all(tag):
+            element.decompose()
+    return soup.get_text(separator=" ", strip=True)
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+class TestExtractText:
+    """Tests for the extract_text function."""
+
+    def test_same_text_as_beautifulsoup(self, parser):
+        """Test that the fixtures give the same text as the tree-based extraction."""
+        from support_agent.sub_agents.crawler.extract import extract_text
+
+        for html in (SIMPLE_HTML, COMPLEX_HTML, BOILERPLATE_PAGE):
+            assert extract_text(html, parser=parser) == bs4_text(html)
+
+    def test_unclosed_elements(self, parser):
+        """Test that unclosed paths and paragraphs do not hide the rest of the page."""
+        from support_agent.sub_agents.crawler.extract import extract_text
+
+        html = '<body><svg><path d="M0 0"></svg><p>one<p>two<nav>menu</nav><p>three</body>'
+
+        assert extract_text(html, parser=parser) == "one two three"
+
+    def test_text_split_across_feeds(self, parser, monkeypatch):
+        """Test that text spanning two parser feeds is not split into separate words."""
+        from support_agent.sub_agents.crawler import extract
+
+        monkeypatch.setattr(extract, "FEED_CHARS", 7)
+
+        assert extract.extract_text("<p>maquininha &amp; Pix</p>", parser=parser) == "maquininha & Pix"
+
+    def test_bounded_input_and_output(self, parser):
+        """Test that neither the page read nor the text returned goes past max_chars."""
+        from support_agent.sub_agents.crawler.extract import extract_text
+
+        html = "<p>" + "x" * 100 + "</p><p>after the limit</p>"
+
+        text = extract_text(html, max_chars=50, parser=parser)
+
+        assert len(text) <= 50
+        assert "after" not in text
+
+    def test_main_content(self, parser):
+        """Test that the main block is kept, with the title, without surrounding boilerplate."""
+        from support_agent.sub_agents.crawler.extract import extract_text
+
+        text = extract_text(BOILERPLATE_PAGE, parser=parser, main_content=True)
+
+        assert text.startswith("Taxas da maquininha Quanto custa vender O débito custa")
+        assert "finais de semana" in text
+        assert "Cartão" not in text
+        assert "Leia também" not in text
+
+    def test_no_main_content_keeps_whole_page(self, parser):
+        """Test that a page whose text is spread out is returned whole."""
+        from support_agent.sub_agents.crawler.extract import extract_text
+
+        html = "<body><div><p>Pix na hora</p></div><div><p>Conta sem tarifa</p></div></body>"
+
+        assert extract_text(html, parser=parser, main_content=True) == "Pix na hora Conta sem tarifa"
+
+
+class TestHtmlToText:
+    """Tests for the crawler's html_to_text settings."""
+
+    def test_default_keeps_text_outside_the_main_block(self):
+        """Test that by default no text is dropped for lying outside the main content."""
+        from support_agent.sub_agents.crawler.agent import html_to_text
+
+        html = (
+            "<body><article>" + "<p>A maquininha aceita Pix e cartões de todas as bandeiras.</p>" * 5
+            + "</article><section><p>Débito 0,75% por venda</p></section></body>"
+        )
+
+        assert "Débito 0,75%" in html_to_text(html)
+
+
+class TestResolveParser:
+    """Tests for the resolve_parser function."""
+
+    def test_backends(self, monkeypatch):
+        """Test that auto falls back to the standard library and unknown names fail."""
+        from support_agent.sub_agents.crawler import extract
+
+        monkeypatch.setattr(extract, "etree", None)
+
+        assert extract.resolve_parser("auto") == "html.parser"
+        with pytest.raises(ValueError):
+            extract.resolve_parser("lxml")
+        with pytest.raises(ValueError):
+            extract.resolve_parser("html5lib")
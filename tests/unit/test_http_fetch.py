@@ -0,0 +1,165 @@
+"""
+Unit tests for the crawler's HTTP fetch path, against a local HTTP server.
+"""
+
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler
+
+from tests.fixtures.mock_data import serve_http, tool_context
+
+ARTICLE = "<p>" + "A maquininha aceita Pix, débito e crédito com taxas baixas. " * 10 + "</p>"
+
+PAGES = {
+    "/article": (200, "text/html; charset=utf-8", f"<html><body><nav>Menu</nav>{ARTICLE}</body></html>"),
+    "/spa": (200, "text/html", '<html><body><div id="root"></div><script src="/app.js"></script></body></html>'),
+    "/short": (200, "text/html", "<html><body><p>Loading...</p></body></html>"),
+    "/missing": (404, "text/html", "<html><body>Not found</body></html>"),
+    "/file.pdf": (200, "application/pdf", "%PDF-1.4"),
+    "/no-charset": (200, "text/html", "<html><body><p>Empréstimo à vista</p></body></html>".encode("utf-8")),
+    "/meta-charset": (
+        200, "text/html",
+        '<html><head><meta charset="iso-8859-1"></head><body><p>Empréstimo à vista</p></body></html>'.encode("latin-1"),
+    ),
+}
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path in ("/stalled", "/truncated"):
+            # Promise a whole article, send part of it, then stall or hang up
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", "100000")
+            self.end_headers()
+            self.wfile.write(f"<html><body>{ARTICLE}".encode("utf-8"))
+            self.wfile.flush()
+            if self.path == "/stalled":
+                time.sleep(2)
+            return
+        status, content_type, body = PAGES.get(self.path, PAGES["/missing"])
+        data = body if isinstance(body, bytes) else body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """Serve PAGES from a local HTTP server; yields its base url."""
+    with serve_http(PageHandler) as url:
+        yield url
+
+
+class TestHttpFetchPath:
+    """Tests for go_to_url and get_page_text with the HTTP fast path."""
+
+    def test_server_rendered_page_skips_the_browser(self, crawler, http_server):
+        """Test that a page with enough text in its HTML is read without a browser."""
+        result = crawler.go_to_url(f"{http_server}/article")
+        text = crawler.get_page_text()
+
+        assert "fetched over HTTP" in result
+        assert "A maquininha aceita Pix" in text
+        assert "Menu" not in text
+        crawler.get_driver.assert_not_called()
+        assert crawler.get_fetch_stats()["paths"] == {"http": 1}
+
+    @pytest.mark.parametrize("path, reason", [
+        ("/spa", "javascript app"),
+        ("/short", "little text"),
+        ("/missing", "HTTP 404"),
+        ("/file.pdf", "not html"),
+    ])
+    def test_falls_back_to_the_browser(self, crawler, http_server, path, reason):
+        """Test that pages needing rendering are loaded in the browser, with the reason recorded."""
+        result = crawler.go_to_url(f"{http_server}{path}")
+        text = crawler.get_page_text()
+
+        assert "fetched over HTTP" not in result
+        assert text == "Rendered by the browser"
+        crawler.get_driver.return_value.get.assert_called_once_with(f"{http_server}{path}")
+        assert crawler.get_fetch_stats()["fallbacks"] == {reason: 1}
+
+    def test_connection_error_falls_back(self, crawler):
+        """Test that an unreachable server is left to the browser."""
+        crawler.go_to_url("http://127.0.0.1:9/closed")
+
+        assert crawler.get_fetch_stats()["fallbacks"] == {"fetch error": 1}
+
+    @pytest.mark.parametrize("path", ["/stalled", "/truncated"])
+    def test_incomplete_body_falls_back(self, crawler, http_server, path, monkeypatch):
+        """Test that a body that stalls or ends early is left to the browser instead of raising."""
+        from support_agent.sub_agents.crawler.fetch import HttpFetcher
+
+        monkeypatch.setattr(crawler, "_http_fetcher", HttpFetcher(timeout=0.5))
+
+        result = crawler.go_to_url(f"{http_server}{path}")
+
+        assert "fetched over HTTP" not in result
+        assert crawler.get_page_text() == "Rendered by the browser"
+        assert crawler.get_fetch_stats()["fallbacks"] == {"fetch error": 1}
+
+    def test_domain_rules(self, crawler, http_server, monkeypatch):
+        """Test that per-domain rules force or skip the browser."""
+        monkeypatch.setattr(crawler, "CRAWLER_HTTP_DOMAINS", ("127.0.0.1",))
+        assert "fetched over HTTP" in crawler.go_to_url(f"{http_server}/short")
+
+        monkeypatch.setattr(crawler, "CRAWLER_BROWSER_DOMAINS", ("127.0.0.1",))
+        assert "fetched over HTTP" not in crawler.go_to_url(f"{http_server}/article")
+        assert crawler.get_fetch_stats()["fallbacks"] == {"domain rule": 1}
+
+    def test_fetched_page_read_twice(self, crawler, http_server):
+        """Test that a page fetched over HTTP can be read more than once."""
+        crawler.go_to_url(f"{http_server}/article")
+
+        assert crawler.get_page_text() == crawler.get_page_text()
+        assert "A maquininha aceita Pix" in crawler.get_page_text()
+        crawler.get_driver.assert_not_called()
+
+    def test_fetched_pages_are_per_session(self, crawler, http_server):
+        """Test that a session reads its own fetched page, not another session's."""
+        crawler.go_to_url(f"{http_server}/article", tool_context("a"))
+
+        assert crawler.get_page_text(tool_context("b")) == "Rendered by the browser"
+        assert "A maquininha" in crawler.get_page_text(tool_context("a"))
+
+
+class TestHttpFetcher:
+    """Tests for the HttpFetcher class."""
+
+    @pytest.mark.parametrize("path", ["/no-charset", "/meta-charset"])
+    def test_encoding_without_header_charset(self, http_server, path):
+        """Test that a text/html response without a charset is not read as Latin-1."""
+        from support_agent.sub_agents.crawler.fetch import HttpFetcher
+
+        page = HttpFetcher().fetch(f"{http_server}{path}")
+
+        assert "Empréstimo à vista" in page.html
+
+
+class TestRenderingReason:
+    """Tests for the rendering_reason function."""
+
+    def test_reasons(self):
+        """Test that status, app markers and text length decide whether to render."""
+        from support_agent.sub_agents.crawler.fetch import FetchedPage, rendering_reason
+
+        text = "x" * 300
+        assert rendering_reason(FetchedPage("u", 200, "<p>ok</p>"), text, 200) is None
+        assert rendering_reason(FetchedPage("u", 500, ""), text, 200) == "HTTP 500"
+        assert rendering_reason(FetchedPage("u", 200, "Please enable JavaScript"), text, 200) == "javascript app"
+        assert rendering_reason(FetchedPage("u", 200, "<p>ok</p>"), "short", 200) == "little text"
+
+    def test_domain_matching(self):
+        """Test that domain rules cover subdomains but not lookalikes."""
+        from support_agent.sub_agents.crawler.fetch import matches_domain
+
+        assert matches_domain("https://www.infinitepay.io/pix", ("infinitepay.io",))
+        assert matches_domain("https://ajuda.infinitepay.io", ("infinitepay.io",))
+        assert not matches_domain("https://notinfinitepay.io", ("infinitepay.io",))
@@ -0,0 +1,157 @@
+"""
+Unit tests for single-flight index builds and atomic index swaps.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE
+
+
+class SlowBackend:
+    """Wraps an embedding backend, holding each batch long enough for callers to pile up."""
+
+    def __init__(self, backend, delay=0.1):
+        self.backend = backend
+        self.provider = backend.provider
+        self.model = backend.model
+        self.delay = delay
+
+    def embed_batch(self, texts):
+        time.sleep(self.delay)
+        return self.backend.embed_batch(texts)
+
+
+class TestSingleFlightBuild:
+    """Tests that concurrent cold-start queries build the index once."""
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_concurrent_threads_embed_corpus_once(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache, monkeypatch
+    ):
+        """Test that a burst of first queries from many threads embeds each passage once."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "_embedding_backend", SlowBackend(fake_embedding_backend))
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch(["pricing"])[0]
+        fake_embedding_backend.batches.clear()
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        version = kb_agent.get_cache_stats()["index_version"]
+
+        barrier = threading.Barrier(8)
+
+        def first_query(i):
+            barrier.wait()
+            return kb_agent.query_knowledge_base(f"question {i}")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(first_query, range(8)))
+
+        texts = fake_embedding_backend.embedded_texts
+        assert all(results)
+        assert len(texts) == len(set(texts))
+        assert kb_agent.get_cache_stats()["index_version"] == version + 1
+
+    async def test_concurrent_async_callers_share_one_build(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that concurrent async queries await the same index build."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        builds = []
+        original = kb_agent.build_knowledge_index
+
+        def counting_build(*args, **kwargs):
+            builds.append(threading.current_thread().name)
+            time.sleep(0.1)
+            return original(*args, **kwargs)
+
+        async def fake_async_embedding(text, model=None):
+            return fake_embedding_backend.embed_batch([text])[0]
+
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        with patch.object(kb_agent, 'build_knowledge_index', side_effect=counting_build), \
+                patch.object(kb_agent, 'get_embedding_async', side_effect=fake_async_embedding):
+            results = await asyncio.gather(*(
+                kb_agent.query_knowledge_base_async(f"question {i}") for i in range(10)
+            ))
+
+        assert len(builds) == 1
+        assert all(results)
+
+    def test_published_snapshot_is_reused(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that once built, the same snapshot object serves every query."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+
+        assert kb_agent.get_knowledge_index() is kb_agent.get_knowledge_index()
+
+
+class TestReloadKnowledgeBase:
+    """Tests for swapping in a new knowledge base version."""
+
+    def test_reload_swaps_in_new_version(self, fake_embedding_backend, reset_knowledgeable_cache, monkeypatch):
+        """Test that queries see the new pages after a reload."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        old = kb_agent.get_knowledge_index()
+
+        new = kb_agent.reload_knowledge_base({"https://www.infinitepay.io/pix": "Pix grátis e Pix parcelado."})
+        result = kb_agent.query_knowledge_base("pix parcelado", top_k=1)
+
+        assert new.version > old.version
+        assert kb_agent.get_knowledge_index() is new
+        assert result[0]['url'] == "https://www.infinitepay.io/pix"
+
+    def test_queries_keep_old_snapshot_during_reload(
+        self, fake_embedding_backend, reset_knowledgeable_cache, monkeypatch
+    ):
+        """Test that a reload in progress does not block queries on the current index."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        old = kb_agent.get_knowledge_index()
+
+        building = threading.Event()
+        release = threading.Event()
+        original = kb_agent.build_knowledge_index
+
+        def slow_build(*args, **kwargs):
+            building.set()
+            release.wait(5)
+            return original(*args, **kwargs)
+
+        with patch.object(kb_agent, 'build_knowledge_index', side_effect=slow_build):
+            reloader = threading.Thread(target=kb_agent.reload_knowledge_base, args=({"https://a": "novo"},))
+            reloader.start()
+            building.wait(5)
+            during = kb_agent.get_knowledge_index()
+            release.set()
+            reloader.join(5)
+
+        assert during is old
+        assert kb_agent.get_knowledge_index().version > old.version
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.compute_embeddings')
+    def test_embeddings_retried_after_fallback(self, mock_compute, reset_knowledgeable_cache, monkeypatch):
+        """Test that a lexical fallback snapshot is rebuilt once the retry interval passes."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "vector")
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        mock_compute.side_effect = ConnectionError("embedding API down")
+
+        fallback = kb_agent.get_knowledge_index()
+        assert fallback.vector_index is None
+        assert kb_agent.get_knowledge_index() is fallback
+
+        monkeypatch.setattr(kb_agent, "EMBEDDING_RETRY_INTERVAL", 0)
+        mock_compute.side_effect = ConnectionError("still down")
+        kb_agent.get_knowledge_index()
+
+        assert mock_compute.call_count == 2
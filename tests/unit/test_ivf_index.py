@@ -0,0 +1,165 @@
+"""
+Unit tests for the approximate (IVF) knowledge base index.
+"""
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+
+def clustered_vectors(n=4000, dim=32, n_clusters=40, seed=0):
+    """Synthetic embeddings grouped around random topics, like real passages."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim))
+    labels = rng.integers(n_clusters, size=n)
+    return (centers[labels] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def recall_at_k(approx_ids, exact_ids):
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approx_ids, exact_ids))
+    return hits / exact_ids.size
+
+
+class TestIVFIndex:
+    """Tests for the IVFIndex class."""
+
+    def test_recall_against_exact_search(self):
+        """Test that IVF recall@10 is close to exact search."""
+        from support_agent.sub_agents.knowledgeable.ivf_index import IVFIndex
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+        vectors = clustered_vectors()
+        queries = clustered_vectors(n=50, seed=1)
+
+        exact_ids, _ = VectorIndex(vectors).search_batch(queries, top_k=10)
+        approx_ids, _ = IVFIndex.build(vectors, nlist=64, nprobe=8).search_batch(queries, top_k=10)
+
+        assert recall_at_k(approx_ids, exact_ids) >= 0.9
+
+    def test_nprobe_trades_recall_for_work(self):
+        """Test that probing every list gives exact results."""
+        from support_agent.sub_agents.knowledgeable.ivf_index import IVFIndex
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+        vectors = clustered_vectors(n=1000)
+        queries = clustered_vectors(n=20, seed=2)
+        index = IVFIndex.build(vectors, nlist=32, nprobe=1)
+
+        exact_ids, exact_scores = VectorIndex(vectors).search_batch(queries, top_k=5)
+        all_ids, all_scores = index.search_batch(queries, top_k=5, nprobe=32)
+        one_ids, _ = index.search_batch(queries, top_k=5, nprobe=1)
+
+        assert recall_at_k(all_ids, exact_ids) == 1.0
+        assert np.allclose(all_scores, exact_scores, atol=1e-5)
+        assert recall_at_k(one_ids, exact_ids) <= 1.0
+
+    def test_incremental_add_is_searchable(self):
+        """Test that vectors inserted after training are found."""
+        from support_agent.sub_agents.knowledgeable.ivf_index import IVFIndex
+
+        vectors = clustered_vectors(n=500)
+        index = IVFIndex.build(vectors, nlist=16, nprobe=4)
+        new_vector = vectors[7] + 0.001
+
+        new_ids = index.add(new_vector[np.newaxis, :])
+        ids, scores = index.search(new_vector, top_k=2)
+
+        assert len(index) == 501
+        assert new_ids[0] == 500
+        assert 500 in ids
+
+    def test_add_trains_untrained_index(self):
+        """Test that adding to an empty index trains it first."""
+        from support_agent.sub_agents.knowledgeable.ivf_index import IVFIndex
+
+        index = IVFIndex(nlist=8)
+        index.add(clustered_vectors(n=100))
+
+        assert index.is_trained
+        assert len(index) == 100
+
+    def test_nlist_capped_by_corpus_size(self):
+        """Test that tiny corpora do not ask k-means for more lists than points."""
+        from support_agent.sub_agents.knowledgeable.ivf_index import IVFIndex
+
+        index = IVFIndex.build(np.eye(3), nlist=100)
+
+        assert index.nlist == 3
+        ids, _ = index.search(np.array([1.0, 0.0, 0.0]), top_k=1, nprobe=3)
+        assert ids[0] == 0
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        """Test that a reloaded index returns identical results."""
+        from support_agent.sub_agents.knowledgeable.ivf_index import IVFIndex
+
+        vectors = clustered_vectors(n=800)
+        queries = clustered_vectors(n=10, seed=3)
+        index = IVFIndex.build(vectors, nlist=20, nprobe=4)
+        path = str(tmp_path / "index.npz")
+
+        index.save(path)
+        loaded = IVFIndex.load(path)
+
+        assert len(loaded) == len(index)
+        assert loaded.nprobe == 4
+        original_ids, _ = index.search_batch(queries, top_k=5)
+        loaded_ids, _ = loaded.search_batch(queries, top_k=5)
+        assert np.array_equal(original_ids, loaded_ids)
+
+        loaded.add(vectors[:1])
+        assert len(loaded) == 801
+
+
+class TestIndexSelection:
+    """Tests for choosing the index type from configuration."""
+
+    def test_build_vector_index_exact(self, monkeypatch):
+        """Test that the exact index is used by default."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+        monkeypatch.setattr(kb_agent, "INDEX_TYPE", "exact")
+
+        assert isinstance(kb_agent.build_vector_index(np.eye(4)), VectorIndex)
+
+    def test_build_vector_index_ivf(self, monkeypatch):
+        """Test that KB_INDEX_TYPE=ivf selects the IVF index with configured nprobe."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+        from support_agent.sub_agents.knowledgeable.ivf_index import IVFIndex
+
+        monkeypatch.setattr(kb_agent, "INDEX_TYPE", "ivf")
+        monkeypatch.setattr(kb_agent, "IVF_NPROBE", 3)
+
+        index = kb_agent.build_vector_index(clustered_vectors(n=200))
+
+        assert isinstance(index, IVFIndex)
+        assert index.nprobe == 3
+
+    def test_build_vector_index_unknown_type(self, monkeypatch):
+        """Test that an unknown index type is rejected."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "INDEX_TYPE", "hnsw")
+
+        with pytest.raises(ValueError):
+            kb_agent.build_vector_index(np.eye(4))
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    @patch('support_agent.sub_agents.knowledgeable.agent.compute_embeddings')
+    @patch('support_agent.sub_agents.knowledgeable.agent.load_knowledge_base')
+    def test_query_knowledge_base_with_ivf(
+        self, mock_load_kb, mock_compute, mock_get_embedding, reset_knowledgeable_cache, monkeypatch
+    ):
+        """Test that query_knowledge_base works end to end over an IVF index."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "INDEX_TYPE", "ivf")
+        mock_compute.return_value = [
+            {"url": "url1", "embedding": np.array([1.0, 0.0]), "content": "best match"},
+            {"url": "url2", "embedding": np.array([0.0, 1.0]), "content": "worst match"},
+        ]
+        mock_get_embedding.return_value = np.array([1.0, 0.1])
+
+        result = kb_agent.query_knowledge_base("test query", top_k=1)
+
+        assert result[0]['url'] == "url1"
@@ -0,0 +1,201 @@
+"""
+Unit tests for incremental knowledge base updates.
+"""
+
+import json
+import os
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE
+
+NEW_URL = "https://www.infinitepay.io/conta-pj"
+NEW_TEXT = "Conta PJ gratuita com cartão de débito e Pix ilimitado."
+
+
+@pytest.fixture
+def kb_file(tmp_path, monkeypatch, reset_knowledgeable_cache, fake_embedding_backend):
+    """Point the knowledgeable agent at a writable copy of the mock knowledge base."""
+    from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+    path = tmp_path / "knowledge_base.json"
+    path.write_text(json.dumps(MOCK_KNOWLEDGE_BASE), encoding="utf-8")
+    monkeypatch.setattr(kb_agent, "KNOWLEDGE_BASE_PATH", str(path))
+    monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+    return path
+
+
+class TestUpdateKnowledgeBase:
+    """Tests for the update_knowledge_base function."""
+
+    def test_added_document_is_searchable(self, kb_file):
+        """Test that an upsert is written to the file and served by the next query."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        kb_agent.get_knowledge_index()
+        report = kb_agent.update_knowledge_base(upserts={NEW_URL: NEW_TEXT})
+        result = kb_agent.query_knowledge_base("conta pj gratuita", top_k=1)
+
+        assert report["added"] == [NEW_URL]
+        assert report["documents"] == 4
+        assert result[0]['url'] == NEW_URL
+        assert json.loads(kb_file.read_text(encoding="utf-8"))[NEW_URL] == NEW_TEXT
+
+    def test_deleted_document_is_gone(self, kb_file):
+        """Test that a deleted page no longer appears in results."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        url = "https://www.infinitepay.io/support"
+        report = kb_agent.update_knowledge_base(deletes=[url])
+        urls = {item['url'] for item in kb_agent.query_knowledge_base("support", top_k=5)}
+
+        assert report["deleted"] == [url]
+        assert url not in urls
+        assert url not in json.loads(kb_file.read_text(encoding="utf-8"))
+
+    def test_only_changed_documents_are_embedded(self, kb_file, fake_embedding_backend, monkeypatch):
+        """Test that unchanged pages are neither re-chunked nor re-embedded."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "hybrid")
+        kb_agent.get_knowledge_index()
+        fake_embedding_backend.batches.clear()
+
+        with patch.object(kb_agent, 'chunk_document', wraps=kb_agent.chunk_document) as chunked:
+            kb_agent.update_knowledge_base(upserts={
+                NEW_URL: NEW_TEXT,
+                "https://www.infinitepay.io/pricing": "Taxas a partir de 0,75% no débito.",
+            })
+
+        assert sorted(call.args[0] for call in chunked.call_args_list) == sorted([
+            "https://www.infinitepay.io/pricing", NEW_URL,
+        ])
+        assert sorted(fake_embedding_backend.embedded_texts) == sorted([
+            NEW_TEXT, "Taxas a partir de 0,75% no débito.",
+        ])
+
+    def test_unchanged_update_does_not_publish(self, kb_file):
+        """Test that re-sending identical content keeps the current version."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        version = kb_agent.get_knowledge_index().version
+        url, text = next(iter(MOCK_KNOWLEDGE_BASE.items()))
+        report = kb_agent.update_knowledge_base(upserts={url: text}, deletes=["https://unknown"])
+
+        assert report["version"] == version
+        assert report["updated"] == report["deleted"] == []
+
+    def test_sync_reloads_changed_file(self, kb_file):
+        """Test that sync_knowledge_base picks up edits made outside the API."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        kb_agent.get_knowledge_index()
+        assert kb_agent.sync_knowledge_base() is None
+
+        kb_file.write_text(json.dumps({**MOCK_KNOWLEDGE_BASE, NEW_URL: NEW_TEXT}), encoding="utf-8")
+        snapshot = kb_agent.sync_knowledge_base()
+
+        assert snapshot is kb_agent.get_knowledge_index()
+        assert any(passage['url'] == NEW_URL for passage in snapshot.passages)
+
+
+class TestFileWatcher:
+    """Tests for the FileWatcher class."""
+
+    def test_change_triggers_callback(self, tmp_path):
+        """Test that a modified file runs the callback once per change."""
+        from support_agent.sub_agents.knowledgeable.watcher import FileWatcher
+
+        path = tmp_path / "kb.json"
+        path.write_text("{}")
+        calls = []
+        watcher = FileWatcher(str(path), lambda: calls.append(1))
+
+        assert watcher.check() is False
+        path.write_text('{"a": "b"}')
+        os.utime(path, ns=(1, 1))
+
+        assert watcher.check() is True
+        assert watcher.check() is False
+        assert calls == [1]
+
+    def test_callback_errors_are_contained(self, tmp_path):
+        """Test that a failing reload does not stop the watcher."""
+        from support_agent.sub_agents.knowledgeable.watcher import FileWatcher
+
+        path = tmp_path / "kb.json"
+        path.write_text("{}")
+
+        def broken():
+            raise ValueError("bad json")
+
+        watcher = FileWatcher(str(path), broken)
+        path.write_text("{not json")
+
+        assert watcher.check() is True
+
+
+class TestKnowledgeBaseRoutes:
+    """Tests for the /api/v1/knowledge-base endpoints."""
+
+    def _client(self, monkeypatch, token="secret"):
+        from api.main import init_api
+        from api.routes import knowledge_base
+
+        monkeypatch.setattr(knowledge_base, "KB_ADMIN_TOKEN", token)
+        return TestClient(init_api())
+
+    def test_updates_disabled_without_token(self, kb_file, monkeypatch):
+        """Test that the endpoints refuse to work when no admin token is configured."""
+        client = self._client(monkeypatch, token="")
+
+        response = client.put("/api/v1/knowledge-base/documents", json={"url": NEW_URL, "content": NEW_TEXT})
+
+        assert response.status_code == 403
+
+    def test_wrong_token_is_rejected(self, kb_file, monkeypatch):
+        """Test that a bad X-Admin-Token is refused."""
+        client = self._client(monkeypatch)
+
+        response = client.put(
+            "/api/v1/knowledge-base/documents",
+            json={"url": NEW_URL, "content": NEW_TEXT},
+            headers={"X-Admin-Token": "guess"},
+        )
+
+        assert response.status_code == 401
+
+    def test_upsert_and_delete(self, kb_file, monkeypatch):
+        """Test adding then removing a document over HTTP."""
+        client = self._client(monkeypatch)
+        headers = {"X-Admin-Token": "secret"}
+
+        added = client.put("/api/v1/knowledge-base/documents", json={"url": NEW_URL, "content": NEW_TEXT}, headers=headers)
+        deleted = client.delete("/api/v1/knowledge-base/documents", params={"url": NEW_URL}, headers=headers)
+        missing = client.delete("/api/v1/knowledge-base/documents", params={"url": NEW_URL}, headers=headers)
+
+        assert added.json()["added"] == [NEW_URL]
+        assert deleted.json()["deleted"] == [NEW_URL]
+        assert missing.status_code == 404
+
+
+class TestCli:
+    """Tests for the knowledge base command line."""
+
+    def test_upsert_from_text(self, kb_file, capsys):
+        """Test that the CLI adds a document and prints the report."""
+        from support_agent.sub_agents.knowledgeable.cli import main
+
+        assert main(["upsert", NEW_URL, "--text", NEW_TEXT]) == 0
+
+        assert f'"added": [\n    "{NEW_URL}"' in capsys.readouterr().out
+        assert NEW_URL in json.loads(kb_file.read_text(encoding="utf-8"))
+
+    def test_delete_several(self, kb_file):
+        """Test that the CLI deletes every given URL."""
+        from support_agent.sub_agents.knowledgeable.cli import main
+
+        main(["delete", "https://www.infinitepay.io/support", "https://www.infinitepay.io/pricing"])
+
+        assert list(json.loads(kb_file.read_text(encoding="utf-8"))) == ["https://www.infinitepay.io/products"]
@@ -118,26 +118,19 @@ class TestGetEmbedding:
 class TestComputeEmbeddings:
     """Tests for the compute_embeddings function."""
 
-    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
-    def test_compute_embeddings_returns_list(self, mock_get_embedding, reset_knowledgeable_cache):
+    def test_compute_embeddings_returns_list(self, fake_embedding_backend, reset_knowledgeable_cache):
         """Test that embeddings are returned as list."""
         from support_agent.sub_agents.knowledgeable.agent import compute_embeddings
 
-        mock_get_embedding.return_value = np.array([0.1, 0.2, 0.3])
-
         result = compute_embeddings(MOCK_KNOWLEDGE_BASE)
 
         assert isinstance(result, list)
         assert len(result) == 3
 
-    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
-    def test_compute_embeddings_structure(self, mock_get_embedding, reset_knowledgeable_cache):
+    def test_compute_embeddings_structure(self, fake_embedding_backend, reset_knowledgeable_cache):
         """Test that each embedding entry has correct structure."""
         from support_agent.sub_agents.knowledgeable.agent import compute_embeddings
 
-        mock_embedding = np.array([0.1, 0.2, 0.3])
-        mock_get_embedding.return_value = mock_embedding
-
         result = compute_embeddings(MOCK_KNOWLEDGE_BASE)
 
         for entry in result:
@@ -148,32 +141,50 @@ class TestComputeEmbeddings:
             assert isinstance(entry['embedding'], np.ndarray)
             assert isinstance(entry['content'], str)
 
-    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
-    def test_compute_embeddings_caching(self, mock_get_embedding, reset_knowledgeable_cache):
+    def test_compute_embeddings_caching(self, fake_embedding_backend, reset_knowledgeable_cache):
         """Test that embeddings are cached."""
         from support_agent.sub_agents.knowledgeable.agent import compute_embeddings
 
-        mock_get_embedding.return_value = np.array([0.1, 0.2, 0.3])
-
         # First call
         result1 = compute_embeddings(MOCK_KNOWLEDGE_BASE)
         # Second call should use cache
         result2 = compute_embeddings(MOCK_KNOWLEDGE_BASE)
 
-        # get_embedding should only be called for first computation
-        assert mock_get_embedding.call_count == 3  # Once per KB entry
+        # The backend should only be called for the first computation
+        assert len(fake_embedding_backend.embedded_texts) == 3  # Once per KB entry
         assert result1 is result2
 
-    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
-    def test_compute_embeddings_calls_for_each_entry(self, mock_get_embedding, reset_knowledgeable_cache):
-        """Test that get_embedding is called for each KB entry."""
+    def test_compute_embeddings_calls_for_each_entry(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that every KB entry is sent to the embedding backend."""
         from support_agent.sub_agents.knowledgeable.agent import compute_embeddings
 
-        mock_get_embedding.return_value = np.array([0.1, 0.2, 0.3])
-
         compute_embeddings(MOCK_KNOWLEDGE_BASE)
 
-        assert mock_get_embedding.call_count == len(MOCK_KNOWLEDGE_BASE)
+        assert sorted(fake_embedding_backend.embedded_texts) == sorted(MOCK_KNOWLEDGE_BASE.values())
+
+    def test_compute_embeddings_batches_requests(
+        self, fake_embedding_backend, reset_knowledgeable_cache, monkeypatch
+    ):
+        """Test that documents are embedded in batches of the configured size."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "EMBEDDING_BATCH_SIZE", 2)
+
+        kb_agent.compute_embeddings(MOCK_KNOWLEDGE_BASE)
+
+        assert sorted(len(batch) for batch in fake_embedding_backend.batches) == [1, 2]
+
+    def test_compute_embeddings_preserves_order(self, fake_embedding_backend, reset_knowledgeable_cache, monkeypatch):
+        """Test that concurrent batches are matched back to the right documents."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "EMBEDDING_BATCH_SIZE", 1)
+
+        result = kb_agent.compute_embeddings(MOCK_KNOWLEDGE_BASE)
+
+        for entry in result:
+            expected = fake_embedding_backend.embed_batch([entry['content']])[0]
+            assert np.allclose(entry['embedding'], expected)
 
 
 class TestCosineSimilarity:
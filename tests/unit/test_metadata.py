@@ -0,0 +1,258 @@
+"""
+Unit tests for metadata-filtered retrieval.
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+FILTER_KB = {
+    "https://www.infinitepay.io": "InfinitePay: maquininha, conta digital, Pix e empréstimo em um só lugar.",
+    "https://www.infinitepay.io/maquininha": "Maquininha de cartão com taxas baixas e Pix na maquininha.",
+    "https://www.infinitepay.io/pix": "Pix grátis para receber pagamentos na hora.",
+    "https://www.infinitepay.io/pix-parcelado": "Pix parcelado em até 12x para o seu cliente.",
+    "https://www.infinitepay.io/emprestimo": "Empréstimo para empresas com pagamento pelas vendas.",
+    "https://www.infinitepay.io/en/pix": "Pix payments received instantly, free of charge.",
+}
+
+
+def random_vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+class TestPageMetadata:
+    """Tests for the page_metadata function."""
+
+    def test_product_from_url(self):
+        """Test that page slugs and their variants map to product areas."""
+        from support_agent.sub_agents.knowledgeable.metadata import page_metadata
+
+        assert page_metadata("https://www.infinitepay.io/maquininha-celular")["product"] == "maquininha"
+        assert page_metadata("https://www.infinitepay.io/pix-parcelado")["product"] == "pix"
+        assert page_metadata("https://www.infinitepay.io/conta-pj")["product"] == "conta-digital"
+        assert page_metadata("https://www.infinitepay.io")["product"] is None
+
+    def test_locale_from_url(self):
+        """Test that a leading locale segment is recognised and skipped."""
+        from support_agent.sub_agents.knowledgeable.metadata import page_metadata
+
+        assert page_metadata("https://www.infinitepay.io/en/pix") == {"product": "pix", "locale": "en"}
+        assert page_metadata("https://www.infinitepay.io/pix")["locale"] == "pt-br"
+
+
+class TestMetadataIndex:
+    """Tests for the MetadataIndex class."""
+
+    def _index(self):
+        from support_agent.sub_agents.knowledgeable.metadata import MetadataIndex, page_metadata
+
+        index = MetadataIndex()
+        for url in FILTER_KB:
+            # Two passages per page
+            index.add({"url": url, **page_metadata(url)})
+            index.add({"url": url, **page_metadata(url)})
+        return index
+
+    def test_no_filter_selects_everything(self):
+        """Test that select() without filters returns None."""
+        assert self._index().select() is None
+
+    def test_filters_are_intersected(self):
+        """Test that several filters only keep passages matching all of them."""
+        index = self._index()
+
+        assert index.select(product="pix").tolist() == [4, 5, 6, 7, 10, 11]
+        assert index.select(product="pix", locale="pt-BR").tolist() == [4, 5, 6, 7]
+
+    def test_url_prefix(self):
+        """Test that a url prefix selects every page under it, and only those."""
+        index = self._index()
+
+        assert index.select(url_prefix="https://www.infinitepay.io/pix").tolist() == [4, 5, 6, 7]
+        assert index.select(url_prefix="https://www.infinitepay.io/en/").tolist() == [10, 11]
+        assert index.select(url_prefix="https://other").tolist() == []
+
+    def test_values_are_normalized(self):
+        """Test that filter values are matched regardless of case, accents and spaces."""
+        index = self._index()
+
+        assert index.select(product="Empréstimo").tolist() == [8, 9]
+        assert index.values("product") == ["emprestimo", "maquininha", "pix"]
+
+
+class TestFilteredSearch:
+    """Tests for searching a subset of the indexed vectors."""
+
+    @pytest.mark.parametrize("index_type", ["exact", "quantized", "ivf"])
+    def test_only_selected_ids_are_returned(self, index_type):
+        """Test that every index returns the best matches within the selection."""
+        from support_agent.sub_agents.knowledgeable.ivf_index import IVFIndex
+        from support_agent.sub_agents.knowledgeable.quantized_index import QuantizedIndex
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex, normalize_rows
+
+        vectors = random_vectors(400)
+        query = random_vectors(1, seed=1)[0]
+        ids = np.arange(0, 400, 7)
+        index = {
+            "exact": lambda: VectorIndex(vectors),
+            "quantized": lambda: QuantizedIndex(vectors),
+            "ivf": lambda: IVFIndex.build(vectors, nlist=8, nprobe=8),
+        }[index_type]()
+
+        found, scores = index.search(query, 5, ids=ids)
+
+        expected = ids[np.argsort(-(normalize_rows(vectors[ids]) @ normalize_rows(query)[0]))[:5]]
+        assert found.tolist() == expected.tolist()
+        assert np.all(np.diff(scores) <= 1e-6)
+
+    def test_ivf_filter_larger_than_probed_lists(self):
+        """Test that a broad selection still restricts the probed candidates."""
+        from support_agent.sub_agents.knowledgeable.ivf_index import IVFIndex
+
+        vectors = random_vectors(400)
+        ids = np.arange(0, 400, 2)
+        index = IVFIndex.build(vectors, nlist=8, nprobe=2)
+
+        found, _ = index.search(random_vectors(1, seed=2)[0], 10, ids=ids)
+
+        assert len(found) == 10 and set(found.tolist()) <= set(ids.tolist())
+
+    def test_bm25_filter(self):
+        """Test that keyword search ranks only the selected documents."""
+        from support_agent.sub_agents.knowledgeable.bm25 import BM25Index
+
+        index = BM25Index()
+        for text in FILTER_KB.values():
+            index.add(text)
+
+        found, _ = index.search("pix", 5, ids=np.array([0, 4, 5]))
+
+        assert set(found.tolist()) == {0, 5}
+
+
+class TestFilteredQuery:
+    """Tests for filters on query_knowledge_base."""
+
+    @pytest.mark.parametrize("mode", ["vector", "lexical", "hybrid"])
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_results_match_filter(self, mock_get_embedding, mode, fake_embedding_backend, reset_knowledgeable_cache, monkeypatch):
+        """Test that every retrieval mode only returns passages of the requested product."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", mode)
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch(["pix"])[0]
+        kb_agent._knowledge_base_cache = FILTER_KB
+
+        result = kb_agent.query_knowledge_base("pix", top_k=5, product="pix", locale="pt-br")
+
+        assert {item['url'] for item in result} == {
+            "https://www.infinitepay.io/pix", "https://www.infinitepay.io/pix-parcelado",
+        }
+
+    def test_only_filtered_passages_are_scored(self, fake_embedding_backend, reset_knowledgeable_cache, monkeypatch):
+        """Test that the filter is applied before vector scoring, not after."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "vector")
+        kb_agent._knowledge_base_cache = FILTER_KB
+        index = kb_agent.get_knowledge_index().vector_index
+
+        with patch.object(kb_agent, 'get_query_embedding', return_value=np.ones(index.dim, dtype=np.float32)), \
+                patch.object(index, 'search', wraps=index.search) as search:
+            kb_agent.query_knowledge_base("empréstimo", top_k=5, product="emprestimo")
+
+        assert search.call_args.kwargs["ids"].tolist() == [
+            i for i, passage in enumerate(kb_agent.get_knowledge_index().passages)
+            if passage['product'] == "emprestimo"
+        ]
+
+    def test_filters_are_part_of_the_cache_key(self, reset_knowledgeable_cache, monkeypatch):
+        """Test that a filtered query is not answered from an unfiltered cached result."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+        kb_agent._knowledge_base_cache = FILTER_KB
+
+        everything = kb_agent.query_knowledge_base("pix", top_k=5)
+        english = kb_agent.query_knowledge_base("pix", top_k=5, locale="en")
+
+        assert len(everything) > 1
+        assert [item['url'] for item in english] == ["https://www.infinitepay.io/en/pix"]
+
+    def test_no_match_returns_empty(self, reset_knowledgeable_cache, monkeypatch):
+        """Test that a filter matching no passage returns no results."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+        kb_agent._knowledge_base_cache = FILTER_KB
+
+        assert kb_agent.query_knowledge_base("pix", url_prefix="https://www.infinitepay.io/blog") == []
+
+    def test_unknown_product_is_rejected(self, reset_knowledgeable_cache):
+        """Test that a misspelled product area raises instead of silently matching nothing."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        with pytest.raises(ValueError, match="Unknown product"):
+            kb_agent.query_knowledge_base("pix", product="cripto")
+
+    async def test_unknown_product_from_the_model_is_dropped(self, reset_knowledgeable_cache, monkeypatch):
+        """Test that the agent tool searches without a made-up product instead of raising."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+        kb_agent._knowledge_base_cache = FILTER_KB
+
+        results = await kb_agent.query_knowledge_base_async("pix", top_k=5, product="maquininha celular")
+
+        assert results == await kb_agent.query_knowledge_base_async("pix", top_k=5)
+        assert results
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_filters_on_shared_index(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache, tmp_path, monkeypatch
+    ):
+        """Test that metadata survives publishing to the shared index."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "SHARED_INDEX_DIR", str(tmp_path / "index"))
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "vector")
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch(["pix"])[0]
+        kb_agent._knowledge_base_cache = FILTER_KB
+
+        result = kb_agent.query_knowledge_base("pix", top_k=5, product="emprestimo")
+
+        assert isinstance(kb_agent.get_knowledge_index().source, str)
+        assert [item['url'] for item in result] == ["https://www.infinitepay.io/emprestimo"]
+
+
+class TestSearchRoute:
+    """Tests for GET /api/v1/knowledge-base/search."""
+
+    def test_filtered_search(self, reset_knowledgeable_cache, monkeypatch):
+        """Test that query parameters are passed through as filters."""
+        from api.main import init_api
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "lexical")
+        kb_agent._knowledge_base_cache = FILTER_KB
+        client = TestClient(init_api())
+
+        response = client.get("/api/v1/knowledge-base/search", params={"q": "pix", "product": "pix", "locale": "en"})
+        invalid = client.get("/api/v1/knowledge-base/search", params={"q": "pix", "product": "cripto"})
+
+        assert [item['url'] for item in response.json()["results"]] == ["https://www.infinitepay.io/en/pix"]
+        assert invalid.status_code == 400
+
+    def test_server_errors_are_not_client_errors(self, reset_knowledgeable_cache, monkeypatch):
+        """Test that a failing search is a 500, not a 400, even when it raises ValueError."""
+        from api.main import init_api
+        from api.routes import knowledge_base
+
+        async def failing_search(*args):
+            raise ValueError("query embedding has 768 dimensions, the index 8")
+
+        monkeypatch.setattr(knowledge_base, "search_knowledge_base_async", failing_search)
+        client = TestClient(init_api(), raise_server_exceptions=False)
+
+        assert client.get("/api/v1/knowledge-base/search", params={"q": "pix"}).status_code == 500
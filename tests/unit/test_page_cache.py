@@ -0,0 +1,217 @@
+"""
+Unit tests for the crawler's shared page cache.
+"""
+
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler
+from unittest.mock import MagicMock
+
+from tests.fixtures.mock_data import FakeClock, serve_http, tool_context
+
+ARTICLE = "<p>" + "O Pix cai na conta em segundos, todos os dias da semana. " * 10 + "</p>"
+
+
+def page(url, text="text", **kwargs):
+    from support_agent.sub_agents.crawler.page_cache import CachedPage
+
+    return CachedPage(url, text, "http", 0.0, **kwargs)
+
+
+class TestPageCache:
+    """Tests for the PageCache class."""
+
+    def test_normalize_url(self):
+        """Test that equivalent urls share a cache key."""
+        from support_agent.sub_agents.crawler.page_cache import normalize_url
+
+        assert normalize_url("HTTPS://Example.com:443/pix/?b=2&a=1#top") == "https://example.com/pix?a=1&b=2"
+        assert normalize_url("http://example.com") == "http://example.com/"
+        assert normalize_url("http://example.com:8080/a") == "http://example.com:8080/a"
+
+    def test_fresh_entry_is_served_without_loading(self):
+        """Test that a page is loaded once and then served until the TTL expires."""
+        from support_agent.sub_agents.crawler.page_cache import PageCache
+
+        clock = FakeClock()
+        cache = PageCache(ttl=60, clock=clock)
+        load = MagicMock(side_effect=lambda url, stale: page(url))
+
+        assert cache.get("https://example.com/a", load)[1] == "loaded"
+        assert cache.get("https://example.com/a/", load)[1] == "hit"
+        assert load.call_count == 1
+
+    def test_stale_entry_is_revalidated_or_refreshed(self):
+        """Test that a stale entry is passed to the loader, which may keep or replace it."""
+        from support_agent.sub_agents.crawler.page_cache import PageCache
+
+        clock = FakeClock()
+        cache = PageCache(ttl=60, clock=clock)
+        cache.get("https://example.com/a", lambda url, stale: page(url, etag='"v1"'))
+        clock.now += 61
+
+        kept, outcome = cache.get("https://example.com/a", lambda url, stale: stale)
+        assert outcome == "revalidated"
+        assert kept.fetched_at == clock.now
+        assert cache.get("https://example.com/a", MagicMock())[1] == "hit"
+
+        clock.now += 61
+        changed, outcome = cache.get("https://example.com/a", lambda url, stale: page(url, "new text"))
+        assert outcome == "refreshed"
+        assert changed.text == "new text"
+
+    def test_concurrent_requests_share_one_load(self):
+        """Test that sessions crawling the same page at once wait for a single load."""
+        from support_agent.sub_agents.crawler.page_cache import PageCache
+
+        cache = PageCache(ttl=60)
+        calls = []
+
+        def slow_load(url, stale):
+            calls.append(url)
+            time.sleep(0.2)
+            return page(url)
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get("https://example.com/a", slow_load)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert sorted(outcome for _, outcome in results) == ["coalesced"] * 3 + ["loaded"]
+        assert len({id(result) for result, _ in results}) == 1
+
+    def test_failed_load_is_not_cached(self):
+        """Test that a load error reaches the caller and the next request tries again."""
+        from support_agent.sub_agents.crawler.page_cache import PageCache
+
+        cache = PageCache(ttl=60)
+
+        with pytest.raises(RuntimeError):
+            cache.get("https://example.com/a", MagicMock(side_effect=RuntimeError("down")))
+        assert cache.get("https://example.com/a", lambda url, stale: page(url))[1] == "loaded"
+
+    def test_least_recently_used_page_is_evicted(self):
+        """Test that the cache keeps at most maxsize pages, dropping the least recently used."""
+        from support_agent.sub_agents.crawler.page_cache import PageCache
+
+        cache = PageCache(ttl=60, maxsize=2)
+        load = lambda url, stale: page(url)
+        cache.get("https://example.com/a", load)
+        cache.get("https://example.com/b", load)
+        cache.get("https://example.com/a", load)
+        cache.get("https://example.com/c", load)
+
+        assert cache.get("https://example.com/a", load)[1] == "hit"
+        assert cache.get("https://example.com/b", load)[1] == "loaded"
+        assert cache.stats()["evictions"] == 2
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    etag = '"v1"'
+    requests = []
+
+    def do_GET(self):
+        PageHandler.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == PageHandler.etag:
+            self.send_response(304)
+            self.send_header("ETag", PageHandler.etag)
+            self.end_headers()
+            return
+        data = f"<html><body>{ARTICLE}<p>{PageHandler.etag}</p></body></html>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", PageHandler.etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """Serve a page with an ETag from a local HTTP server; yields its url."""
+    PageHandler.etag = '"v1"'
+    PageHandler.requests = []
+    with serve_http(PageHandler) as url:
+        yield f"{url}/pix"
+
+
+@pytest.fixture
+def crawler(crawler, monkeypatch):
+    """The crawler agent module with the page cache enabled as well."""
+    from support_agent.sub_agents.crawler.page_cache import PageCache
+
+    monkeypatch.setattr(crawler, "CRAWLER_CACHE_TTL", 60)
+    monkeypatch.setattr(crawler, "_page_cache", PageCache(60, clock=FakeClock(now=1000.0)))
+    return crawler
+
+
+class TestCrawlerPageCache:
+    """Tests for go_to_url with the shared page cache."""
+
+    def test_sessions_share_a_cached_page(self, crawler, http_server):
+        """Test that a page crawled by one session is served to the next from the cache."""
+        assert "fetched over HTTP" in crawler.go_to_url(http_server, tool_context("a"))
+        assert "served from cache" in crawler.go_to_url(http_server, tool_context("b"))
+
+        assert "O Pix cai na conta" in crawler.get_page_text(tool_context("b"))
+        assert len(PageHandler.requests) == 1
+        assert crawler.get_fetch_stats()["paths"] == {"http": 1, "cache": 1}
+
+    def test_stale_page_is_revalidated_with_etag(self, crawler, http_server):
+        """Test that an expired page is checked with If-None-Match and kept on 304."""
+        crawler.go_to_url(http_server, tool_context("a"))
+        crawler._page_cache._clock.now += 61
+
+        result = crawler.go_to_url(http_server, tool_context("b"))
+
+        assert "unchanged on the server" in result
+        assert PageHandler.requests == [None, '"v1"']
+        assert '\\"v1\\"' in crawler.get_page_text(tool_context("b"))
+
+    def test_changed_page_is_refreshed(self, crawler, http_server):
+        """Test that an expired page that changed on the server is read again."""
+        crawler.go_to_url(http_server, tool_context("a"))
+        crawler._page_cache._clock.now += 61
+        PageHandler.etag = '"v2"'
+
+        crawler.go_to_url(http_server, tool_context("b"))
+
+        assert '\\"v2\\"' in crawler.get_page_text(tool_context("b"))
+        assert crawler.get_fetch_stats()["cache"]["refreshed"] == 1
+
+    def test_rendered_page_is_cached_and_browser_released(self, crawler, monkeypatch):
+        """Test that a page rendered in the browser is cached and the browser returned at once."""
+        release = MagicMock()
+        monkeypatch.setattr(crawler, "CRAWLER_HTTP_FETCH", 0)
+        monkeypatch.setattr(crawler, "release_driver", release)
+
+        assert "rendered in the browser" in crawler.go_to_url("https://example.com/app", tool_context("a"))
+        assert "served from cache" in crawler.go_to_url("https://example.com/app", tool_context("b"))
+
+        assert crawler.get_page_text(tool_context("b")) == "Rendered by the browser"
+        crawler.get_driver.return_value.get.assert_called_once_with("https://example.com/app")
+        release.assert_any_call("a")
+
+    def test_timed_out_page_load_is_reported(self, crawler, monkeypatch):
+        """Test that a page cut off by the load timeout says so, also when served from cache."""
+        from selenium.common.exceptions import TimeoutException
+
+        monkeypatch.setattr(crawler, "CRAWLER_HTTP_FETCH", 0)
+        crawler.get_driver.return_value.get.side_effect = TimeoutException()
+
+        loaded = crawler.go_to_url("https://example.com/slow", tool_context("a"))
+        cached = crawler.go_to_url("https://example.com/slow", tool_context("b"))
+
+        assert "rendered in the browser" in loaded and "timed out" in loaded
+        assert "served from cache" in cached and "timed out" in cached
+        assert crawler.get_page_text(tool_context("b")) == "Rendered by the browser"
@@ -0,0 +1,115 @@
+"""
+Unit tests for the quantized (float16 / int8) knowledge base index.
+"""
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from tests.unit.test_ivf_index import clustered_vectors, recall_at_k
+
+
+class TestQuantizedIndex:
+    """Tests for the QuantizedIndex class."""
+
+    @pytest.mark.parametrize("precision", ["float16", "int8"])
+    def test_recall_against_exact_search(self, precision):
+        """Test that compact vectors with re-ranking match exact search."""
+        from support_agent.sub_agents.knowledgeable.quantized_index import QuantizedIndex
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+        vectors = clustered_vectors(n=2000, dim=64)
+        queries = clustered_vectors(n=50, dim=64, seed=1)
+
+        exact_ids, _ = VectorIndex(vectors).search_batch(queries, top_k=10)
+        ids, _ = QuantizedIndex(vectors, precision=precision).search_batch(queries, top_k=10)
+
+        assert recall_at_k(ids, exact_ids) >= 0.95
+
+    def test_reranked_scores_are_exact(self):
+        """Test that returned scores are full-precision cosine similarities."""
+        from support_agent.sub_agents.knowledgeable.quantized_index import QuantizedIndex
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+        vectors = clustered_vectors(n=500, dim=32)
+        query = clustered_vectors(n=1, dim=32, seed=3)[0]
+
+        exact_ids, exact_scores = VectorIndex(vectors).search(query, top_k=5)
+        ids, scores = QuantizedIndex(vectors, precision="int8").search(query, top_k=5)
+
+        assert ids[0] == exact_ids[0]
+        assert np.allclose(scores[0], exact_scores[0], atol=1e-5)
+
+    def test_truncation_shrinks_storage(self):
+        """Test that int8 with truncated dimensions uses a fraction of float32 memory."""
+        from support_agent.sub_agents.knowledgeable.quantized_index import QuantizedIndex
+
+        vectors = clustered_vectors(n=1000, dim=64)
+        index = QuantizedIndex(vectors, precision="int8", dims=32)
+
+        assert index.codes.shape == (1000, 32)
+        assert index.nbytes < vectors.nbytes / 7
+        assert index.dim == 64
+
+    def test_exact_vectors_are_not_copied(self):
+        """Test that the re-rank reads the caller's float32 matrix in place."""
+        from support_agent.sub_agents.knowledgeable.quantized_index import QuantizedIndex
+
+        vectors = clustered_vectors(n=100, dim=16)
+
+        assert QuantizedIndex(vectors).exact is vectors
+
+    def test_without_rerank_returns_approximate_scores(self):
+        """Test that rerank_factor=0 skips the exact pass."""
+        from support_agent.sub_agents.knowledgeable.quantized_index import QuantizedIndex
+
+        vectors = clustered_vectors(n=300, dim=16)
+        ids, scores = QuantizedIndex(vectors, rerank_factor=0).search(vectors[7], top_k=3)
+
+        assert ids[0] == 7
+        assert len(ids) == 3
+
+    def test_unknown_precision_is_rejected(self):
+        """Test that an unsupported precision is reported."""
+        from support_agent.sub_agents.knowledgeable.quantized_index import QuantizedIndex
+
+        with pytest.raises(ValueError):
+            QuantizedIndex(np.eye(4), precision="int4")
+
+
+class TestQuantizedRetrieval:
+    """Tests for the quantized index behind query_knowledge_base."""
+
+    def test_passage_embeddings_share_one_matrix(self, fake_embedding_backend, reset_knowledgeable_cache):
+        """Test that the index is built over the passages' matrix without copying it."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+        from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE
+
+        kb_embeddings = kb_agent.compute_embeddings(MOCK_KNOWLEDGE_BASE)
+        matrix = kb_agent.embedding_matrix(kb_embeddings)
+
+        assert matrix.dtype == np.float32
+        assert all(np.shares_memory(item['embedding'], matrix) for item in kb_embeddings)
+        assert np.array_equal(matrix[1], kb_embeddings[1]['embedding'])
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    @patch('support_agent.sub_agents.knowledgeable.agent.compute_embeddings')
+    @patch('support_agent.sub_agents.knowledgeable.agent.load_knowledge_base')
+    def test_query_knowledge_base_with_quantized_index(
+        self, mock_load_kb, mock_compute, mock_get_embedding, reset_knowledgeable_cache, monkeypatch
+    ):
+        """Test that query_knowledge_base works end to end over a quantized index."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "INDEX_TYPE", "quantized")
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "vector")
+        mock_compute.return_value = [
+            {"url": "url1", "embedding": np.array([1.0, 0.0]), "content": "best match"},
+            {"url": "url2", "embedding": np.array([0.0, 1.0]), "content": "worst match"},
+        ]
+        mock_get_embedding.return_value = np.array([1.0, 0.1])
+
+        result = kb_agent.query_knowledge_base("test query", top_k=1)
+
+        assert result[0]['url'] == "url1"
+        assert np.isclose(result[0]['score'], 1.0 / np.sqrt(1.01))
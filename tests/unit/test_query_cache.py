@@ -0,0 +1,148 @@
+"""
+Unit tests for the retrieval caches of the knowledgeable agent.
+"""
+
+import numpy as np
+from unittest.mock import patch
+
+from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE, FakeClock
+
+
+class TestLRUCache:
+    """Tests for the LRUCache class."""
+
+    def test_get_returns_stored_value(self):
+        """Test a basic set/get round trip."""
+        from support_agent.sub_agents.knowledgeable.cache import LRUCache
+
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("missing") is None
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that reading an entry protects it from eviction."""
+        from support_agent.sub_agents.knowledgeable.cache import LRUCache
+
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_entries_expire_after_ttl(self):
+        """Test that entries older than the TTL are misses."""
+        from support_agent.sub_agents.knowledgeable.cache import LRUCache
+
+        clock = FakeClock()
+        cache = LRUCache(maxsize=10, ttl=60, clock=clock)
+        cache.set("a", 1)
+
+        clock.now = 59
+        assert cache.get("a") == 1
+        clock.now = 61
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_hit_and_miss_counters(self):
+        """Test that stats report hits, misses and hit rate."""
+        from support_agent.sub_agents.knowledgeable.cache import LRUCache
+
+        cache = LRUCache(maxsize=10)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert np.isclose(stats["hit_rate"], 2 / 3)
+        assert stats["size"] == 1
+
+    def test_zero_size_cache_stores_nothing(self):
+        """Test that maxsize=0 disables caching."""
+        from support_agent.sub_agents.knowledgeable.cache import LRUCache
+
+        cache = LRUCache(maxsize=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+
+
+class TestQueryCaching:
+    """Tests for query embedding and result caching in query_knowledge_base."""
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_repeated_query_skips_embedding_call(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache
+    ):
+        """Test that the same question asked twice embeds the query once."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch(["pricing"])[0]
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+
+        first = kb_agent.query_knowledge_base("Taxas da maquininha")
+        second = kb_agent.query_knowledge_base("  taxas   DA maquininha ")
+
+        assert mock_get_embedding.call_count == 1
+        assert first == second
+        assert kb_agent.get_cache_stats()["results"]["hits"] >= 1
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_cached_results_cannot_be_mutated_by_caller(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache
+    ):
+        """Test that callers get copies of the cached result dicts."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch(["pricing"])[0]
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+
+        first = kb_agent.query_knowledge_base("pix")
+        first[0]['content'] = "tampered"
+        second = kb_agent.query_knowledge_base("pix")
+
+        assert second[0]['content'] != "tampered"
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_different_top_k_is_a_separate_entry(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache
+    ):
+        """Test that top_k is part of the result cache key."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch(["pricing"])[0]
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+
+        assert len(kb_agent.query_knowledge_base("pix", top_k=1)) == 1
+        assert len(kb_agent.query_knowledge_base("pix", top_k=3)) == 3
+        # The query embedding itself is still shared
+        assert mock_get_embedding.call_count == 1
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_results_invalidated_when_knowledge_base_changes(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache
+    ):
+        """Test that a rebuilt index never serves results from the old one."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch(["pricing"])[0]
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        kb_agent.query_knowledge_base("pix", top_k=5)
+        version = kb_agent.get_cache_stats()["index_version"]
+
+        # Knowledge base reloaded with an extra page
+        kb_agent._knowledge_base_cache = {**MOCK_KNOWLEDGE_BASE, "https://www.infinitepay.io/pix": "Pix grátis."}
+        kb_agent._embeddings_cache = None
+        result = kb_agent.query_knowledge_base("pix", top_k=5)
+
+        assert kb_agent.get_cache_stats()["index_version"] > version
+        assert len(result) == 4
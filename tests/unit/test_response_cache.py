@@ -0,0 +1,252 @@
+"""
+Unit tests for the semantic response cache.
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from tests.fixtures.mock_data import FakeClock
+
+# Questions with hand-picked embeddings: the first two are paraphrases
+VECTORS = {
+    "Quais são as taxas do Pix?": [1.0, 0.0, 0.0],
+    "Qual a taxa para receber Pix?": [0.98, 0.2, 0.0],
+    "Como funciona o empréstimo?": [0.0, 1.0, 0.0],
+}
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, query):
+        self.calls.append(query)
+        return np.array(VECTORS.get(query, [0.0, 0.0, 1.0]), dtype=np.float32)
+
+
+def make_cache(**kwargs):
+    from api.response_cache import SemanticResponseCache
+
+    kwargs.setdefault("agents", ("knowledgeable_agent",))
+    return SemanticResponseCache(FakeEmbedder(), **{"threshold": 0.9, "maxsize": 8, "ttl": 60, **kwargs})
+
+
+class TestIsCacheable:
+    """Tests for the is_cacheable function."""
+
+    @pytest.mark.parametrize("query", [
+        "Quais são as taxas do Pix?",
+        "Como eu faço para pedir a maquininha?",
+        "How do I receive payments?",
+    ])
+    def test_general_questions(self, query):
+        """Test that general product questions may be cached."""
+        from api.response_cache import is_cacheable
+
+        assert is_cacheable(query)
+
+    @pytest.mark.parametrize("query", [
+        "Qual o status do meu pedido?",
+        "Minha maquininha não liga",
+        "Meu CNPJ é 12.345.678/0001-90",
+        "Mande para joao@example.com",
+        "E quanto custa isso?",
+        "E no crédito?",
+        "What about boleto payments?",
+        "sim",
+    ])
+    def test_personal_and_follow_up_questions(self, query):
+        """Test that personal, identifying and context-dependent questions are never cached."""
+        from api.response_cache import is_cacheable
+
+        assert not is_cacheable(query)
+
+
+class TestSemanticResponseCache:
+    """Tests for the SemanticResponseCache class."""
+
+    async def test_exact_hit_skips_embedding(self):
+        """Test that a repeated question is answered without embedding it again."""
+        cache = make_cache()
+        await cache.store("Quais são as taxas do Pix?", "v1", "Pix é grátis.", "knowledgeable_agent")
+        cache.embed.calls.clear()
+
+        hit = await cache.lookup("  quais são as TAXAS do pix? ", "v1")
+
+        assert hit.response == "Pix é grátis."
+        assert cache.embed.calls == []
+        assert cache.stats()["exact_hits"] == 1
+
+    async def test_similar_question_hits(self):
+        """Test that a paraphrase above the threshold reuses the answer."""
+        cache = make_cache()
+        await cache.store("Quais são as taxas do Pix?", "v1", "Pix é grátis.", "knowledgeable_agent")
+
+        hit = await cache.lookup("Qual a taxa para receber Pix?", "v1")
+        miss = await cache.lookup("Como funciona o empréstimo?", "v1")
+
+        assert hit.response == "Pix é grátis."
+        assert miss is None
+        assert cache.stats()["semantic_hits"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    async def test_scopes_are_separate(self):
+        """Test that answers are not shared across knowledge base versions."""
+        cache = make_cache()
+        await cache.store("Quais são as taxas do Pix?", "v1", "Pix é grátis.", "knowledgeable_agent")
+
+        assert await cache.lookup("Quais são as taxas do Pix?", "v2") is None
+
+    async def test_ttl(self):
+        """Test that entries expire after the TTL."""
+        clock = FakeClock()
+        cache = make_cache(clock=clock)
+        await cache.store("Quais são as taxas do Pix?", "v1", "Pix é grátis.", "knowledgeable_agent")
+
+        clock.now = 61
+        assert await cache.lookup("Quais são as taxas do Pix?", "v1") is None
+        assert cache.stats()["expirations"] == 1
+        assert len(cache) == 0
+
+    async def test_lru_eviction(self):
+        """Test that the least recently used answer is evicted when full."""
+        cache = make_cache(maxsize=2)
+        await cache.store("Quais são as taxas do Pix?", "v1", "a", "knowledgeable_agent")
+        await cache.store("Como funciona o empréstimo?", "v1", "b", "knowledgeable_agent")
+        await cache.lookup("Quais são as taxas do Pix?", "v1")
+        await cache.store("Como pedir a maquininha?", "v1", "c", "knowledgeable_agent")
+
+        assert await cache.lookup("Como funciona o empréstimo?", "v1") is None
+        assert (await cache.lookup("Quais são as taxas do Pix?", "v1")).response == "a"
+        assert cache.stats()["evictions"] == 1
+
+    async def test_uncacheable_answers_are_not_stored(self):
+        """Test that personal questions and live-data agents are not cached."""
+        cache = make_cache()
+
+        assert not await cache.store("Qual o status do meu pedido?", "v1", "x", "knowledgeable_agent")
+        assert not await cache.store("Quais são as taxas do Pix?", "v1", "x", "web_searcher_agent")
+        assert await cache.lookup("Qual o status do meu pedido?", "v1") is None
+        assert cache.stats()["bypassed"] == 1
+        assert len(cache) == 0
+
+    async def test_embedding_errors_are_misses(self):
+        """Test that a failing embedding call falls through to the agent."""
+        cache = make_cache()
+        await cache.store("Quais são as taxas do Pix?", "v1", "a", "knowledgeable_agent")
+        cache.embed = AsyncMock(side_effect=TimeoutError())
+
+        assert await cache.lookup("Qual a taxa para receber Pix?", "v1") is None
+        assert cache.stats()["errors"] == 1
+
+
+class FakeRunner:
+    """Runner stand-in that answers every question with one final event, recorded in the session."""
+
+    app_name = "support_agent"
+    agent = SimpleNamespace(name="coordinator_agent")
+
+    def __init__(self, session_service):
+        self.session_service = session_service
+        self.calls = 0
+
+    async def run_async(self, user_id, session_id, new_message):
+        from google.adk.events import Event
+        from google.genai import types
+
+        self.calls += 1
+        session = await self.session_service.get_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id
+        )
+        answer = Event(
+            author="knowledgeable_agent",
+            content=types.Content(role="model", parts=[types.Part(text=f"answer {self.calls}")]),
+        )
+        await self.session_service.append_event(session, Event(author="user", content=new_message))
+        await self.session_service.append_event(session, answer)
+        yield answer
+
+
+class TestAgentWebhookCache:
+    """Tests for the response cache on POST /api/v1/agent-webhook."""
+
+    def _client(self, response_cache):
+        from api.main import init_api
+        from google.adk.sessions import InMemorySessionService
+
+        app = init_api()
+        app.state.session_service = InMemorySessionService()
+        app.state.runner = FakeRunner(app.state.session_service)
+        app.state.response_cache = response_cache
+        return TestClient(app), app.state.runner
+
+    def test_repeated_question_skips_the_runner(self):
+        """Test that the second identical question is served from the cache."""
+        client, runner = self._client(make_cache())
+        body = {"query": "Quais são as taxas do Pix?", "user_id": "u1"}
+
+        first = client.post("/api/v1/agent-webhook", json=body)
+        second = client.post("/api/v1/agent-webhook", json={**body, "user_id": "u2"})
+        stats = client.get("/api/v1/response-cache/stats").json()
+
+        assert first.headers["X-Response-Cache"] == "miss"
+        assert second.headers["X-Response-Cache"] == "hit"
+        assert second.json() == first.json() == {"response": "answer 1"}
+        assert runner.calls == 1
+        assert stats["enabled"] is True and stats["hits"] == 1
+        assert stats["avg_hit_ms"] < 10
+
+    def test_repeated_questions_from_the_same_user(self):
+        """Test that standalone questions are served from the cache on any turn of a conversation."""
+        client, runner = self._client(make_cache())
+        pix = {"query": "Quais são as taxas do Pix?"}
+
+        client.post("/api/v1/agent-webhook", json=pix)
+        client.post("/api/v1/agent-webhook", json={"query": "Como funciona o empréstimo?"})
+        repeated = client.post("/api/v1/agent-webhook", json=pix)
+
+        assert repeated.headers["X-Response-Cache"] == "hit"
+        assert repeated.json() == {"response": "answer 1"}
+        assert runner.calls == 2
+
+    def test_follow_up_turn_is_not_served_from_the_cache(self):
+        """Test that a question that depends on the previous turn always runs the agent."""
+        client, runner = self._client(make_cache())
+
+        client.post("/api/v1/agent-webhook", json={"query": "Quais são as taxas do Pix?"})
+        follow_up = client.post("/api/v1/agent-webhook", json={"query": "E no crédito?"})
+
+        assert "X-Response-Cache" not in follow_up.headers
+        assert follow_up.json() == {"response": "answer 2"}
+        assert runner.calls == 2
+
+    async def test_cache_hit_is_recorded_in_the_session(self):
+        """Test that a question answered from the cache keeps the session history complete."""
+        client, runner = self._client(make_cache())
+        body = {"query": "Quais são as taxas do Pix?"}
+
+        client.post("/api/v1/agent-webhook", json={**body, "user_id": "u1"})
+        client.post("/api/v1/agent-webhook", json={**body, "user_id": "u2"})
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name, user_id="u2", session_id="session_u2"
+        )
+
+        assert [(event.author, event.content.parts[0].text) for event in session.events] == [
+            ("user", "Quais são as taxas do Pix?"),
+            ("knowledgeable_agent", "answer 1"),
+        ]
+
+    def test_disabled_by_default(self):
+        """Test that without a cache every question reaches the runner."""
+        client, runner = self._client(None)
+        body = {"query": "Quais são as taxas do Pix?"}
+
+        client.post("/api/v1/agent-webhook", json=body)
+        response = client.post("/api/v1/agent-webhook", json=body)
+
+        assert "X-Response-Cache" not in response.headers
+        assert runner.calls == 2
+        assert client.get("/api/v1/response-cache/stats").json() == {"enabled": False}
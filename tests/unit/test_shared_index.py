@@ -0,0 +1,233 @@
+"""
+Unit tests for the memory-mapped index shared between worker processes.
+"""
+
+import os
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from tests.fixtures.mock_data import MOCK_KNOWLEDGE_BASE, FakeClock
+
+
+def unit_rows(n, dim=4, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+PASSAGES = [
+    {"chunk_id": "https://a#0", "url": "https://a", "offset": 0, "content": "Maquininha Smart"},
+    {"chunk_id": "https://b#0", "url": "https://b", "offset": 0, "content": "Pix parcelado em até 12x"},
+    {"chunk_id": "https://b#1", "url": "https://b", "offset": 40, "content": ""},
+]
+
+
+class TestSharedIndex:
+    """Tests for the SharedIndex class."""
+
+    def test_publish_and_open_round_trip(self, tmp_path):
+        """Test that passages and vectors come back memory-mapped."""
+        from support_agent.sub_agents.knowledgeable.shared_index import SharedIndex
+
+        index = SharedIndex(str(tmp_path), "models/test")
+        version = index.publish(PASSAGES, unit_rows(3))
+        passages, vectors = index.open(version)
+
+        assert isinstance(vectors, np.memmap)
+        assert len(passages) == 3
+        assert passages[1] == PASSAGES[1]
+        assert passages[-1]['content'] == ""
+        assert np.allclose(vectors, unit_rows(3))
+
+    def test_index_out_of_range(self, tmp_path):
+        """Test that MappedPassages behaves like a list at its bounds."""
+        from support_agent.sub_agents.knowledgeable.shared_index import SharedIndex
+
+        index = SharedIndex(str(tmp_path), "models/test")
+        passages, _ = index.open(index.publish(PASSAGES, unit_rows(3)))
+
+        with pytest.raises(IndexError):
+            passages[3]
+        assert [p['url'] for p in passages] == ["https://a", "https://b", "https://b"]
+
+    def test_current_is_rechecked_after_interval(self, tmp_path):
+        """Test that a version published by another process is seen after the check interval."""
+        from support_agent.sub_agents.knowledgeable.shared_index import SharedIndex
+
+        clock = FakeClock()
+        reader = SharedIndex(str(tmp_path), "models/test", check_interval=2.0, clock=clock)
+        writer = SharedIndex(str(tmp_path), "models/test")
+        first = writer.publish(PASSAGES, unit_rows(3))
+        assert reader.current() == first
+
+        second = writer.publish(PASSAGES[:1], unit_rows(1))
+        clock.now = 1.0
+        assert reader.current() == first
+        clock.now = 2.5
+        assert reader.current() == second
+
+    def test_old_versions_are_removed(self, tmp_path):
+        """Test that only the current version and its predecessor are kept."""
+        from support_agent.sub_agents.knowledgeable.shared_index import SharedIndex
+
+        index = SharedIndex(str(tmp_path), "models/test")
+        versions = [index.publish(PASSAGES, unit_rows(3, seed=i)) for i in range(4)]
+
+        kept = sorted(name for name in os.listdir(index.directory) if name.startswith("v"))
+        assert kept == versions[-2:]
+
+    def test_models_do_not_share_a_directory(self, tmp_path):
+        """Test that each embedding model has its own versions."""
+        from support_agent.sub_agents.knowledgeable.shared_index import SharedIndex
+
+        SharedIndex(str(tmp_path), "models/a").publish(PASSAGES, unit_rows(3))
+
+        assert SharedIndex(str(tmp_path), "models/b").current() is None
+
+
+class TestSharedRetrieval:
+    """Tests for query_knowledge_base over a shared index."""
+
+    def _new_worker(self, kb_agent):
+        """Forget everything held in memory, as a freshly started worker would."""
+        kb_agent._knowledge_index = None
+        kb_agent._shared_index = None
+        kb_agent._embeddings_cache = None
+        kb_agent._knowledge_base_cache = None
+        kb_agent._knowledge_base_fingerprint = None
+        kb_agent._fingerprint_check = (None, float("-inf"))
+        kb_agent._source_check = (None, float("-inf"))
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_second_worker_maps_published_index(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache, tmp_path, monkeypatch
+    ):
+        """Test that a new worker answers from the files without loading or embedding the corpus."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "SHARED_INDEX_DIR", str(tmp_path / "index"))
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "vector")
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch(["pricing"])[0]
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        first = kb_agent.query_knowledge_base("pix", top_k=3)
+
+        self._new_worker(kb_agent)
+        fake_embedding_backend.batches.clear()
+        with patch.object(kb_agent, 'load_knowledge_base', side_effect=AssertionError("JSON loaded")):
+            second = kb_agent.query_knowledge_base("pix", top_k=3)
+
+        assert second == first
+        assert fake_embedding_backend.batches == []
+        assert isinstance(kb_agent.get_knowledge_index().vector_index.matrix, np.memmap)
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_new_version_is_picked_up_without_restart(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache, tmp_path, monkeypatch
+    ):
+        """Test that a version published by another process replaces the served one."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+        from support_agent.sub_agents.knowledgeable.embeddings import embedding_namespace
+        from support_agent.sub_agents.knowledgeable.shared_index import SharedIndex
+
+        monkeypatch.setattr(kb_agent, "SHARED_INDEX_DIR", str(tmp_path / "index"))
+        monkeypatch.setattr(kb_agent, "SHARED_INDEX_CHECK_INTERVAL", 0)
+        mock_get_embedding.return_value = unit_rows(1, dim=fake_embedding_backend.dim)[0]
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        kb_agent.query_knowledge_base("pix")
+        old_version = kb_agent.get_knowledge_index().version
+
+        other_process = SharedIndex(str(tmp_path / "index"), embedding_namespace(fake_embedding_backend))
+        other_process.publish(
+            [{"chunk_id": "https://new#0", "url": "https://new", "offset": 0, "content": "Conta digital nova"}],
+            unit_rows(1, dim=fake_embedding_backend.dim),
+            source=kb_agent.knowledge_base_fingerprint(),
+        )
+        result = kb_agent.query_knowledge_base("conta digital", top_k=1)
+
+        assert result[0]['url'] == "https://new"
+        assert kb_agent.get_knowledge_index().version > old_version
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_version_from_an_older_knowledge_base_is_rebuilt(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache, tmp_path, monkeypatch
+    ):
+        """Test that a worker started after KB_PATH changed publishes a new version instead of the old one."""
+        import json
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        kb_path = tmp_path / "kb.json"
+        kb_path.write_text(json.dumps(MOCK_KNOWLEDGE_BASE), encoding="utf-8")
+        monkeypatch.setattr(kb_agent, "KNOWLEDGE_BASE_PATH", str(kb_path))
+        monkeypatch.setattr(kb_agent, "SHARED_INDEX_DIR", str(tmp_path / "index"))
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "vector")
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch(["Empréstimo consignado para lojistas"])[0]
+        kb_agent.query_knowledge_base("pix")
+        old_version = kb_agent.get_shared_index().current()
+
+        kb_path.write_text(
+            json.dumps({**MOCK_KNOWLEDGE_BASE, "https://new": "Empréstimo consignado para lojistas"}),
+            encoding="utf-8",
+        )
+        self._new_worker(kb_agent)
+        result = kb_agent.query_knowledge_base("consignado", top_k=1)
+
+        assert result[0]['url'] == "https://new"
+        assert kb_agent.get_shared_index().current(refresh=True) != old_version
+
+    @patch('support_agent.sub_agents.knowledgeable.agent.get_embedding')
+    def test_queries_are_not_blocked_by_an_update(
+        self, mock_get_embedding, fake_embedding_backend, reset_knowledgeable_cache, tmp_path, monkeypatch
+    ):
+        """Test that queries keep answering from the current version while an update is embedding."""
+        import json
+        import threading
+        import time
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        kb_path = tmp_path / "kb.json"
+        kb_path.write_text(json.dumps(MOCK_KNOWLEDGE_BASE), encoding="utf-8")
+        monkeypatch.setattr(kb_agent, "KNOWLEDGE_BASE_PATH", str(kb_path))
+        monkeypatch.setattr(kb_agent, "SHARED_INDEX_DIR", str(tmp_path / "index"))
+        monkeypatch.setattr(kb_agent, "SHARED_INDEX_CHECK_INTERVAL", 0)
+        monkeypatch.setattr(kb_agent, "RETRIEVAL_MODE", "hybrid")
+        mock_get_embedding.return_value = fake_embedding_backend.embed_batch(["Empréstimo consignado para lojistas"])[0]
+        kb_agent.query_knowledge_base("pix")
+
+        embedding, resume = threading.Event(), threading.Event()
+        embed_batch = fake_embedding_backend.embed_batch
+
+        def blocked_embed_batch(texts):
+            embedding.set()
+            resume.wait(5)
+            return embed_batch(texts)
+
+        monkeypatch.setattr(fake_embedding_backend, "embed_batch", blocked_embed_batch)
+        updater = threading.Thread(
+            target=kb_agent.update_knowledge_base, args=({"https://new": "Empréstimo consignado para lojistas"},)
+        )
+        updater.start()
+        assert embedding.wait(5)
+        started = time.perf_counter()
+        during = kb_agent.query_knowledge_base("consignado", top_k=3)
+        elapsed = time.perf_counter() - started
+        resume.set()
+        updater.join(5)
+
+        assert elapsed < 1
+        assert "https://new" not in [item['url'] for item in during]
+        assert kb_agent.query_knowledge_base("consignado", top_k=1)[0]['url'] == "https://new"
+
+    def test_reload_publishes_for_other_workers(
+        self, fake_embedding_backend, reset_knowledgeable_cache, tmp_path, monkeypatch
+    ):
+        """Test that reload_knowledge_base writes a new shared version."""
+        from support_agent.sub_agents.knowledgeable import agent as kb_agent
+
+        monkeypatch.setattr(kb_agent, "SHARED_INDEX_DIR", str(tmp_path / "index"))
+        kb_agent._knowledge_base_cache = MOCK_KNOWLEDGE_BASE
+        kb_agent.get_knowledge_index()
+        before = kb_agent.get_shared_index().current()
+
+        snapshot = kb_agent.reload_knowledge_base({"https://new": "Conta digital nova"})
+
+        assert kb_agent.get_shared_index().current(refresh=True) == snapshot.source != before
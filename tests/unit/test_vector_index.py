@@ -0,0 +1,75 @@
+"""
+Unit tests for the vectorized knowledge base index.
+"""
+
+import numpy as np
+
+
+class TestVectorIndex:
+    """Tests for the VectorIndex class."""
+
+    def test_rows_are_normalized_float32(self):
+        """Test that stored embeddings are unit-length float32 rows."""
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+        index = VectorIndex(np.array([[3.0, 4.0], [0.0, 2.0]]))
+
+        assert index.matrix.dtype == np.float32
+        assert index.matrix.flags['C_CONTIGUOUS']
+        assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0)
+
+    def test_zero_vector_does_not_produce_nan(self):
+        """Test that an all-zero embedding scores 0 instead of NaN."""
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+        index = VectorIndex(np.array([[0.0, 0.0], [1.0, 0.0]]))
+        ids, scores = index.search(np.array([1.0, 0.0]), top_k=2)
+
+        assert not np.isnan(scores).any()
+        assert ids[0] == 1
+
+    def test_search_matches_cosine_similarity(self):
+        """Test that scores equal the reference cosine similarity."""
+        from support_agent.sub_agents.knowledgeable.agent import cosine_similarity
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(50, 32))
+        query = rng.normal(size=32)
+        index = VectorIndex(vectors)
+
+        ids, scores = index.search(query, top_k=5)
+
+        expected = sorted(
+            ((i, cosine_similarity(query, v)) for i, v in enumerate(vectors)),
+            key=lambda x: x[1],
+            reverse=True,
+        )[:5]
+        assert list(ids) == [i for i, _ in expected]
+        assert np.allclose(scores, [s for _, s in expected], atol=1e-5)
+
+    def test_top_k_larger_than_index(self):
+        """Test that asking for more results than entries returns all entries."""
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+        index = VectorIndex(np.array([[1.0, 0.0], [0.0, 1.0]]))
+        ids, scores = index.search(np.array([1.0, 1.0]), top_k=10)
+
+        assert len(ids) == 2
+        assert scores[0] >= scores[1]
+
+    def test_search_batch_matches_single_queries(self):
+        """Test that batched scoring returns the same ranking as one-by-one."""
+        from support_agent.sub_agents.knowledgeable.vector_index import VectorIndex
+
+        rng = np.random.default_rng(1)
+        index = VectorIndex(rng.normal(size=(100, 16)))
+        queries = rng.normal(size=(4, 16))
+
+        batch_ids, batch_scores = index.search_batch(queries, top_k=3)
+
+        assert batch_ids.shape == (4, 3)
+        for row, query in enumerate(queries):
+            ids, scores = index.search(query, top_k=3)
+            assert list(batch_ids[row]) == list(ids)
+            assert np.allclose(batch_scores[row], scores)
@@ -0,0 +1,116 @@
+"""
+Unit tests for startup warm-up and the readiness endpoint.
+"""
+
+import asyncio
+from fastapi.testclient import TestClient
+
+
+class TestWarmupTracker:
+    """Tests for the WarmupTracker class."""
+
+    async def test_ready_after_all_steps_finish(self):
+        """Test that readiness flips once every step is done."""
+        from api.warmup import WarmupTracker
+
+        release = asyncio.Event()
+
+        async def slow_step():
+            await release.wait()
+
+        async def fast_step():
+            return None
+
+        tracker = WarmupTracker({"slow": slow_step, "fast": fast_step})
+        task = asyncio.create_task(tracker.run())
+        await asyncio.sleep(0.01)
+
+        assert not tracker.ready
+        assert tracker.report()["steps"]["slow"]["state"] == "running"
+        assert tracker.report()["steps"]["fast"]["state"] == "done"
+
+        release.set()
+        await task
+        assert tracker.ready
+
+    async def test_failed_step_is_reported(self):
+        """Test that a failing step records its error without blocking readiness."""
+        from api.warmup import WarmupTracker
+
+        async def broken():
+            raise ConnectionError("embedding API down")
+
+        tracker = WarmupTracker({"knowledge_base": broken})
+        await tracker.run()
+
+        report = tracker.report()
+        assert report["ready"]
+        assert report["steps"]["knowledge_base"]["state"] == "failed"
+        assert "embedding API down" in report["steps"]["knowledge_base"]["error"]
+
+    def test_no_steps_is_ready(self):
+        """Test that a tracker without steps is ready immediately."""
+        from api.warmup import WarmupTracker
+
+        assert WarmupTracker({}).ready
+
+
+class TestReadinessEndpoint:
+    """Tests for GET /api/v1/ready."""
+
+    def test_not_ready_returns_503(self):
+        """Test that the load balancer is kept away while warming up."""
+        from api.main import init_api
+        from api.warmup import WarmupTracker
+
+        app = init_api()
+        app.state.warmup = WarmupTracker({"knowledge_base": None})
+        response = TestClient(app).get("/api/v1/ready")
+
+        assert response.status_code == 503
+        assert response.json()["steps"]["knowledge_base"]["state"] == "pending"
+
+    async def test_ready_returns_200(self):
+        """Test that a warmed worker reports ready."""
+        from api.main import init_api
+        from api.warmup import WarmupTracker
+
+        async def step():
+            return None
+
+        app = init_api()
+        app.state.warmup = WarmupTracker({"knowledge_base": step})
+        await app.state.warmup.run()
+        response = TestClient(app).get("/api/v1/ready")
+
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+
+    def test_health_is_unaffected(self):
+        """Test that liveness does not depend on warm-up."""
+        from api.main import init_api
+        from api.warmup import WarmupTracker
+
+        app = init_api()
+        app.state.warmup = WarmupTracker({"knowledge_base": None})
+
+        assert TestClient(app).get("/api/v1/health").status_code == 200
+
+
+class TestWarmupSteps:
+    """Tests for the warm-up steps registered by the lifespan."""
+
+    def test_knowledge_base_is_warmed_by_default(self):
+        """Test that the knowledge base index build is part of warm-up."""
+        import main
+
+        assert "knowledge_base" in main.warmup_steps()
+        assert "web_driver" not in main.warmup_steps()
+
+    def test_warmup_can_be_disabled(self, monkeypatch):
+        """Test that WARMUP_ENABLED=0 skips warm-up."""
+        import main
+
+        monkeypatch.setattr(main, "WARMUP_ENABLED", 0)
+
+        assert main.warmup_steps() == {}